@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -65,6 +66,7 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "web.context_processors.trash_count",
             ],
         },
     },
@@ -72,6 +74,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "bapp.wsgi.application"
 
+# Whether to use the async versions of the views that wait for gotenberg.
+# Enabled when the app runs on the ASGI server (see docker-entrypoint.sh):
+ASYNC_VIEWS = os.environ.get("BAPP_SERVER") == "asgi"
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -84,6 +90,55 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Per-user values (like the missing Nachweise) are cached and invalidated via
+# signals. A local memory cache only works for that as long as the application
+# runs in a single process (the mod_wsgi-express default).
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "bapp",
+    }
+}
+
+# The directory of the cached Nachweis PDFs (see web.utils.pdf_cache) and the
+# maximum size of that cache in bytes:
+PDF_CACHE_DIR = BASE_DIR / "db" / "pdf_cache"
+PDF_CACHE_MAX_SIZE = 100 * 1024 * 1024
+
+
+# Gotenberg
+# The URL of the gotenberg service that converts the Nachweise to PDF, the
+# maximum number of pooled connections to it, the (connect, read) timeouts in
+# seconds and the number of retries of failed requests. Retries wait
+# GOTENBERG_BACKOFF_FACTOR * 2 ** (retry - 1) seconds.
+
+GOTENBERG_URL = "http://gotenberg:3000"
+GOTENBERG_POOL_SIZE = 10
+GOTENBERG_TIMEOUT = (3.05, 60)
+GOTENBERG_RETRIES = 3
+GOTENBERG_BACKOFF_FACTOR = 0.5
+
+# PDF rendering
+# The backend that converts the Nachweise to PDF: either GotenbergRenderer or
+# LocalRenderer, which renders in-process with WeasyPrint and requires the
+# 'local-pdf' dependencies.
+
+PDF_RENDERER = "web.utils.gotenberg.GotenbergRenderer"
+
+# The maximum number of Nachweise that can be downloaded at once. Every
+# Nachweis of a batch export is converted while the request is waiting, so
+# larger exports would tie up the worker and gotenberg for too long.
+PDF_BATCH_MAX_NACHWEISE = 100
+
+# Whether the pdf_worker management command processes the PDF jobs. If so,
+# the download buttons of the Nachweis list request the PDFs via a PDF job
+# instead of downloading them directly (see pdf_download.js):
+PDF_WORKER = os.environ.get("BAPP_PDF_WORKER") == "1"
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -3,6 +3,16 @@
 echo "Collecting static files..."
 python manage.py collectstatic --no-input --skip-checks --verbosity 0
 
+if [ "$BAPP_SERVER" = "asgi" ]; then
+    # Run the app on the uvicorn ASGI server instead of mod_wsgi. The async
+    # views (see the ASYNC_VIEWS setting) then wait for gotenberg without
+    # blocking a thread. This ignores the container command.
+    # Run a single worker process: the per-user cache is a local memory cache
+    # (see the CACHES setting), which is not shared between processes.
+    echo "Starting ASGI server..."
+    exec uvicorn bapp.asgi:application --host 0.0.0.0 --port 8000 --workers 1
+fi
+
 echo "Setting up server..."
 # https://pypi.org/project/mod-wsgi/
 # In running this command, it will not actually startup Apache. All it will do
@@ -0,0 +1,208 @@
+import json
+import statistics
+import subprocess
+import threading
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.model_factory import NachweisFactory
+from web import models as _models
+
+results_key = pytest.StashKey[list]()
+query_plans_key = pytest.StashKey[list]()
+
+
+def pytest_configure(config):
+    config.stash[results_key] = []
+    config.stash[query_plans_key] = []
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    """Print a table of the benchmark results."""
+    results = config.stash.get(results_key, [])
+    if not results:
+        return
+    query_plans = config.stash.get(query_plans_key, [])
+    if query_plans:
+        terminalreporter.section("query plans")
+        for name, plan in query_plans:
+            terminalreporter.write_line(name)
+            for line in plan.splitlines():
+                terminalreporter.write_line(f"    {line}")
+    if path := config.getoption("--bench-json"):
+        save_results(path, results, config.getoption("--bench-volume"))
+        terminalreporter.write_line(f"Saved the benchmark results to {path}")
+    terminalreporter.section("benchmarks")
+    terminalreporter.write_line(
+        f"{'name':<70} {'min (ms)':>10} {'mean (ms)':>10} {'max (ms)':>10} "
+        f"{'ops/s':>8} {'queries':>8} {'peak (KB)':>10}"
+    )
+    for result in results:
+        peak = f"{result['peak_memory'] / 1024:.0f}" if result.get("peak_memory") is not None else "-"
+        terminalreporter.write_line(
+            f"{result['name']:<70} {result['min'] * 1000:>10.2f} {result['mean'] * 1000:>10.2f} "
+            f"{result['max'] * 1000:>10.2f} {1 / result['mean']:>8.1f} {result['queries']:>8} {peak:>10}"
+        )
+
+
+def save_results(path, results, volume):
+    """Save the benchmark results as JSON, for comparisons between commits."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):  # pragma: no cover
+        commit = None
+    with open(path, "w") as f:
+        json.dump(
+            {"commit": commit, "datetime": datetime.now().isoformat(), "volume": volume, "results": results},
+            f,
+            indent=2,
+        )
+
+
+@pytest.fixture
+def bench(request):
+    """
+    Call the given function repeatedly and record its timings and the number
+    of queries it executes. With memory=True, also record the peak of the
+    Python memory allocations of one additional call. The optional `setup`
+    callable is called before every round, without being timed.
+
+    Usage:
+        def test_dashboard(bench, client):
+            response = bench(client.get, "/")
+    """
+
+    def inner(func, *args, rounds=10, memory=False, setup=None, **kwargs):
+        timings = []
+        for _ in range(rounds):
+            if setup:
+                setup()
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                result = func(*args, **kwargs)
+                timings.append(time.perf_counter() - start)
+        peak_memory = None
+        if memory:
+            if setup:
+                setup()
+            # Measured separately, since tracing slows down the calls:
+            tracemalloc.start()
+            try:
+                func(*args, **kwargs)
+                _, peak_memory = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+        request.config.stash[results_key].append(
+            {
+                "name": request.node.nodeid.split("::", 1)[-1],
+                "rounds": rounds,
+                "min": min(timings),
+                "mean": statistics.mean(timings),
+                "max": max(timings),
+                "queries": len(queries),
+                "peak_memory": peak_memory,
+            }
+        )
+        return result
+
+    return inner
+
+
+@pytest.fixture
+def explain(request):
+    """
+    Record the query plan of the given queryset for the terminal summary.
+
+    Usage:
+        def test_list(explain):
+            explain(Nachweis.objects.filter(user=user))
+    """
+
+    def inner(queryset):
+        name = request.node.nodeid.split("::", 1)[-1]
+        request.config.stash[query_plans_key].append((name, queryset.explain()))
+
+    return inner
+
+
+@pytest.fixture
+def years():
+    """The number of years the benchmark user has been in their Ausbildung."""
+    return 3
+
+
+@pytest.fixture
+def gap_every():
+    """Leave a gap in the benchmark user's Nachweis chain every n periods."""
+    return 20
+
+
+@pytest.fixture
+def daily_user(create_user, years, gap_every):
+    """
+    Create a user with a DAILY interval and a Nachweis for every business day
+    since the start of their Ausbildung - except for the regular gaps.
+    """
+    today = date.today()
+    user = create_user(username="daily")
+    user.profile.start_date = today - timedelta(days=365 * years)
+    user.profile.interval = _models.UserProfile.IntervalType.DAILY
+    user.profile.save()
+
+    nachweise = []
+    d = user.profile.start_date
+    while d < today:
+        if d.isoweekday() < 6:
+            nachweise.append(NachweisFactory.build(user=user, abteilung=None, datum_start=d, datum_ende=d))
+        d += timedelta(days=1)
+    _models.Nachweis.objects.bulk_create(n for i, n in enumerate(nachweise) if i % gap_every)
+    return user
+
+
+@pytest.fixture
+def volume(request):
+    """The number of Nachweise of the user in the view benchmarks."""
+    return request.config.getoption("--bench-volume")
+
+
+class StubGotenbergHandler(BaseHTTPRequestHandler):
+    """Answer every request with a minimal PDF after `latency` seconds."""
+
+    # Keep the connections alive, like gotenberg does:
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+    pdf = b"%PDF-1.4\n%%EOF\n"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.latency)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(len(self.pdf)))
+        self.end_headers()
+        self.wfile.write(self.pdf)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_gotenberg(settings):
+    """
+    Run a stub gotenberg server for the duration of the test and point the
+    GOTENBERG_URL setting at it.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubGotenbergHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    settings.GOTENBERG_URL = f"http://127.0.0.1:{server.server_port}"
+    settings.PDF_RENDERER = "web.utils.gotenberg.GotenbergRenderer"
+    yield server
+    server.shutdown()
+    server.server_close()
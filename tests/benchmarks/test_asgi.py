@@ -0,0 +1,102 @@
+"""
+Compare the throughput of concurrent PDF downloads in the WSGI and the ASGI
+deployment. gotenberg is simulated by a renderer that takes LATENCY seconds
+per conversion.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from unittest import mock
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse
+from django.test import AsyncClient, Client
+from django.urls import path, reverse
+
+from tests.model_factory import NachweisFactory
+from web import models as _models
+from web import views as _views
+
+
+def dummy_view(*_args, **_kwargs):
+    return HttpResponse("test")  # pragma: no cover
+
+
+urlpatterns = [
+    path("wsgi/<int:pk>/download/", _views.nachweis_download_view, name="wsgi_download"),
+    path("asgi/<int:pk>/download/", _views.anachweis_download_view, name="asgi_download"),
+    path("nachweis/", dummy_view, name="nachweis_list"),
+]
+
+pytestmark = [pytest.mark.bench, pytest.mark.django_db(transaction=True), pytest.mark.urls(__name__)]
+
+# The simulated duration of a conversion in seconds:
+LATENCY = 0.2
+# The number of concurrent downloads:
+CONCURRENCY = 20
+# The number of request threads of the WSGI server (the mod_wsgi-express default):
+WSGI_THREADS = 5
+
+
+@pytest.fixture(autouse=True)
+def slow_renderer():
+    """Simulate the latency of gotenberg and bypass the PDF cache."""
+
+    def convert(html, **kwargs):
+        time.sleep(LATENCY)
+        return mock.Mock(status_code=200, content=b"%PDF", raw=BytesIO(b"%PDF"))
+
+    async def aconvert(html, **kwargs):
+        await asyncio.sleep(LATENCY)
+        return mock.Mock(status_code=200, content=b"%PDF")
+
+    renderer = mock.Mock(html_to_pdf=convert, ahtml_to_pdf=aconvert)
+    with mock.patch("web.utils.gotenberg.get_renderer", return_value=renderer):
+        with mock.patch("web.utils.pdf_cache.get", return_value=None):
+            yield
+
+
+@pytest.fixture
+def nachweis(user, add_permission):
+    add_permission(user, "view", _models.Nachweis._meta)
+    return NachweisFactory(user=user)
+
+
+@pytest.fixture
+def session_cookies(client, user, nachweis):
+    client.force_login(user)
+    return client.cookies
+
+
+def test_download_throughput_wsgi(bench, nachweis, session_cookies):
+    """Benchmark CONCURRENCY downloads served by WSGI_THREADS threads."""
+    url = reverse("wsgi_download", kwargs={"pk": nachweis.pk})
+
+    def download(_):
+        client = Client()
+        client.cookies = session_cookies
+        response = client.get(url)
+        b"".join(response.streaming_content)
+        return response.status_code
+
+    def run():
+        with ThreadPoolExecutor(max_workers=WSGI_THREADS) as executor:
+            return list(executor.map(download, range(CONCURRENCY)))
+
+    assert set(bench(run, rounds=3)) == {200}
+
+
+def test_download_throughput_asgi(bench, nachweis, session_cookies):
+    """Benchmark CONCURRENCY downloads served concurrently by the async view."""
+    url = reverse("asgi_download", kwargs={"pk": nachweis.pk})
+
+    async def run():
+        client = AsyncClient()
+        client.cookies = session_cookies
+        responses = await asyncio.gather(*(client.get(url) for _ in range(CONCURRENCY)))
+        return [r.status_code for r in responses]
+
+    assert set(bench(async_to_sync(run), rounds=3)) == {200}
@@ -0,0 +1,78 @@
+"""
+Micro-benchmarks for the rendering of the Nachweis list with pages of 10, 50
+and 500 rows:
+
+    pytest tests/benchmarks/test_changelist.py --bench
+"""
+
+from datetime import date, timedelta
+from unittest import mock
+
+import pytest
+from django.urls import reverse
+
+from tests.model_factory import NachweisFactory
+from web import models as _models
+from web import views as _views
+
+pytestmark = [pytest.mark.bench, pytest.mark.django_db]
+
+
+@pytest.fixture(params=[10, 50, 500])
+def rows(request):
+    """The number of rows on a page."""
+    return request.param
+
+
+@pytest.fixture
+def user(create_user, rows):
+    """Create a superuser with a page full of Nachweise."""
+    user = create_user(username="changelist", is_superuser=True)
+    today = date.today()
+    _models.Nachweis.objects.bulk_create(
+        NachweisFactory.build(
+            user=user,
+            abteilung=None,
+            nummer=n + 1,
+            datum_start=today - timedelta(weeks=n),
+            datum_ende=today - timedelta(weeks=n) + timedelta(days=4),
+            betrieb="Lorem ipsum dolor sit amet\n" * 20,
+        )
+        for n in range(rows)
+    )
+    return user
+
+
+@pytest.fixture
+def make_view(rf, user):
+    """Return a function that creates a NachweisListView for a request of the user."""
+
+    def inner():
+        view = _views.NachweisListView()
+        view.setup(rf.get(reverse("nachweis_list")))
+        view.request.user = user
+        return view
+
+    return inner
+
+
+def test_result_table(bench, make_view, rows):
+    """Benchmark building the cells of the result table of a page."""
+    object_list = list(make_view().get_queryset())
+
+    def build():
+        # A new view for every call, since a view compiles its columns once:
+        view = make_view()
+        return view.get_result_table(view.get_result_rows(object_list))
+
+    table = bench(build, rounds=20, memory=True)
+    assert len(table) == rows
+
+
+def test_nachweis_list_page(bench, client, user, rows):
+    """Benchmark the Nachweis list with `rows` rows per page."""
+    client.force_login(user)
+    with mock.patch.object(_views.NachweisListView, "paginate_by", rows):
+        response = bench(client.get, reverse("nachweis_list"))
+    assert response.status_code == 200
+    assert len(response.context["result_table"]) == rows
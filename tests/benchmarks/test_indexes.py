@@ -0,0 +1,142 @@
+"""
+Benchmarks for the per-user access paths of the Nachweis table.
+
+Every benchmark runs with and without the partial indexes of the Nachweis
+model, and records the query plan of the query that it measures:
+
+    pytest tests/benchmarks/test_indexes.py --bench -p no:xdist
+"""
+
+from datetime import date, timedelta
+
+import pytest
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+
+from tests.model_factory import NachweisFactory
+from web import models as _models
+from web.utils.models import get_current_nachweis
+
+pytestmark = [pytest.mark.bench, pytest.mark.django_db]
+
+
+@pytest.fixture
+def users():
+    """The number of users to populate the database with."""
+    return 20
+
+
+@pytest.fixture
+def nachweise_per_user():
+    """The number of Nachweise per user."""
+    return 200
+
+
+@pytest.fixture
+def deleted_every():
+    """Put every n-th Nachweis in the trash."""
+    return 10
+
+
+@pytest.fixture
+def populated(create_user, users, nachweise_per_user, deleted_every):
+    """
+    Create users with a weekly Nachweis each and return the user whose
+    Nachweise are queried.
+    """
+    today = date.today()
+    nachweise = []
+    for i in range(users):
+        user = create_user(username=f"user{i}", is_superuser=True)
+        user.profile.start_date = today - timedelta(weeks=nachweise_per_user)
+        user.profile.interval = _models.UserProfile.IntervalType.WEEKLY
+        user.profile.save()
+        for n in range(nachweise_per_user):
+            monday = today - timedelta(days=today.weekday(), weeks=nachweise_per_user - n - 1)
+            nachweise.append(
+                NachweisFactory.build(
+                    user=user,
+                    abteilung=None,
+                    nummer=n + 1,
+                    ausbildungswoche=n + 1,
+                    datum_start=monday,
+                    datum_ende=monday + timedelta(days=4),
+                    deleted_at=timezone.now() if n % deleted_every == 0 else None,
+                )
+            )
+    _models.Nachweis.objects.bulk_create(nachweise, batch_size=1000)
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    return user
+
+
+@pytest.fixture(params=["with_indexes", "without_indexes"])
+def indexes(request, populated):
+    """Remove the indexes of the Nachweis model for the 'without' run."""
+    if request.param == "with_indexes":
+        yield
+        return
+    # The schema editor cannot be used inside the test transaction, so drop
+    # the indexes directly and restore them from their stored definitions.
+    names = [index.name for index in _models.Nachweis._meta.indexes]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT sql FROM sqlite_master WHERE type = 'index' AND name IN ({', '.join(['%s'] * len(names))})",
+            names,
+        )
+        definitions = [sql for (sql,) in cursor.fetchall()]
+        for name in names:
+            cursor.execute(f'DROP INDEX "{name}"')
+        cursor.execute("ANALYZE")
+    yield
+    with connection.cursor() as cursor:
+        for sql in definitions:
+            cursor.execute(sql)
+
+
+@pytest.fixture
+def user(populated, indexes):
+    return populated
+
+
+@pytest.fixture
+def login(client, user):
+    client.force_login(user)
+
+
+def test_list_ordering(bench, explain, user):
+    """Benchmark the first page of the user's Nachweise in Meta ordering."""
+    queryset = _models.Nachweis.objects.filter(user=user)[:10]
+    explain(queryset)
+    bench(lambda: list(queryset.all()))
+
+
+def test_recent(bench, explain, user):
+    """Benchmark the most recent Nachweise of the user (dashboard)."""
+    queryset = _models.Nachweis.objects.filter(user=user).order_by("-datum_start")[:3]
+    explain(queryset)
+    bench(lambda: list(queryset.all()))
+
+
+def test_last_nummer(bench, explain, user):
+    """Benchmark the Nachweis with the highest number (NachweisEditView)."""
+    queryset = _models.Nachweis.objects.filter(user=user).order_by("-nummer")[:1]
+    explain(queryset)
+    bench(lambda: list(queryset.all()))
+
+
+def test_current_nachweis(bench, explain, user):
+    """Benchmark the lookup of the Nachweis of the current week."""
+    today = date.today()
+    monday = today - timedelta(days=today.weekday())
+    explain(_models.Nachweis.objects.filter(user=user, datum_start=monday, datum_ende=monday + timedelta(days=4)))
+    assert bench(get_current_nachweis, user)
+
+
+@pytest.mark.usefixtures("login")
+@pytest.mark.parametrize("url_name", ["nachweis_list", "home", "nachweis_add"])
+def test_view(bench, client, url_name):
+    """Benchmark the views that query the user's Nachweise."""
+    response = bench(client.get, reverse(url_name))
+    assert response.status_code == 200
@@ -0,0 +1,29 @@
+import pytest
+from django.urls import reverse
+
+from web.utils.models import get_missing_nachweise
+
+pytestmark = [pytest.mark.bench, pytest.mark.django_db]
+
+
+@pytest.mark.parametrize("years", [1, 3])
+def test_get_missing_nachweise_daily(bench, daily_user):
+    """Benchmark the gap detection for a user with a DAILY interval."""
+    bench(get_missing_nachweise, daily_user)
+
+
+@pytest.mark.parametrize("years", [3])
+def test_dashboard_daily(bench, client, daily_user):
+    """Benchmark the dashboard of a user with a DAILY interval."""
+    client.force_login(daily_user)
+    response = bench(client.get, reverse("home"))
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("years, gap_every", [(3, 2)])
+@pytest.mark.parametrize("page", [1, 5])
+def test_missing_view_daily(bench, client, daily_user, page):
+    """Benchmark a page of the missing Nachweise of a user with a DAILY interval."""
+    client.force_login(daily_user)
+    response = bench(client.get, reverse("missing"), data={"page": page})
+    assert response.status_code == 200
@@ -0,0 +1,48 @@
+import pytest
+import requests
+from django.conf import settings
+
+from tests.model_factory import NachweisFactory
+from web.utils import gotenberg
+
+pytestmark = [pytest.mark.bench, pytest.mark.django_db]
+
+
+@pytest.fixture(params=["GotenbergRenderer", "LocalRenderer"])
+def renderer(request):
+    """Return each of the PDF renderers, skipping those that are not available."""
+    if request.param == "LocalRenderer":
+        pytest.importorskip("weasyprint")
+        pytest.importorskip("pypdf")
+    else:
+        try:
+            requests.get(settings.GOTENBERG_URL + "/health", timeout=1)
+        except requests.RequestException:
+            pytest.skip("gotenberg is not available")
+    return getattr(gotenberg, request.param)()
+
+
+@pytest.fixture
+def print_html(rf, user):
+    """Return the rendered print view of a Nachweis."""
+    request = rf.get("/")
+    request.user = user
+    return gotenberg.render_nachweis(request, NachweisFactory(user=user))
+
+
+def test_html_to_pdf(bench, renderer, print_html):
+    """
+    Benchmark the conversion of the print view with each renderer.
+
+    Note that the peak memory only covers this process: the memory used by
+    gotenberg's Chromium is not included.
+    """
+    response = bench(renderer.html_to_pdf, print_html, data=gotenberg.PRINT_MARGINS, memory=True)
+    assert response.status_code == 200
+
+
+def test_merge_pdfs(bench, renderer, print_html):
+    """Benchmark merging the PDFs of a batch export with each renderer."""
+    pdf = renderer.html_to_pdf(print_html, data=gotenberg.PRINT_MARGINS).content
+    response = bench(renderer.merge_pdfs, [pdf] * 10, rounds=5, memory=True)
+    assert response.status_code == 200
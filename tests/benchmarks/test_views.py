@@ -0,0 +1,138 @@
+"""
+Benchmarks for the views, with a user that has `--bench-volume`
+Nachweise (500 by default):
+
+    pytest tests/benchmarks/test_views.py --bench --bench-volume 2000 --bench-json results.json
+
+Compare the JSON files of two commits to spot regressions.
+"""
+
+from datetime import date, timedelta
+from unittest import mock
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from tests.model_factory import AbteilungFactory, NachweisFactory
+from web import models as _models
+from web.utils.pagination import NEXT, KeysetPaginator
+from web.views import NachweisListView
+
+pytestmark = [pytest.mark.bench, pytest.mark.django_db]
+
+
+@pytest.fixture
+def deleted_every():
+    """Put every n-th Nachweis in the trash."""
+    return 10
+
+
+@pytest.fixture
+def seeded_user(create_user, volume, deleted_every):
+    """Create a user with `volume` weekly Nachweise, some of them in the trash."""
+    today = date.today()
+    user = create_user(username="seeded", is_superuser=True)
+    user.profile.start_date = today - timedelta(weeks=volume)
+    user.profile.interval = _models.UserProfile.IntervalType.WEEKLY
+    user.profile.save()
+    abteilungen = [AbteilungFactory(user=user) for _ in range(5)]
+    nachweise = []
+    for n in range(volume):
+        monday = today - timedelta(days=today.weekday(), weeks=volume - n - 1)
+        nachweise.append(
+            NachweisFactory.build(
+                user=user,
+                abteilung=abteilungen[n % len(abteilungen)],
+                nummer=n + 1,
+                datum_start=monday,
+                datum_ende=monday + timedelta(days=4),
+                deleted_at=timezone.now() if n % deleted_every == 0 else None,
+            )
+        )
+    _models.Nachweis.objects.bulk_create(nachweise)
+    return user
+
+
+@pytest.fixture
+def login(client, seeded_user):
+    client.force_login(seeded_user)
+
+
+@pytest.mark.usefixtures("login")
+@pytest.mark.parametrize("url_name", ["home", "missing", "trash"])
+def test_view(bench, client, url_name):
+    """Benchmark the views without parameters."""
+    response = bench(client.get, reverse(url_name))
+    assert response.status_code == 200
+
+
+@pytest.mark.usefixtures("login")
+@pytest.mark.parametrize(
+    "data",
+    [{}, {"q": "lorem"}, {"jahr": date.today().year}, {"q": "lorem", "jahr": date.today().year}],
+    ids=["all", "text", "jahr", "text+jahr"],
+)
+def test_nachweis_list(bench, client, data):
+    """Benchmark the Nachweis list with search filters."""
+    response = bench(client.get, reverse("nachweis_list"), data=data)
+    assert response.status_code == 200
+
+
+@pytest.mark.usefixtures("login")
+def test_nachweis_list_deep_page(bench, client, seeded_user, volume):
+    """Benchmark a page of the Nachweis list from the middle of the results."""
+    view = NachweisListView()
+    paginator = KeysetPaginator(_models.Nachweis.objects.filter(user=seeded_user), 10, view.keyset_ordering)
+    obj = paginator.queryset[volume // 2]
+    response = bench(client.get, reverse("nachweis_list"), data={"cursor": paginator.encode_cursor(NEXT, obj)})
+    assert response.status_code == 200
+    assert response.context["page_obj"].has_previous()
+
+
+@pytest.mark.usefixtures("login")
+def test_print_preview(bench, client):
+    """Benchmark the print preview of the Nachweis form."""
+    data = {"nummer": 1, "betrieb": "Lorem ipsum\n" * 20, "schule": "Dolor sit amet\n" * 20}
+    response = bench(client.get, reverse("print_preview"), data=data)
+    assert response.status_code == 200
+
+
+@pytest.mark.usefixtures("login")
+def test_empty_trash(bench, client, seeded_user, volume, deleted_every):
+    """Benchmark emptying a trash with every `deleted_every`-th Nachweis."""
+
+    def fill_trash():
+        _models.Nachweis.objects.bulk_create(
+            NachweisFactory.build(user=seeded_user, abteilung=None, deleted_at=timezone.now())
+            for _ in range(volume // deleted_every)
+        )
+
+    response = bench(client.post, reverse("empty_trash"), rounds=5, setup=fill_trash)
+    assert response.status_code == 302
+
+
+@pytest.mark.usefixtures("login", "stub_gotenberg")
+def test_pdf_download(bench, client, seeded_user):
+    """Benchmark the PDF download against a stub gotenberg server, bypassing the PDF cache."""
+    nachweis = _models.Nachweis.objects.filter(user=seeded_user).first()
+    url = reverse("nachweis_download", kwargs={"pk": nachweis.pk})
+
+    def download():
+        response = client.get(url)
+        return response, b"".join(response.streaming_content)
+
+    with mock.patch("web.utils.pdf_cache.get", return_value=None):
+        response, content = bench(download)
+    assert response.status_code == 200
+    assert content.startswith(b"%PDF")
+
+
+@pytest.mark.usefixtures("login", "stub_gotenberg")
+def test_pdf_download_cached(bench, client, seeded_user):
+    """Benchmark the PDF download when the PDF is in the PDF cache."""
+    nachweis = _models.Nachweis.objects.filter(user=seeded_user).first()
+    url = reverse("nachweis_download", kwargs={"pk": nachweis.pk})
+    b"".join(client.get(url).streaming_content)
+    content = bench(lambda: b"".join(client.get(url).streaming_content))
+    assert content.startswith(b"%PDF")
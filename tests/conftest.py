@@ -5,11 +5,64 @@ import pytest
 from django.contrib.auth import get_permission_codename
 from django.contrib.auth.models import Permission
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 
 from web import models as _models
 
 from . import model_factory as _factories
 
+################################################################################
+# HOOKS
+################################################################################
+
+
+def pytest_addoption(parser):
+    parser.addoption("--bench", action="store_true", default=False, help="Run the benchmarks in tests/benchmarks.")
+    parser.addoption(
+        "--bench-json",
+        default=None,
+        metavar="PATH",
+        help="Save the benchmark results as JSON to the given path.",
+    )
+    parser.addoption(
+        "--bench-volume",
+        type=int,
+        default=500,
+        metavar="N",
+        help="The number of Nachweise of the user in the view benchmarks.",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip the benchmarks unless the --bench option is given."""
+    if config.getoption("--bench"):
+        return
+    skip = pytest.mark.skip(reason="benchmarks only run with --bench")
+    for item in items:
+        if item.get_closest_marker("bench"):
+            item.add_marker(skip)
+
+
+################################################################################
+# CACHE
+################################################################################
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Clear the cache, so that no cached values leak from one test into another."""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def pdf_cache_dir(settings, tmp_path):
+    """Store the cached PDFs in a temporary directory."""
+    settings.PDF_CACHE_DIR = tmp_path / "pdf_cache"
+    return settings.PDF_CACHE_DIR
+
+
 ################################################################################
 # MOCKS
 ################################################################################
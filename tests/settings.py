@@ -72,6 +72,7 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "web.context_processors.trash_count",
             ],
         },
     },
@@ -79,6 +80,8 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "bapp.wsgi.application"
 
+ASYNC_VIEWS = False
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -144,3 +147,34 @@ AZUBI_PERMISSIONS = {
 }
 
 AUTH_USER_MODEL = "web.User"
+
+# Tests should override this with a temporary directory (see the pdf_cache_dir
+# fixture in tests/conftest.py):
+PDF_CACHE_DIR = BASE_DIR / "db" / "pdf_cache"
+PDF_CACHE_MAX_SIZE = 100 * 1024 * 1024
+
+# Gotenberg
+# The URL of the gotenberg service that converts the Nachweise to PDF, the
+# maximum number of pooled connections to it, the (connect, read) timeouts in
+# seconds and the number of retries of failed requests. Retries wait
+# GOTENBERG_BACKOFF_FACTOR * 2 ** (retry - 1) seconds.
+
+GOTENBERG_URL = "http://gotenberg:3000"
+GOTENBERG_POOL_SIZE = 10
+GOTENBERG_TIMEOUT = (3.05, 60)
+GOTENBERG_RETRIES = 3
+GOTENBERG_BACKOFF_FACTOR = 0
+
+# PDF rendering
+# The backend that converts the Nachweise to PDF: either GotenbergRenderer or
+# LocalRenderer, which renders in-process with WeasyPrint and requires the
+# 'local-pdf' dependencies.
+
+PDF_RENDERER = "web.utils.gotenberg.GotenbergRenderer"
+
+# The maximum number of Nachweise that can be downloaded at once. Every
+# Nachweis of a batch export is converted while the request is waiting, so
+# larger exports would tie up the worker and gotenberg for too long.
+PDF_BATCH_MAX_NACHWEISE = 100
+
+PDF_WORKER = False
@@ -0,0 +1,34 @@
+import pytest
+
+from web.templatetags import inline_static
+
+
+@pytest.fixture(autouse=True)
+def clear_css_cache():
+    inline_static._load_css.cache_clear()
+    yield
+    inline_static._load_css.cache_clear()
+
+
+def test_minify_css():
+    css = """
+    /* A comment */
+    .row > * {
+        padding-right: calc(var(--bs-gutter-x) * 0.5);
+        margin: 0 auto;
+    }
+    """
+    assert inline_static.minify_css(css) == ".row>*{padding-right:calc(var(--bs-gutter-x) * 0.5);margin:0 auto;}"
+
+
+def test_inline_css():
+    """Assert that the content of the static file is inlined in a style element."""
+    html = inline_static.inline_css("web/css/print.css")
+    assert html.startswith("<style>")
+    assert html.endswith("</style>")
+    assert ".fw-semibold{font-weight:600 !important;}" in html
+
+
+def test_inline_css_not_found():
+    with pytest.raises(ValueError):
+        inline_static.inline_css("web/css/does_not_exist.css")
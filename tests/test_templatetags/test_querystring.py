@@ -37,7 +37,24 @@ def test_remove_qs(rf, request_data, name, expected):
     assert querystring.remove_qs(request, name) == expected
 
 
-@pytest.mark.parametrize("query_string, expected", [("/?page=2", "?unfinished=1"), ("/?unfinished=1&foo=2", "?foo=2")])
+def test_filter_qs(rf):
+    request = rf.get(path="", data={"foo": "bar", "page": "2", "cursor": "abc"})
+    assert querystring.filter_qs(request, "spam", "egg") == "?foo=bar&spam=egg"
+
+
+def test_remove_qs_multiple(rf):
+    request = rf.get(path="", data={"foo": "bar", "page": "2", "cursor": "abc"})
+    assert querystring.remove_qs(request, "page", "cursor") == "?foo=bar"
+
+
+@pytest.mark.parametrize(
+    "query_string, expected",
+    [
+        ("/?page=2", "?unfinished=1"),
+        ("/?cursor=abc", "?unfinished=1"),
+        ("/?unfinished=1&foo=2", "?foo=2"),
+    ],
+)
 def test_nachweis_status(rf, query_string, expected):
     request = rf.get(query_string)
     assert querystring.nachweis_status(request, "unfinished") == expected
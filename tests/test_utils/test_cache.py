@@ -0,0 +1,42 @@
+from unittest import mock
+
+from web.utils import cache as cache_utils
+
+
+def test_get_user_cache_key():
+    """Assert that the cache key includes the namespace, the user and the key parts."""
+    key = cache_utils.get_user_cache_key("foo", 1, "bar")
+    assert key.startswith("foo:1:")
+    assert key.endswith(":bar")
+
+
+def test_get_user_cache_key_stable():
+    """Assert that the cache key does not change between calls."""
+    assert cache_utils.get_user_cache_key("foo", 1) == cache_utils.get_user_cache_key("foo", 1)
+
+
+def test_get_user_cache_key_per_user():
+    """Assert that different users get different cache keys."""
+    assert cache_utils.get_user_cache_key("foo", 1) != cache_utils.get_user_cache_key("foo", 2)
+
+
+def test_get_or_set_for_user():
+    """Assert that the default is only called if no value has been cached yet."""
+    default = mock.Mock(return_value="bar")
+    assert cache_utils.get_or_set_for_user("foo", 1, default) == "bar"
+    assert cache_utils.get_or_set_for_user("foo", 1, default) == "bar"
+    default.assert_called_once()
+
+
+def test_invalidate_user_cache():
+    """Assert that invalidate_user_cache invalidates the values of the user."""
+    cache_utils.get_or_set_for_user("foo", 1, lambda: "bar")
+    cache_utils.invalidate_user_cache("foo", 1)
+    assert cache_utils.get_or_set_for_user("foo", 1, lambda: "baz") == "baz"
+
+
+def test_invalidate_user_cache_other_users():
+    """Assert that invalidate_user_cache does not affect the values of other users."""
+    cache_utils.get_or_set_for_user("foo", 2, lambda: "bar")
+    cache_utils.invalidate_user_cache("foo", 1)
+    assert cache_utils.get_or_set_for_user("foo", 2, lambda: "baz") == "bar"
@@ -2,7 +2,13 @@ from datetime import date
 
 import pytest
 
-from web.utils.date import count_business_days, count_months, count_week_numbers
+from web.utils.date import (
+    count_business_days,
+    count_months,
+    count_week_numbers,
+    previous_business_day,
+    subtract_business_days,
+)
 
 
 @pytest.mark.parametrize(
@@ -45,7 +51,34 @@ def test_count_months(start, end, expected):
         (date(year=2025, month=8, day=1), date(year=2025, month=8, day=4), 2),
         (date(year=2025, month=8, day=1), date(year=2025, month=8, day=11), 7),
         (date(year=2025, month=8, day=1), date(year=2025, month=7, day=30), 0),
+        (date(year=2025, month=8, day=1), date(year=2026, month=7, day=31), 261),
     ],
 )
 def test_count_business_days(start, end, expected):
     assert count_business_days(start, end) == expected
+
+
+@pytest.mark.parametrize(
+    "d, expected",
+    [
+        (date(year=2025, month=8, day=5), date(year=2025, month=8, day=4)),
+        (date(year=2025, month=8, day=4), date(year=2025, month=8, day=1)),  # Monday -> Friday
+        (date(year=2025, month=8, day=3), date(year=2025, month=8, day=1)),  # Sunday -> Friday
+    ],
+)
+def test_previous_business_day(d, expected):
+    assert previous_business_day(d) == expected
+
+
+@pytest.mark.parametrize(
+    "d, n, expected",
+    [
+        (date(year=2025, month=8, day=5), 0, date(year=2025, month=8, day=5)),
+        (date(year=2025, month=8, day=5), 1, date(year=2025, month=8, day=4)),
+        (date(year=2025, month=8, day=5), 2, date(year=2025, month=8, day=1)),
+        (date(year=2025, month=8, day=5), 5, date(year=2025, month=7, day=29)),
+        (date(year=2025, month=8, day=5), 7, date(year=2025, month=7, day=25)),
+    ],
+)
+def test_subtract_business_days(d, n, expected):
+    assert subtract_business_days(d, n) == expected
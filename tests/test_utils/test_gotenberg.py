@@ -0,0 +1,411 @@
+import asyncio
+import threading
+import time
+import zipfile
+from io import BytesIO
+from unittest import mock
+
+import httpx
+import pytest
+import requests
+from asgiref.sync import async_to_sync
+from django.http import FileResponse
+from urllib3.connectionpool import HTTPConnectionPool
+from urllib3.exceptions import ReadTimeoutError
+
+from tests.model_factory import NachweisFactory
+from web.utils import gotenberg
+
+pytestmark = pytest.mark.django_db
+
+
+def pdf_response(content=b"%PDF", status_code=200, text=""):
+    return mock.Mock(status_code=status_code, content=content, text=text, raw=BytesIO(content))
+
+
+@pytest.fixture
+def nachweise(user):
+    return [NachweisFactory(user=user, nummer=n) for n in (1, 2, 3)]
+
+
+@pytest.fixture
+def http_request(rf, user):
+    request = rf.get("/")
+    request.user = user
+    return request
+
+
+@pytest.fixture
+def mock_html_to_pdf():
+    with mock.patch("web.utils.gotenberg.html_to_pdf") as m:
+        m.side_effect = lambda html, **kwargs: pdf_response(content=html.encode())
+        yield m
+
+
+@pytest.fixture
+def session():
+    gotenberg.get_session.cache_clear()
+    yield gotenberg.get_session()
+    gotenberg.get_session.cache_clear()
+
+
+@pytest.fixture
+def mock_merge():
+    with mock.patch("web.utils.gotenberg.merge_pdfs") as m:
+        m.return_value = pdf_response(b"merged")
+        yield m
+
+
+def test_merge_pdfs_file_order():
+    """Assert that the files are named so that gotenberg keeps their order."""
+    with mock.patch("web.utils.gotenberg.get_session") as get_session:
+        gotenberg.merge_pdfs([b"a"] * 11)
+    post = get_session.return_value.post
+    names = [name for _, (name, _, _) in post.call_args.kwargs["files"]]
+    assert names == [f"{i:02}.pdf" for i in range(11)]
+    assert post.call_args.kwargs["url"].endswith("/forms/pdfengines/merge")
+    assert post.call_args.kwargs["stream"] is False
+
+
+@pytest.mark.usefixtures("mock_html_to_pdf")
+def test_nachweise_to_pdf_merged(http_request, nachweise, mock_merge):
+    """Assert that the PDFs are merged in the order of the given Nachweise."""
+    response = gotenberg.nachweise_to_pdf(http_request, nachweise)
+    assert isinstance(response, FileResponse)
+    assert b"".join(response.streaming_content) == b"merged"
+    pdfs = mock_merge.call_args.args[0]
+    expected = [gotenberg.render_nachweis(http_request, n).encode() for n in nachweise]
+    assert pdfs == expected
+
+
+@pytest.mark.usefixtures("mock_html_to_pdf")
+def test_nachweise_to_pdf_merged_spooled(http_request, nachweise, mock_merge):
+    """Assert that the merged PDF is streamed from gotenberg into a temporary file."""
+    with mock.patch("web.utils.gotenberg.tempfile.TemporaryFile", return_value=BytesIO()) as temporary_file:
+        response = gotenberg.nachweise_to_pdf(http_request, nachweise)
+    assert mock_merge.call_args.kwargs["stream"] is True
+    assert response.file_to_stream is temporary_file.return_value
+    assert b"".join(response.streaming_content) == b"merged"
+
+
+@pytest.mark.usefixtures("mock_html_to_pdf")
+def test_nachweise_to_pdf_zip(http_request, nachweise, mock_merge):
+    """Assert that the PDFs can be downloaded as a ZIP file instead."""
+    response = gotenberg.nachweise_to_pdf(http_request, nachweise, as_zip=True)
+    with zipfile.ZipFile(BytesIO(b"".join(response.streaming_content))) as zf:
+        assert zf.namelist() == ["1.pdf", "2.pdf", "3.pdf"]
+    mock_merge.assert_not_called()
+
+
+def test_nachweise_to_pdf_bounded_workers(http_request, user, mock_merge):
+    """Assert that no more than max_workers conversions run concurrently."""
+    nachweise = [NachweisFactory(user=user) for _ in range(8)]
+    lock = threading.Lock()
+    running = peak = 0
+
+    def convert(html, **kwargs):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.01)
+        with lock:
+            running -= 1
+        return pdf_response()
+
+    with mock.patch("web.utils.gotenberg.html_to_pdf", new=convert):
+        gotenberg.nachweise_to_pdf(http_request, nachweise, max_workers=3)
+    assert 1 < peak <= 3
+
+
+def test_nachweise_to_pdf_failed(http_request, nachweise, mock_merge):
+    """Assert that the user is redirected if a conversion failed."""
+    with mock.patch("web.utils.gotenberg.html_to_pdf", return_value=pdf_response(status_code=500, text="Oops")):
+        with mock.patch("web.utils.gotenberg.messages") as mock_messages:
+            response = gotenberg.nachweise_to_pdf(http_request, nachweise)
+    assert response.status_code == 302
+    mock_messages.error.assert_called_once()
+    mock_merge.assert_not_called()
+
+
+def test_nachweis_to_pdf_cached(http_request, user):
+    """Assert that the PDF is only converted once for the same Nachweis."""
+    nachweis = NachweisFactory(user=user)
+    with mock.patch("web.utils.gotenberg.html_to_pdf", return_value=pdf_response(b"%PDF-1")) as m:
+        # The PDF is stored while it is streamed to the client:
+        assert b"".join(gotenberg.nachweis_to_pdf(http_request, nachweis).streaming_content) == b"%PDF-1"
+        assert b"".join(gotenberg.nachweis_to_pdf(http_request, nachweis).streaming_content) == b"%PDF-1"
+    m.assert_called_once()
+
+
+def test_nachweis_to_pdf_streamed(http_request, user):
+    """Assert that the PDF is streamed from the gotenberg response."""
+    nachweis = NachweisFactory(user=user)
+    with mock.patch("web.utils.gotenberg.html_to_pdf", return_value=pdf_response(b"%PDF-1")) as m:
+        response = gotenberg.nachweis_to_pdf(http_request, nachweis)
+    assert m.call_args.kwargs["stream"]
+    assert isinstance(response, FileResponse)
+    assert response["Content-Disposition"] == f'attachment; filename="{nachweis.nummer}.pdf"'
+    assert b"".join(response.streaming_content) == b"%PDF-1"
+
+
+def test_nachweis_to_pdf_cache_changed(http_request, user):
+    """Assert that the PDF is converted again when the Nachweis changed."""
+    nachweis = NachweisFactory(user=user, betrieb="foo")
+    with mock.patch("web.utils.gotenberg.html_to_pdf", side_effect=lambda *args, **kwargs: pdf_response()) as m:
+        b"".join(gotenberg.nachweis_to_pdf(http_request, nachweis).streaming_content)
+        nachweis.betrieb = "bar"
+        nachweis.save()
+        b"".join(gotenberg.nachweis_to_pdf(http_request, nachweis).streaming_content)
+    assert m.call_count == 2
+
+
+def test_nachweis_to_pdf_failed_not_cached(http_request, user):
+    """Assert that failed conversions are not cached."""
+    nachweis = NachweisFactory(user=user)
+    with mock.patch("web.utils.gotenberg.html_to_pdf", return_value=pdf_response(status_code=500)) as m:
+        with mock.patch("web.utils.gotenberg.messages"):
+            gotenberg.nachweis_to_pdf(http_request, nachweis)
+            gotenberg.nachweis_to_pdf(http_request, nachweis)
+    assert m.call_count == 2
+
+
+def test_get_session_shared(session):
+    """Assert that all requests share the same session."""
+    assert gotenberg.get_session() is session
+
+
+def test_get_session_adapter(session, settings):
+    """Assert that the session pools its connections and retries failed requests."""
+    adapter = session.get_adapter(settings.GOTENBERG_URL)
+    assert adapter._pool_maxsize == settings.GOTENBERG_POOL_SIZE
+    assert adapter.max_retries.total == settings.GOTENBERG_RETRIES
+    assert 503 in adapter.max_retries.status_forcelist
+    assert adapter.max_retries.is_retry("POST", 503)
+
+
+def test_get_session_no_read_retries(session, settings):
+    """Assert that requests that ran into the read timeout are not retried."""
+    settings.GOTENBERG_URL = "http://gotenberg.invalid:3000"
+    error = ReadTimeoutError(None, "/forms/chromium/convert/html", "Read timed out.")
+    with mock.patch.object(HTTPConnectionPool, "_make_request", side_effect=error) as make_request:
+        with pytest.raises(requests.ReadTimeout):
+            gotenberg._gotenberg_request(gotenberg.CONVERSION.HTML, data={})
+    make_request.assert_called_once()
+
+
+def test_gotenberg_request_url_and_timeout(settings):
+    """Assert that requests go to the GOTENBERG_URL with the configured timeout."""
+    settings.GOTENBERG_URL = "http://example.com:1234/"
+    with mock.patch("web.utils.gotenberg.get_session") as get_session:
+        gotenberg._gotenberg_request(gotenberg.CONVERSION.HTML, data={})
+    kwargs = get_session.return_value.post.call_args.kwargs
+    assert kwargs["url"] == "http://example.com:1234/forms/chromium/convert/html"
+    assert kwargs["timeout"] == settings.GOTENBERG_TIMEOUT
+
+
+def test_nachweis_to_pdf_request_exception(http_request, user):
+    """Assert that the user is redirected if gotenberg could not be reached."""
+    nachweis = NachweisFactory(user=user)
+    with mock.patch("web.utils.gotenberg.html_to_pdf", side_effect=requests.Timeout("timed out")):
+        with mock.patch("web.utils.gotenberg.messages") as mock_messages:
+            response = gotenberg.nachweis_to_pdf(http_request, nachweis)
+    assert response.status_code == 302
+    mock_messages.error.assert_called_once()
+
+
+def test_nachweise_to_pdf_request_exception(http_request, nachweise, mock_merge):
+    """Assert that the user is redirected if gotenberg could not be reached."""
+    with mock.patch("web.utils.gotenberg.html_to_pdf", side_effect=requests.ConnectionError("refused")):
+        with mock.patch("web.utils.gotenberg.messages") as mock_messages:
+            response = gotenberg.nachweise_to_pdf(http_request, nachweise)
+    assert response.status_code == 302
+    mock_messages.error.assert_called_once()
+    mock_merge.assert_not_called()
+
+
+def test_html_to_pdf_in_memory():
+    """Assert that the HTML is uploaded as 'index.html' without a temporary file."""
+    with mock.patch("web.utils.gotenberg._gotenberg_request") as request_mock:
+        gotenberg.html_to_pdf("<p>foo</p>", data={"a": 1})
+    kwargs = request_mock.call_args.kwargs
+    assert kwargs["files"]["file"] == ("index.html", b"<p>foo</p>", "text/html")
+    assert kwargs["data"] == {"a": 1}
+    assert not kwargs["stream"]
+
+
+@pytest.fixture
+def clear_renderer():
+    gotenberg._load_renderer.cache_clear()
+    yield
+    gotenberg._load_renderer.cache_clear()
+
+
+@pytest.mark.usefixtures("clear_renderer")
+def test_get_renderer(settings):
+    """Assert that get_renderer returns the renderer selected by the setting."""
+    settings.PDF_RENDERER = "web.utils.gotenberg.GotenbergRenderer"
+    assert isinstance(gotenberg.get_renderer(), gotenberg.GotenbergRenderer)
+    assert gotenberg.get_renderer() is gotenberg.get_renderer()
+
+
+@pytest.mark.usefixtures("clear_renderer")
+def test_html_to_pdf_uses_renderer(settings):
+    """Assert that html_to_pdf and merge_pdfs delegate to the selected renderer."""
+    renderer = mock.Mock()
+    with mock.patch("web.utils.gotenberg.get_renderer", return_value=renderer):
+        gotenberg.html_to_pdf("<p>foo</p>", data={"a": 1})
+        gotenberg.merge_pdfs([b"a"])
+    renderer.html_to_pdf.assert_called_with("<p>foo</p>", stream=False, data={"a": 1})
+    renderer.merge_pdfs.assert_called_with([b"a"], stream=False)
+
+
+class TestLocalRenderer:
+    @pytest.fixture
+    def renderer(self):
+        pytest.importorskip("weasyprint")
+        pytest.importorskip("pypdf")
+        return gotenberg.LocalRenderer()
+
+    def test_html_to_pdf(self, renderer):
+        response = renderer.html_to_pdf("<p>foo</p>", data=gotenberg.PRINT_MARGINS)
+        assert response.status_code == 200
+        assert response.content.startswith(b"%PDF")
+        assert response.raw.read() == response.content
+
+    def test_merge_pdfs(self, renderer):
+        import pypdf
+
+        pdfs = [renderer.html_to_pdf(f"<p>{i}</p>").content for i in range(3)]
+        response = renderer.merge_pdfs(pdfs)
+        assert response.status_code == 200
+        assert len(pypdf.PdfReader(BytesIO(response.content)).pages) == 3
+
+    def test_merge_pdfs_invalid(self, renderer):
+        """Assert that errors are reported like failed gotenberg requests."""
+        response = renderer.merge_pdfs([b"not a pdf"])
+        assert response.status_code == 500
+        assert response.text
+
+    def test_get_page_css(self, renderer):
+        assert renderer.get_page_css(gotenberg.PRINT_MARGINS) == "@page { margin: 0in 0in 0in 0in }"
+        assert renderer.get_page_css({}) == ""
+
+    def test_nachweis_to_pdf(self, renderer, settings, http_request, user, clear_renderer):
+        """Assert that a Nachweis can be downloaded without a gotenberg service."""
+        settings.PDF_RENDERER = "web.utils.gotenberg.LocalRenderer"
+        response = gotenberg.nachweis_to_pdf(http_request, NachweisFactory(user=user))
+        assert b"".join(response.streaming_content).startswith(b"%PDF")
+
+
+def test_render_nachweis_no_external_resources(http_request, user):
+    """Assert that the print view does not load anything over the network."""
+    html = gotenberg.render_nachweis(http_request, NachweisFactory(user=user))
+    assert "<style>" in html
+    assert "<link" not in html
+    assert "<script" not in html
+
+
+@pytest.fixture
+def mock_async_renderer():
+    renderer = mock.Mock()
+    renderer.ahtml_to_pdf = mock.AsyncMock(side_effect=lambda html, **kwargs: pdf_response(content=html.encode()))
+    renderer.amerge_pdfs = mock.AsyncMock(return_value=pdf_response(b"merged"))
+    with mock.patch("web.utils.gotenberg.get_renderer", return_value=renderer):
+        yield renderer
+
+
+def test_anachweis_to_pdf(http_request, user, mock_async_renderer):
+    """Assert that the async version converts the PDF once and then serves it from the cache."""
+    nachweis = NachweisFactory(user=user)
+    first = async_to_sync(gotenberg.anachweis_to_pdf)(http_request, nachweis)
+    second = async_to_sync(gotenberg.anachweis_to_pdf)(http_request, nachweis)
+    mock_async_renderer.ahtml_to_pdf.assert_awaited_once()
+    assert first.content == second.content == gotenberg.render_nachweis(http_request, nachweis).encode()
+    assert first["Content-Disposition"] == f'attachment; filename="{nachweis.nummer}.pdf"'
+
+
+def test_anachweis_to_pdf_cache_in_thread(http_request, user, mock_async_renderer):
+    """Assert that the PDF cache is not accessed on the event loop thread."""
+    nachweis = NachweisFactory(user=user)
+    threads = []
+
+    def record(func):
+        def inner(*args):
+            threads.append(threading.current_thread())
+            return func(*args)
+
+        return inner
+
+    async def download_twice():
+        await gotenberg.anachweis_to_pdf(http_request, nachweis)
+        await gotenberg.anachweis_to_pdf(http_request, nachweis)
+        return threading.current_thread()
+
+    with mock.patch("web.utils.gotenberg.pdf_cache.get", new=record(gotenberg.pdf_cache.get)):
+        with mock.patch("web.utils.gotenberg.pdf_cache.put", new=record(gotenberg.pdf_cache.put)):
+            loop_thread = async_to_sync(download_twice)()
+    assert len(threads) == 3
+    assert loop_thread not in threads
+
+
+def test_anachweis_to_pdf_request_exception(http_request, user, mock_async_renderer):
+    """Assert that the user is redirected if gotenberg could not be reached."""
+    mock_async_renderer.ahtml_to_pdf.side_effect = requests.ConnectionError("refused")
+    with mock.patch("web.utils.gotenberg.messages") as mock_messages:
+        response = async_to_sync(gotenberg.anachweis_to_pdf)(http_request, NachweisFactory(user=user))
+    assert response.status_code == 302
+    mock_messages.error.assert_called_once()
+
+
+def test_anachweise_to_pdf_merged(http_request, nachweise, mock_async_renderer):
+    """Assert that the async version merges the PDFs in the given order."""
+    response = async_to_sync(gotenberg.anachweise_to_pdf)(http_request, nachweise)
+    assert response.content == b"merged"
+    pdfs = mock_async_renderer.amerge_pdfs.call_args.args[0]
+    assert pdfs == [gotenberg.render_nachweis(http_request, n).encode() for n in nachweise]
+
+
+def test_anachweise_to_pdf_zip(http_request, nachweise, mock_async_renderer):
+    response = async_to_sync(gotenberg.anachweise_to_pdf)(http_request, nachweise, as_zip=True)
+    assert response["Content-Type"] == "application/zip"
+    with zipfile.ZipFile(BytesIO(response.content)) as zf:
+        assert zf.namelist() == ["1.pdf", "2.pdf", "3.pdf"]
+
+
+def test_anachweise_to_pdf_bounded_workers(http_request, user, mock_async_renderer):
+    """Assert that no more than max_workers conversions run concurrently."""
+    nachweise = [NachweisFactory(user=user) for _ in range(8)]
+    running = peak = 0
+
+    async def convert(html, **kwargs):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return pdf_response()
+
+    mock_async_renderer.ahtml_to_pdf.side_effect = convert
+    async_to_sync(gotenberg.anachweise_to_pdf)(http_request, nachweise, max_workers=3)
+    assert 1 < peak <= 3
+
+
+def test_get_async_client_per_loop():
+    """Assert that the async client is shared within an event loop."""
+
+    async def get_client():
+        return gotenberg.get_async_client(), gotenberg.get_async_client()
+
+    first, second = asyncio.run(get_client())
+    assert first is second
+    assert asyncio.run(get_client())[0] is not first
+
+
+def test_gotenberg_renderer_async_request_exception():
+    """Assert that failed async requests raise the same exception as sync requests."""
+    client = mock.Mock(post=mock.AsyncMock(side_effect=httpx.ConnectError("refused")))
+    with mock.patch("web.utils.gotenberg.get_async_client", return_value=client):
+        with pytest.raises(requests.RequestException):
+            asyncio.run(gotenberg.GotenbergRenderer().ahtml_to_pdf("<p>foo</p>"))
+    assert client.post.call_args.args[0] == "/forms/chromium/convert/html"
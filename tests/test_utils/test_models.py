@@ -4,9 +4,10 @@ from unittest import mock
 
 import pytest
 
-from tests.model_factory import NachweisFactory
+from tests.model_factory import AbteilungFactory, NachweisFactory
 from web import models as _models
 from web.utils import models as utils
+from web.utils.date import count_business_days
 
 from .models import SoftDeleteTestModel
 
@@ -47,6 +48,51 @@ def test_collect_deleted_objects(user, obj, deleted_obj, not_user_obj):
     assert not_user_obj not in queryset
 
 
+def test_count_deleted_objects(user, obj, deleted_obj, not_user_obj, django_assert_num_queries):
+    """Assert that count_deleted_objects counts the user's deleted items with one query."""
+    SoftDeleteTestModel.objects.create(name="Qux", user=user).delete()
+    with mock.patch("web.utils.models._get_soft_delete_models", new=mock.Mock(return_value=[SoftDeleteTestModel])):
+        with django_assert_num_queries(1):
+            assert utils.count_deleted_objects(user) == 2
+
+
+@pytest.mark.django_db
+class TestGetExcerpt:
+    @pytest.fixture
+    def get_excerpt(self):
+        """Annotate an excerpt of 10 characters for the given text and return it."""
+
+        def inner(text):
+            obj = NachweisFactory(betrieb=text)
+            queryset = utils.annotate_excerpts(_models.Nachweis.objects.filter(pk=obj.pk), "betrieb", length=10)
+            return utils.get_excerpt(queryset.get(), "betrieb", length=10)
+
+        return inner
+
+    @pytest.mark.parametrize(
+        "text, expected",
+        [
+            ("", ("", False)),
+            ("Foo bar", ("Foo bar", False)),
+            ("Foo bar ba", ("Foo bar ba", False)),
+            # Drop the word that was cut off:
+            ("Foo bar baz", ("Foo bar", True)),
+            # The last word is complete:
+            ("Foo bar ba qux", ("Foo bar ba", True)),
+            ("Foobarbazqux", ("", True)),
+        ],
+    )
+    def test_get_excerpt(self, get_excerpt, text, expected):
+        """Assert that get_excerpt returns the expected excerpt."""
+        assert get_excerpt(text) == expected
+
+    def test_annotate_excerpts_length(self):
+        """Assert that annotate_excerpts only fetches the beginning of the text."""
+        obj = NachweisFactory(betrieb="x" * 100)
+        queryset = utils.annotate_excerpts(_models.Nachweis.objects.filter(pk=obj.pk), "betrieb", length=10)
+        assert queryset.get().betrieb_excerpt == "x" * 11
+
+
 class TestGetCurrentNachweis:
     @pytest.fixture
     def today(self):
@@ -214,6 +260,57 @@ class TestGetMissingNachweise:
         NachweisFactory(user=user, datum_start=date(2025, 10, 1), datum_ende=date(2025, 10, monthrange(2025, 11)[1]))
         assert utils.get_missing_nachweise(user) == missing
 
+    @pytest.mark.parametrize("interval", [_models.UserProfile.IntervalType.MONTHLY])
+    @pytest.mark.parametrize("start_date", [date(2025, 1, 31)])
+    @pytest.mark.parametrize("today", [date(2025, 4, 1)])
+    def test_get_missing_monthly_start_end_of_month(self, user):
+        """
+        Assert that no month is skipped if the Ausbildung began at the end of a
+        month.
+        """
+        assert utils.get_missing_nachweise(user) == [
+            (date(2025, 3, 1), date(2025, 3, 31)),
+            (date(2025, 2, 1), date(2025, 2, 28)),
+            (date(2025, 1, 31), date(2025, 1, 31)),
+        ]
+
+    @pytest.mark.parametrize("interval", [_models.UserProfile.IntervalType.WEEKLY])
+    @pytest.mark.parametrize("start_date", [date(2025, 11, 24)])
+    @pytest.mark.parametrize("today", [date(2025, 12, 18)])
+    def test_ignores_nachweise_off_schedule(self, user):
+        """
+        Assert that Nachweis objects that do not start on a regular period
+        start do not close any gaps.
+        """
+        NachweisFactory(user=user, datum_start=date(2025, 12, 2), datum_ende=date(2025, 12, 5))
+        assert utils.get_missing_nachweise(user) == [
+            (date(2025, 12, 8), date(2025, 12, 12)),
+            (date(2025, 12, 1), date(2025, 12, 5)),
+            (date(2025, 11, 24), date(2025, 11, 28)),
+        ]
+
+    @pytest.mark.parametrize("interval", [_models.UserProfile.IntervalType.DAILY])
+    @pytest.mark.parametrize("start_date", [date(2022, 8, 1)])
+    @pytest.mark.parametrize("today", [date(2025, 8, 1)])
+    def test_single_query(self, user, start_date, today, django_assert_num_queries):
+        """
+        Assert that the gaps are derived with a single query, regardless of
+        the length of the Ausbildung.
+        """
+        NachweisFactory(user=user, datum_start=start_date, datum_ende=start_date)
+        with django_assert_num_queries(1):
+            missing = utils.get_missing_nachweise(user)
+        assert len(missing) == count_business_days(start_date, today - timedelta(days=1)) - 1
+
+    @pytest.mark.parametrize("interval", [_models.UserProfile.IntervalType.DAILY])
+    @pytest.mark.parametrize("start_date", [None])
+    def test_no_start_date(self, user):
+        """
+        Assert that get_missing_nachweise returns an empty list if the user did
+        not set the start date of their Ausbildung.
+        """
+        assert utils.get_missing_nachweise(user) == []
+
     @pytest.mark.parametrize("interval", [_models.UserProfile.IntervalType.OTHER, "Foo"])
     def test_no_interval(self, user):
         """
@@ -223,6 +320,253 @@ class TestGetMissingNachweise:
         assert utils.get_missing_nachweise(user) == []
 
 
+class TestMissingNachweise:
+    @pytest.fixture
+    def today(self):
+        return date(2025, 12, 18)
+
+    @pytest.fixture(autouse=True)
+    def mock_today(self, today):
+        """Mock out the built-in date.today function."""
+        with mock.patch("web.utils.models.date", wraps=date) as m:
+            m.today.return_value = today
+            yield m
+
+    @pytest.fixture
+    def user(self, create_user):
+        user = create_user()
+        user.profile.start_date = date(2025, 11, 3)
+        user.profile.interval = _models.UserProfile.IntervalType.DAILY
+        user.profile.save()
+        return user
+
+    @pytest.fixture(autouse=True)
+    def nachweise(self, user):
+        """Create a Nachweis for every other business day."""
+        for d in utils.get_missing_nachweise(user)[::2]:
+            NachweisFactory(user=user, datum_start=d[0], datum_ende=d[1])
+
+    @pytest.fixture
+    def expected(self, user):
+        return utils.get_missing_nachweise(user)
+
+    def test_len(self, user, expected, django_assert_num_queries):
+        """Assert that the length is counted with a single query."""
+        with django_assert_num_queries(1):
+            assert len(utils.MissingNachweise(user)) == len(expected)
+
+    @pytest.mark.parametrize("index", [slice(0, 3), slice(2, 5), slice(5, None), slice(None, None, 2), slice(-3, None)])
+    def test_getitem_slice(self, user, expected, index):
+        """Assert that slicing returns the expected periods."""
+        assert utils.MissingNachweise(user)[index] == expected[index]
+
+    @pytest.mark.parametrize("index", [0, 4, -1])
+    def test_getitem_index(self, user, expected, index):
+        """Assert that indexing returns the expected period."""
+        assert utils.MissingNachweise(user)[index] == expected[index]
+
+    def test_getitem_index_error(self, user, expected):
+        with pytest.raises(IndexError):
+            utils.MissingNachweise(user)[len(expected)]
+
+    def test_iter(self, user, expected):
+        assert list(utils.MissingNachweise(user)) == expected
+
+    @pytest.mark.parametrize("offset", [0, 1, 3, 10])
+    def test_iter_missing_nachweise_offset(self, user, expected, offset):
+        """Assert that iter_missing_nachweise skips the given number of periods."""
+        assert list(utils.iter_missing_nachweise(user, offset=offset)) == expected[offset:]
+
+
+class TestGetCachedMissingNachweise:
+    @pytest.fixture
+    def today(self):
+        return date(2025, 12, 18)
+
+    @pytest.fixture(autouse=True)
+    def mock_today(self, today):
+        """Mock out the built-in date.today function."""
+        with mock.patch("web.utils.models.date", wraps=date) as m:
+            m.today.return_value = today
+            yield m
+
+    @pytest.fixture
+    def user(self, create_user):
+        user = create_user()
+        user.profile.start_date = date(2025, 11, 24)
+        user.profile.interval = _models.UserProfile.IntervalType.WEEKLY
+        user.profile.save()
+        return user
+
+    def test_cached(self, user, django_assert_num_queries):
+        """Assert that the missing Nachweise are only computed once."""
+        missing = utils.get_cached_missing_nachweise(user)
+        with django_assert_num_queries(0):
+            assert utils.get_cached_missing_nachweise(user) == missing
+
+    def test_cache_expires_next_day(self, user, mock_today):
+        """Assert that the cached result is only used on the same day."""
+        utils.get_cached_missing_nachweise(user)
+        mock_today.today.return_value = date(2025, 12, 29)
+        assert (date(2025, 12, 15), date(2025, 12, 19)) in utils.get_cached_missing_nachweise(user)
+
+    def test_invalidated_by_new_nachweis(self, user):
+        """Assert that creating a Nachweis invalidates the cached result."""
+        assert (date(2025, 12, 1), date(2025, 12, 5)) in utils.get_cached_missing_nachweise(user)
+        NachweisFactory(user=user, datum_start=date(2025, 12, 1), datum_ende=date(2025, 12, 5))
+        assert (date(2025, 12, 1), date(2025, 12, 5)) not in utils.get_cached_missing_nachweise(user)
+
+    def test_invalidated_by_soft_delete_and_restore(self, user):
+        """Assert that soft-deleting and restoring a Nachweis invalidates the cached result."""
+        obj = NachweisFactory(user=user, datum_start=date(2025, 12, 1), datum_ende=date(2025, 12, 5))
+        assert (date(2025, 12, 1), date(2025, 12, 5)) not in utils.get_cached_missing_nachweise(user)
+        obj.delete()
+        assert (date(2025, 12, 1), date(2025, 12, 5)) in utils.get_cached_missing_nachweise(user)
+        obj.restore(strict=False)
+        assert (date(2025, 12, 1), date(2025, 12, 5)) not in utils.get_cached_missing_nachweise(user)
+
+    def test_invalidated_by_profile_change(self, user):
+        """Assert that changing the user's profile invalidates the cached result."""
+        assert utils.get_cached_missing_nachweise(user)
+        user.profile.interval = _models.UserProfile.IntervalType.OTHER
+        user.profile.save()
+        assert utils.get_cached_missing_nachweise(user) == []
+
+
+@pytest.mark.django_db
+class TestGetCachedNachweisFacetCounts:
+    @pytest.fixture(autouse=True)
+    def nachweise(self, user):
+        return NachweisFactory.create_batch(3, user=user, abteilung=None, fertig=False)
+
+    @pytest.fixture
+    def get_count(self, rf, user):
+        """Return the cached total count of the user's Nachweise for the given query string."""
+
+        def inner(query_string="", **filters):
+            queryset = _models.Nachweis.objects.filter(user=user, **filters)
+            params = rf.get(f"/{query_string}").GET
+            return utils.get_cached_nachweis_facet_counts(user, queryset, params, exclude=["cursor"]).total
+
+        return inner
+
+    def test_cached(self, get_count, django_assert_num_queries):
+        """Assert that the counts are only queried once."""
+        assert get_count() == 3
+        with django_assert_num_queries(0):
+            assert get_count() == 3
+
+    def test_cached_per_search(self, get_count):
+        """Assert that every search gets its own count."""
+        assert get_count() == 3
+        assert get_count("?unfinished=1&foo=bar", fertig=True) == 0
+        assert get_count("?foo=bar&unfinished=1", fertig=True) == 0
+
+    def test_excluded_parameters(self, get_count, django_assert_num_queries):
+        """Assert that the excluded parameters do not change the cache key."""
+        get_count("?foo=bar")
+        with django_assert_num_queries(0):
+            get_count("?foo=bar&cursor=abc")
+
+    def test_invalidated_by_new_nachweis(self, user, get_count):
+        """Assert that creating a Nachweis invalidates the cached count."""
+        assert get_count() == 3
+        NachweisFactory(user=user, abteilung=None)
+        assert get_count() == 4
+
+    def test_invalidated_by_create_missing_nachweise(self, user, get_count):
+        """Assert that creating the missing Nachweise invalidates the cached count."""
+        user.profile.start_date = date.today() - timedelta(weeks=3)
+        user.profile.interval = _models.UserProfile.IntervalType.WEEKLY
+        user.profile.save()
+        assert get_count() == 3
+        created = utils.create_missing_nachweise(user)
+        assert created
+        assert get_count() == 3 + len(created)
+
+
+@pytest.mark.django_db
+class TestGetNachweisFacets:
+    @pytest.fixture
+    def abteilungen(self, user):
+        return [AbteilungFactory(user=user, name="IT"), AbteilungFactory(user=user, name="Einkauf")]
+
+    @pytest.fixture(autouse=True)
+    def nachweise(self, user, abteilungen):
+        it, einkauf = abteilungen
+        return [
+            NachweisFactory(user=user, datum_start=date(2025, 3, 3), eingereicht_bei="Bob", abteilung=it),
+            NachweisFactory(user=user, datum_start=date(2025, 3, 10), eingereicht_bei="Alice", abteilung=it),
+            NachweisFactory(user=user, datum_start=date(2024, 3, 11), eingereicht_bei="", abteilung=einkauf),
+            NachweisFactory(user=user, datum_start=date(2026, 3, 9), eingereicht_bei="Bob", abteilung=None),
+        ]
+
+    @pytest.fixture(autouse=True)
+    def not_user_nachweis(self, superuser):
+        """A Nachweis of another user, whose values must not show up in the facets."""
+        return NachweisFactory(user=superuser, datum_start=date(2020, 1, 6), eingereicht_bei="Eve")
+
+    def test_get_nachweis_facets(self, user, abteilungen, django_assert_num_queries):
+        """Assert that get_nachweis_facets returns the distinct values in one query."""
+        it, einkauf = abteilungen
+        with django_assert_num_queries(1):
+            facets = utils.get_nachweis_facets(user)
+        assert facets == utils.NachweisFacets(
+            jahre=[2024, 2025, 2026],
+            eingereicht_bei=["Alice", "Bob"],
+            abteilungen=[(einkauf.pk, "Einkauf"), (it.pk, "IT")],
+        )
+
+    def test_count_nachweis_facets(self, user, abteilungen, nachweise, django_assert_num_queries):
+        """Assert that count_nachweis_facets counts every option in one query."""
+        it, einkauf = abteilungen
+        nachweise[0].fertig = True
+        nachweise[0].save()
+        facets = utils.get_nachweis_facets(user)
+        queryset = _models.Nachweis.objects.filter(user=user)
+        with django_assert_num_queries(1):
+            counts = utils.count_nachweis_facets(queryset, facets)
+        assert counts == utils.NachweisFacetCounts(
+            total=4,
+            status={"unfinished": 3, "unsubmitted": 1, "unsigned": 4},
+            jahre={2024: 1, 2025: 2, 2026: 1},
+            eingereicht_bei={"Alice": 1, "Bob": 2},
+            abteilungen={einkauf.pk: 1, it.pk: 2},
+        )
+
+    def test_count_nachweis_facets_filtered(self, user, abteilungen):
+        """Assert that count_nachweis_facets only counts the results of the queryset."""
+        it, einkauf = abteilungen
+        facets = utils.get_nachweis_facets(user)
+        counts = utils.count_nachweis_facets(_models.Nachweis.objects.filter(user=user, abteilung=it), facets)
+        assert counts.total == 2
+        assert counts.jahre == {2024: 0, 2025: 2, 2026: 0}
+        assert counts.abteilungen == {einkauf.pk: 0, it.pk: 2}
+
+    def test_cached(self, user, django_assert_num_queries):
+        """Assert that the facets are only queried once."""
+        facets = utils.get_cached_nachweis_facets(user)
+        with django_assert_num_queries(0):
+            assert utils.get_cached_nachweis_facets(user) == facets
+
+    def test_invalidated_by_nachweis_change(self, user, nachweise):
+        """Assert that changing a Nachweis invalidates the cached facets."""
+        assert "Carol" not in utils.get_cached_nachweis_facets(user).eingereicht_bei
+        nachweise[0].eingereicht_bei = "Carol"
+        nachweise[0].save()
+        assert "Carol" in utils.get_cached_nachweis_facets(user).eingereicht_bei
+
+    def test_invalidated_by_abteilung_delete(self, user, abteilungen):
+        """
+        Assert that deleting an Abteilung, which unsets it on its Nachweise,
+        invalidates the cached facets.
+        """
+        it, _einkauf = abteilungen
+        assert (it.pk, "IT") in utils.get_cached_nachweis_facets(user).abteilungen
+        it.hard_delete()
+        assert (it.pk, "IT") not in utils.get_cached_nachweis_facets(user).abteilungen
+
+
 class TestInitialDataForDate:
     @pytest.fixture(
         params=[
@@ -329,3 +673,85 @@ class TestInitialDataForDate:
         """
         initial = utils.initial_data_for_date(user=user, d=date(2024, 1, 1))
         assert initial[datum] == expected
+
+    @pytest.mark.parametrize("interval", [_models.UserProfile.IntervalType.WEEKLY])
+    def test_initial_data_for_date_first_period(self, user, start_date):
+        """
+        Assert that the first period counts as the first week, even if it
+        begins before the start date.
+        """
+        initial = utils.initial_data_for_date(user=user, d=start_date)
+        assert initial["nummer"] == initial["ausbildungswoche"] == 1
+
+
+class TestCreateMissingNachweise:
+    @pytest.fixture(autouse=True)
+    def mock_today(self):
+        with mock.patch("web.utils.models.date", wraps=date) as m:
+            m.today.return_value = date(2025, 12, 18)
+            yield m
+
+    @pytest.fixture(
+        params=[
+            _models.UserProfile.IntervalType.DAILY,
+            _models.UserProfile.IntervalType.WEEKLY,
+            _models.UserProfile.IntervalType.MONTHLY,
+        ]
+    )
+    def interval(self, request):
+        return request.param
+
+    @pytest.fixture
+    def user(self, create_user, interval):
+        user = create_user()
+        # A Wednesday, so that the first week/month is not a regular period:
+        user.profile.start_date = date(2025, 8, 6)
+        user.profile.interval = interval
+        user.profile.save()
+        return user
+
+    def test_creates_all(self, user):
+        """Assert that create_missing_nachweise fills all the gaps."""
+        missing = utils.get_missing_nachweise(user)
+        created = utils.create_missing_nachweise(user)
+        assert len(created) == len(missing)
+        assert utils.get_missing_nachweise(user) == []
+
+    def test_initial_data(self, user):
+        """Assert that the created Nachweise have the expected data."""
+        utils.create_missing_nachweise(user)
+        for obj in _models.Nachweis.objects.filter(user=user).exclude(datum_start=user.profile.start_date):
+            expected = utils.initial_data_for_date(user, obj.datum_start)
+            assert {k: getattr(obj, k) for k in expected} == expected
+        first = _models.Nachweis.objects.get(user=user, datum_start=user.profile.start_date)
+        assert first.nummer == 1
+        assert first.ausbildungswoche == 1
+        assert not first.fertig
+        assert first.betrieb == first.schule == ""
+
+    def test_selected(self, user):
+        """Assert that only the selected missing periods are created."""
+        missing = utils.get_missing_nachweise(user)
+        selected = [missing[0][0], missing[-1][0]]
+        # A date that is not the start of a missing period is ignored:
+        created = utils.create_missing_nachweise(user, [*selected, date(2025, 8, 9)])
+        assert sorted(obj.datum_start for obj in created) == sorted(selected)
+        assert utils.get_missing_nachweise(user) == missing[1:-1]
+
+    @pytest.mark.parametrize("interval", [_models.UserProfile.IntervalType.WEEKLY])
+    def test_queries(self, user, django_assert_num_queries):
+        """
+        Assert that the Nachweise are created with a constant number of
+        queries: the missing periods, SAVEPOINT, INSERT and RELEASE.
+
+        (SQLite limits the number of query parameters, so bulk_create splits
+        much larger inserts into batches.)
+        """
+        with django_assert_num_queries(4):
+            utils.create_missing_nachweise(user)
+
+    def test_invalidates_cache(self, user):
+        """Assert that creating the Nachweise invalidates the cached missing Nachweise."""
+        assert utils.get_cached_missing_nachweise(user)
+        utils.create_missing_nachweise(user)
+        assert utils.get_cached_missing_nachweise(user) == []
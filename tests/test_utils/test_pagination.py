@@ -0,0 +1,117 @@
+import base64
+import json
+
+import pytest
+
+from tests.model_factory import NachweisFactory
+from web import models as _models
+from web.utils.pagination import NEXT, PREVIOUS, InvalidCursor, KeysetPaginator
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def nachweise(user):
+    """25 Nachweise of the user, with every Ausbildungswoche taken twice."""
+    return [NachweisFactory(user=user, abteilung=None, ausbildungswoche=n // 2) for n in range(25)]
+
+
+@pytest.fixture
+def expected(nachweise):
+    """The Nachweise in the order of the paginator."""
+    return sorted(nachweise, key=lambda obj: (obj.ausbildungswoche, obj.pk), reverse=True)
+
+
+@pytest.fixture
+def paginator(user, nachweise):
+    return KeysetPaginator(_models.Nachweis.objects.filter(user=user), 10, ["-ausbildungswoche", "-pk"])
+
+
+def test_first_page(paginator, expected):
+    """Assert that the first page contains the first `per_page` results."""
+    page = paginator.page()
+    assert list(page) == expected[:10]
+    assert page.has_next()
+    assert not page.has_previous()
+    assert page.previous_cursor is None
+
+
+def test_next_pages(paginator, expected):
+    """Assert that following the next cursors yields all the results once."""
+    page = paginator.page()
+    results = list(page)
+    while page.has_next():
+        page = paginator.page(page.next_cursor)
+        assert page.has_previous()
+        results.extend(page)
+    assert results == expected
+    assert len(page) == 5
+    assert page.next_cursor is None
+
+
+def test_previous_page(paginator, expected):
+    """Assert that the previous cursor leads back to the previous page."""
+    last = paginator.page(paginator.page(paginator.page().next_cursor).next_cursor)
+    previous = paginator.page(last.previous_cursor)
+    assert list(previous) == expected[10:20]
+    assert previous.has_next()
+    assert previous.has_previous()
+    first = paginator.page(previous.previous_cursor)
+    assert list(first) == expected[:10]
+    assert not first.has_previous()
+
+
+def test_get_filter_ties(paginator, expected):
+    """
+    Assert that the results after a row include the rows with the same
+    Ausbildungswoche and a lower primary key.
+    """
+    obj = expected[0]
+    queryset = paginator.queryset.filter(paginator.get_filter(paginator.get_values(obj), NEXT))
+    assert list(queryset) == expected[1:]
+    queryset = paginator.queryset.filter(paginator.get_filter(paginator.get_values(expected[1]), PREVIOUS))
+    assert list(queryset) == [obj]
+
+
+def test_cursor_round_trip(paginator, expected):
+    """Assert that decode_cursor returns the direction and values of the cursor."""
+    obj = expected[3]
+    cursor = paginator.encode_cursor(NEXT, obj)
+    assert paginator.decode_cursor(cursor) == (NEXT, [str(obj.ausbildungswoche), str(obj.pk)])
+
+
+def encode(data):
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "foo",
+        encode("foo"),
+        encode(["x", ["1", "2"]]),
+        encode([NEXT, ["1"]]),
+        encode([NEXT, "12"]),
+        encode([NEXT, ["foo", "bar"]]),
+    ],
+)
+def test_invalid_cursor(paginator, cursor):
+    """Assert that page raises InvalidCursor for invalid cursors."""
+    with pytest.raises(InvalidCursor):
+        paginator.page(cursor)
+
+
+def test_count(user, nachweise, django_assert_num_queries):
+    """Assert that the results are only counted when the count is requested."""
+    paginator = KeysetPaginator(_models.Nachweis.objects.filter(user=user), 10, ["-pk"])
+    with django_assert_num_queries(1):
+        paginator.page()
+    with django_assert_num_queries(1):
+        assert paginator.count == 25
+        assert paginator.count == 25
+
+
+def test_count_callable(paginator):
+    """Assert that the given count callable provides the count."""
+    paginator = KeysetPaginator(paginator.queryset, 10, paginator.ordering, count=lambda: 42)
+    assert paginator.count == 42
@@ -0,0 +1,95 @@
+import os
+from io import BytesIO
+
+import pytest
+
+from tests.model_factory import NachweisFactory
+from web.utils import pdf_cache
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def nachweis(user):
+    return NachweisFactory(user=user)
+
+
+def test_get_key_stable():
+    """Assert that the key does not change for the same input."""
+    assert pdf_cache.get_key("<p>foo</p>", {"a": 1}) == pdf_cache.get_key("<p>foo</p>", {"a": 1})
+
+
+def test_get_key_html():
+    """Assert that the key changes with the HTML."""
+    assert pdf_cache.get_key("<p>foo</p>") != pdf_cache.get_key("<p>bar</p>")
+
+
+def test_get_key_options():
+    """Assert that the key changes with the conversion options."""
+    assert pdf_cache.get_key("<p>foo</p>", {"a": 1}) != pdf_cache.get_key("<p>foo</p>", {"a": 2})
+
+
+def test_get_not_cached(nachweis):
+    """Assert that get returns None if the PDF is not cached."""
+    assert pdf_cache.get(nachweis, "foo") is None
+
+
+def test_put_and_get(nachweis):
+    """Assert that a stored PDF can be retrieved with the same key."""
+    path = pdf_cache.put(nachweis, "foo", b"%PDF")
+    assert pdf_cache.get(nachweis, "foo") == path
+    assert path.read_bytes() == b"%PDF"
+    assert pdf_cache.get(nachweis, "bar") is None
+
+
+def test_caching_reader(nachweis):
+    """Assert that the PDF is stored once the stream was read to the end."""
+    reader = pdf_cache.CachingReader(BytesIO(b"%PDF-1"), nachweis, "foo")
+    assert reader.read(3) == b"%PD"
+    assert pdf_cache.get(nachweis, "foo") is None
+    assert reader.read(3) == b"F-1"
+    assert reader.read(3) == b""
+    reader.close()
+    assert pdf_cache.get(nachweis, "foo").read_bytes() == b"%PDF-1"
+
+
+def test_caching_reader_incomplete(nachweis, pdf_cache_dir):
+    """Assert that an incompletely read stream is not stored."""
+    reader = pdf_cache.CachingReader(BytesIO(b"%PDF-1"), nachweis, "foo")
+    reader.read(3)
+    reader.close()
+    assert pdf_cache.get(nachweis, "foo") is None
+    assert not list(pdf_cache_dir.glob("*/*"))
+
+
+def test_evict_least_recently_used(user, settings):
+    """Assert that the least recently used PDFs are removed first."""
+    settings.PDF_CACHE_MAX_SIZE = 8
+    old, new = NachweisFactory(user=user), NachweisFactory(user=user)
+    old_path = pdf_cache.put(old, "foo", b"1234")
+    os.utime(old_path, (0, 0))
+    new_path = pdf_cache.put(new, "foo", b"1234")
+    assert old_path.exists() and new_path.exists()
+    pdf_cache.put(NachweisFactory(user=user), "foo", b"1234")
+    assert not old_path.exists()
+    assert new_path.exists()
+
+
+def test_invalidate_nachweis(user, nachweis):
+    """Assert that invalidate_nachweis only removes the PDFs of that Nachweis."""
+    other = NachweisFactory(user=user)
+    path = pdf_cache.put(nachweis, "foo", b"%PDF")
+    other_path = pdf_cache.put(other, "foo", b"%PDF")
+    pdf_cache.invalidate_nachweis(nachweis)
+    assert not path.exists()
+    assert other_path.exists()
+
+
+def test_invalidate_user(user, superuser, nachweis):
+    """Assert that invalidate_user only removes the PDFs of that user."""
+    other = NachweisFactory(user=superuser)
+    path = pdf_cache.put(nachweis, "foo", b"%PDF")
+    other_path = pdf_cache.put(other, "foo", b"%PDF")
+    pdf_cache.invalidate_user(user.pk)
+    assert not path.exists()
+    assert other_path.exists()
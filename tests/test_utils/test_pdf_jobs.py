@@ -0,0 +1,141 @@
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+import requests
+from django.core.management import call_command
+from django.utils import timezone
+
+from tests.model_factory import NachweisFactory
+from web.models import PdfJob
+from web.utils import pdf_cache, pdf_jobs
+
+pytestmark = pytest.mark.django_db
+
+
+def pdf_response(content=b"%PDF", status_code=200, text=""):
+    return mock.Mock(status_code=status_code, content=content, text=text)
+
+
+@pytest.fixture
+def nachweis(user):
+    return NachweisFactory(user=user)
+
+
+@pytest.fixture
+def http_request(rf, user):
+    request = rf.get("/")
+    request.user = user
+    return request
+
+
+@pytest.fixture
+def mock_html_to_pdf():
+    with mock.patch("web.utils.pdf_jobs.html_to_pdf", return_value=pdf_response()) as m:
+        yield m
+
+
+def test_enqueue(http_request, nachweis):
+    """Assert that enqueue creates a pending job with the rendered HTML."""
+    job = pdf_jobs.enqueue(http_request, nachweis)
+    assert job.status == PdfJob.Status.PENDING
+    assert job.user_id == nachweis.user_id
+    assert job.html
+    assert job.key == pdf_cache.get_key(job.html, pdf_jobs.PRINT_MARGINS)
+
+
+def test_enqueue_pending(http_request, nachweis):
+    """Assert that a pending job for the same PDF is reused."""
+    assert pdf_jobs.enqueue(http_request, nachweis) == pdf_jobs.enqueue(http_request, nachweis)
+    assert PdfJob.objects.count() == 1
+
+
+def test_enqueue_cached(http_request, nachweis):
+    """Assert that the job is done right away if the PDF is already cached."""
+    job = pdf_jobs.enqueue(http_request, nachweis)
+    pdf_cache.put(nachweis, job.key, b"%PDF")
+    assert pdf_jobs.enqueue(http_request, nachweis).status == PdfJob.Status.DONE
+
+
+def test_enqueue_stale(http_request, nachweis):
+    """Assert that a stale unfinished job for the same PDF is not reused."""
+    stale = pdf_jobs.enqueue(http_request, nachweis)
+    PdfJob.objects.filter(pk=stale.pk).update(status=PdfJob.Status.RUNNING, updated=timezone.now() - timedelta(hours=1))
+    job = pdf_jobs.enqueue(http_request, nachweis)
+    assert job != stale
+    assert job.status == PdfJob.Status.PENDING
+
+
+def test_claim_next(http_request, nachweis):
+    """Assert that a job can only be claimed once."""
+    job = pdf_jobs.enqueue(http_request, nachweis)
+    assert pdf_jobs.claim_next() == job
+    assert pdf_jobs.claim_next() is None
+    job.refresh_from_db()
+    assert job.status == PdfJob.Status.RUNNING
+
+
+def test_run_next(http_request, nachweis, mock_html_to_pdf):
+    """Assert that the PDF of a finished job is stored in the PDF cache."""
+    job = pdf_jobs.enqueue(http_request, nachweis)
+    assert pdf_jobs.run_next() == job
+    job.refresh_from_db()
+    assert job.status == PdfJob.Status.DONE
+    assert job.html == ""
+    assert pdf_cache.get(nachweis, job.key).read_bytes() == b"%PDF"
+
+
+def test_run_next_no_jobs():
+    assert pdf_jobs.run_next() is None
+
+
+def test_run_failed(http_request, nachweis, mock_html_to_pdf):
+    """Assert that failed conversions mark the job as failed."""
+    mock_html_to_pdf.return_value = pdf_response(status_code=500, text="Oops")
+    job = pdf_jobs.run(pdf_jobs.enqueue(http_request, nachweis))
+    assert job.status == PdfJob.Status.FAILED
+    assert job.error == "Oops"
+    assert pdf_cache.get(nachweis, job.key) is None
+
+
+def test_run_request_exception(http_request, nachweis, mock_html_to_pdf):
+    """Assert that the job is marked as failed if gotenberg could not be reached."""
+    mock_html_to_pdf.side_effect = requests.ConnectionError("refused")
+    job = pdf_jobs.run(pdf_jobs.enqueue(http_request, nachweis))
+    assert job.status == PdfJob.Status.FAILED
+    assert job.error == "refused"
+
+
+def test_cleanup(http_request, nachweis):
+    """Assert that cleanup only deletes old finished jobs."""
+    old = PdfJob.objects.create(nachweis=nachweis, user=nachweis.user, key="old", status=PdfJob.Status.DONE)
+    PdfJob.objects.filter(pk=old.pk).update(updated=timezone.now() - timedelta(days=2))
+    recent = PdfJob.objects.create(nachweis=nachweis, user=nachweis.user, key="recent", status=PdfJob.Status.DONE)
+    pending = PdfJob.objects.create(nachweis=nachweis, user=nachweis.user, key="pending")
+    PdfJob.objects.filter(pk=pending.pk).update(updated=timezone.now() - timedelta(days=2))
+    pdf_jobs.cleanup()
+    assert set(PdfJob.objects.all()) == {recent, pending}
+
+
+@pytest.mark.parametrize("status", [PdfJob.Status.PENDING, PdfJob.Status.RUNNING])
+def test_cleanup_stale(nachweis, status):
+    """Assert that cleanup fails the stale unfinished jobs."""
+    stale = PdfJob.objects.create(nachweis=nachweis, user=nachweis.user, key="stale", html="<p>", status=status)
+    PdfJob.objects.filter(pk=stale.pk).update(updated=timezone.now() - timedelta(hours=1))
+    recent = PdfJob.objects.create(nachweis=nachweis, user=nachweis.user, key="recent", status=status)
+    pdf_jobs.cleanup()
+    stale.refresh_from_db()
+    recent.refresh_from_db()
+    assert stale.status == PdfJob.Status.FAILED
+    assert stale.error
+    assert stale.html == ""
+    assert recent.status == status
+
+
+def test_pdf_worker_command(http_request, user, mock_html_to_pdf):
+    """Assert that the pdf_worker command runs all the pending jobs."""
+    for _ in range(3):
+        pdf_jobs.enqueue(http_request, NachweisFactory(user=user))
+    call_command("pdf_worker", "--once")
+    assert not PdfJob.objects.exclude(status=PdfJob.Status.DONE).exists()
+    assert mock_html_to_pdf.call_count == 3
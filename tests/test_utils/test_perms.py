@@ -1,7 +1,14 @@
 import pytest
+from asgiref.sync import async_to_sync
 
 from tests.test_utils.models import PermsTestModel
-from web.utils.perms import add_azubi_permissions, has_add_permission, has_change_permission, has_delete_permission
+from web.utils.perms import (
+    add_azubi_permissions,
+    ahas_view_permission,
+    has_add_permission,
+    has_change_permission,
+    has_delete_permission,
+)
 
 
 @pytest.fixture
@@ -27,6 +34,12 @@ def test_has_delete_permission(user, opts, add_permission):
     assert has_delete_permission(user, opts)
 
 
+def test_ahas_view_permission(user, opts, add_permission):
+    assert not async_to_sync(ahas_view_permission)(user, opts)
+    user = add_permission(user, "view", opts)
+    assert async_to_sync(ahas_view_permission)(user, opts)
+
+
 @pytest.fixture
 def user_with_permissions(create_user):
     """Create a user with the default permissions."""
@@ -0,0 +1,128 @@
+from unittest import mock
+
+import pytest
+from django.db.models import Q
+
+from tests.model_factory import NachweisFactory
+from web import models as _models
+from web.utils.search import FTS5SearchBackend, LookupSearchBackend
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def backend():
+    return FTS5SearchBackend(_models.Nachweis, "web_nachweis_fts")
+
+
+@pytest.fixture
+def fields():
+    return ["betrieb", "schule"]
+
+
+@pytest.fixture
+def search(backend, fields):
+    """Search the Nachweis texts with the FTS5 backend."""
+
+    def inner(term):
+        queryset = _models.Nachweis.objects.filter(backend.get_filters(fields, term))
+        return list(backend.order_by_relevance(queryset, fields, term))
+
+    return inner
+
+
+def test_lookup_backend_get_filters(fields):
+    """Assert that the lookup backend combines the lookups with OR."""
+    assert LookupSearchBackend().get_filters(fields, "foo", "contains") == (
+        Q(betrieb__contains="foo") | Q(schule__contains="foo")
+    )
+
+
+def test_is_available(backend):
+    """Assert that the index created by the migrations is available."""
+    assert backend.is_available()
+
+
+def test_is_available_no_table():
+    """Assert that the backend is not available if the index table is missing."""
+    assert not FTS5SearchBackend(_models.Nachweis, "does_not_exist").is_available()
+
+
+@pytest.mark.parametrize(
+    "term, expected",
+    [
+        ("foo", '{betrieb schule} : ("foo"*)'),
+        ('foo "bar"', '{betrieb schule} : ("foo"* "bar"*)'),
+        ("Prüfung, Daten-bank", '{betrieb schule} : ("Prüfung"* "Daten"* "bank"*)'),
+        ("- *", ""),
+    ],
+)
+def test_get_match_expression(backend, fields, term, expected):
+    """Assert that get_match_expression quotes the words of the search term."""
+    assert backend.get_match_expression(fields, term) == expected
+
+
+def test_search_prefix(search):
+    """Assert that the words of the search term match the start of words."""
+    result = NachweisFactory(betrieb="Datenbanken normalisiert", schule="Mathe")
+    NachweisFactory(betrieb="Kaffee gekocht", schule="Metadaten")
+    assert search("daten") == [result]
+
+
+def test_search_all_words(search):
+    """Assert that all words of the search term must match."""
+    result = NachweisFactory(betrieb="Datenbanken normalisiert", schule="Unterricht")
+    NachweisFactory(betrieb="Datenbanken normalisiert", schule="Mathe")
+    assert search("daten unterr") == [result]
+
+
+def test_search_diacritics(search):
+    """Assert that the search ignores case and diacritics."""
+    result = NachweisFactory(betrieb="Prüfungsvorbereitung", schule="Mathe")
+    assert search("prufung") == [result]
+    assert search("PRÜFUNG") == [result]
+
+
+def test_search_ranking(search):
+    """Assert that the results are ordered by relevance."""
+    some = NachweisFactory(betrieb="Netzwerk " + "Kaffee " * 20, schule="Mathe", ausbildungswoche=2)
+    most = NachweisFactory(betrieb="Netzwerk Netzwerk Netzwerk", schule="Netzwerk", ausbildungswoche=1)
+    assert search("netzwerk") == [most, some]
+
+
+def test_search_updated(search):
+    """Assert that the index is updated with the Nachweis."""
+    obj = NachweisFactory(betrieb="Kaffee gekocht", schule="Mathe")
+    obj.betrieb = "Netzwerk eingerichtet"
+    obj.save()
+    assert search("kaffee") == []
+    assert search("netzwerk") == [obj]
+    obj.hard_delete()
+    assert search("netzwerk") == []
+
+
+def test_search_bulk_create(search, user):
+    """Assert that bulk created objects are indexed."""
+    _models.Nachweis.objects.bulk_create(
+        [NachweisFactory.build(betrieb="Netzwerk", schule="Mathe", user=user, abteilung=None)]
+    )
+    assert len(search("netzwerk")) == 1
+
+
+def test_search_excludes_deleted(search):
+    """Assert that soft-deleted objects are not found."""
+    NachweisFactory(betrieb="Netzwerk", schule="Mathe").delete()
+    assert search("netzwerk") == []
+
+
+def test_fallback_no_words(backend, fields):
+    """Assert that the backend falls back to lookups if the term has no words."""
+    assert backend.get_filters(fields, "-") == Q(betrieb__icontains="-") | Q(schule__icontains="-")
+
+
+def test_fallback_not_available(backend, fields):
+    """Assert that the backend falls back to lookups if FTS5 is unavailable."""
+    queryset = _models.Nachweis.objects.all()
+    with mock.patch.object(backend, "is_available", new=mock.Mock(return_value=False)):
+        assert backend.get_filters(fields, "foo") == Q(betrieb__icontains="foo") | Q(schule__icontains="foo")
+        assert backend.order_by_relevance(queryset, fields, "foo") is queryset
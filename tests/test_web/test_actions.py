@@ -22,6 +22,8 @@ urlpatterns = [
     path("test/<path:pk>/model", dummy_view, name="model_action_test"),
     path("test/<path:pk>/change", dummy_view, name="change_perm_action_test"),
     path("test/nachweis/add", dummy_view, name="nachweis_add"),
+    path("test/<path:pk>/download", dummy_view, name="nachweis_download"),
+    path("test/<path:pk>/pdf", dummy_view, name="nachweis_pdf_job"),
 ]
 
 pytestmark = pytest.mark.urls(__name__)
@@ -45,6 +47,30 @@ class TestListAction:
         with mock.patch.object(action, "has_permission", new=mock.Mock(return_value=False)):
             assert action.render(request=rf.get("/"), row={}) == ""
 
+    def test_bind(self, rf):
+        """Assert that bind returns a copy of the action."""
+        action = actions.ListAction(label="Action Test")
+        bound = action.bind(rf.get("/"))
+        assert bound is not action
+        assert bound.label == "Action Test"
+        assert action._once_cache is None
+
+    def test_once_bound(self, rf):
+        """Assert that a bound action calls the function only once."""
+        func = mock.Mock(return_value="foo")
+        action = actions.ListAction().bind(rf.get("/"))
+        assert action.once("key", func) == "foo"
+        assert action.once("key", func) == "foo"
+        func.assert_called_once()
+
+    def test_once_unbound(self):
+        """Assert that an unbound action calls the function every time."""
+        func = mock.Mock(return_value="foo")
+        action = actions.ListAction()
+        action.once("key", func)
+        action.once("key", func)
+        assert func.call_count == 2
+
 
 class TestModelAction:
     def test_render(self, rf):
@@ -55,6 +81,25 @@ class TestModelAction:
             == '<a href="/test/42/model" class="foo" title="bar">Action Test</a>'
         )
 
+    def test_render_bound(self, rf):
+        """Assert that a bound action only reverses the URL once."""
+        action = actions.ModelAction(url_name="model_action_test", label="Action Test", title="bar", css="foo")
+        action = action.bind(rf.get("/"))
+        with mock.patch("web.actions.reverse", wraps=actions.reverse) as reverse_mock:
+            for pk in (1, 42):
+                assert (
+                    action.render(request=rf.get("/"), row={"obj": mock.Mock(pk=pk)})
+                    == f'<a href="/test/{pk}/model" class="foo" title="bar">Action Test</a>'
+                )
+        reverse_mock.assert_called_once()
+
+
+@pytest.mark.parametrize("pk", [1, 42, "foo bar", "a/b"])
+def test_fill_url_template(pk):
+    """Assert that the URLs of a URL template are the same as those of reverse."""
+    template = actions.get_url_template("model_action_test")
+    assert actions.fill_url_template(template, pk) == actions.reverse("model_action_test", kwargs={"pk": pk})
+
 
 @pytest.mark.usefixtures("login_user")
 class TestChangePermAction:
@@ -82,6 +127,16 @@ class TestChangePermAction:
             == f'<a href="/test/42/change" class="{action.css}" title="">Action Test</a>'
         )
 
+    @pytest.mark.parametrize("user_perms", [[("change", NachweisDummy)]])
+    @pytest.mark.usefixtures("user_perms", "set_user_perms")
+    def test_bound_checks_permission_once(self, action, get_user_req, obj):
+        """Assert that a bound action checks the permission only once."""
+        action = action.bind(get_user_req)
+        with mock.patch("web.actions.perms.has_change_permission", return_value=True) as has_perm_mock:
+            action.render(request=get_user_req, row={"obj": obj})
+            action.render(request=get_user_req, row={"obj": obj})
+        has_perm_mock.assert_called_once()
+
     def test_render_no_change_permission(self, action, get_user_req, obj):
         """
         Assert that the action button is rendered as an empty string if the
@@ -196,3 +251,34 @@ class TestAddMissingAction:
         soup = BeautifulSoup(action.render(request=get_user_req, row={"start": start, "end": end}), "html.parser")
         url = soup.find("a").attrs["href"]
         assert parse_qs(urlparse(url).query) == parse_qs(urlencode(expected))
+
+
+@pytest.mark.usefixtures("login_user")
+class TestDownloadNachweisAction:
+    @pytest.fixture
+    def obj(self):
+        return NachweisDummyFactory(pk=42)
+
+    @pytest.fixture
+    def action(self):
+        return actions.DownloadNachweisAction()
+
+    @pytest.mark.parametrize("user_perms", [[("view", NachweisDummy)]])
+    @pytest.mark.usefixtures("user_perms", "set_user_perms")
+    def test_render(self, action, get_user_req, obj):
+        """Assert that the link downloads the PDF directly by default."""
+        link = BeautifulSoup(action.render(request=get_user_req, row={"obj": obj}), "html.parser").find("a")
+        assert link.attrs["href"] == "/test/42/download"
+        assert "data-job-url" not in link.attrs
+
+    @pytest.mark.parametrize("user_perms", [[("view", NachweisDummy)]])
+    @pytest.mark.usefixtures("user_perms", "set_user_perms")
+    def test_render_pdf_worker(self, action, get_user_req, obj, settings):
+        """Assert that the link refers to the PDF job URL if a worker processes the jobs."""
+        settings.PDF_WORKER = True
+        link = BeautifulSoup(action.render(request=get_user_req, row={"obj": obj}), "html.parser").find("a")
+        assert link.attrs["href"] == "/test/42/download"
+        assert link.attrs["data-job-url"] == "/test/42/pdf"
+
+    def test_render_no_view_permission(self, action, get_user_req, obj):
+        assert action.render(request=get_user_req, row={"obj": obj}) == ""
@@ -0,0 +1,79 @@
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from tests.model_factory import NachweisFactory
+from web.context_processors import trash_count
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def request_(rf, user):
+    request = rf.get("/")
+    request.user = user
+    return request
+
+
+class TestTrashCount:
+    @pytest.mark.usefixtures("deleted_objects")
+    def test_lazy(self, request_, django_assert_num_queries):
+        """Assert that the trash count is only queried when it is evaluated."""
+        with django_assert_num_queries(0):
+            context = trash_count(request_)
+        with django_assert_num_queries(1):
+            assert context["trash_count"] > 0
+
+    def test_counts_deleted_objects(self, request_, deleted_objects):
+        """Assert that trash_count counts the number of deleted objects."""
+        assert trash_count(request_)["trash_count"] == deleted_objects[0]
+
+    @pytest.mark.usefixtures("deleted_objects")
+    def test_cached(self, request_, django_assert_num_queries):
+        """Assert that the trash count is cached across requests."""
+        assert trash_count(request_)["trash_count"]
+        with django_assert_num_queries(0):
+            assert trash_count(request_)["trash_count"]
+
+    def test_invalidated(self, request_, user):
+        """Assert that deleting, restoring and hard-deleting updates the count."""
+        obj = NachweisFactory(user=user, abteilung=None)
+        assert trash_count(request_)["trash_count"] == 0
+        obj.delete()
+        assert trash_count(request_)["trash_count"] == 1
+        obj.restore(strict=False)
+        assert trash_count(request_)["trash_count"] == 0
+        obj.delete()
+        obj.hard_delete()
+        assert trash_count(request_)["trash_count"] == 0
+
+    def test_unauthenticated_user(self, rf):
+        """Assert that the trash count is 0 if the user is not authenticated."""
+        request = rf.get("/")
+        request.user = AnonymousUser()
+        assert trash_count(request)["trash_count"] == 0
+
+    @pytest.mark.usefixtures("login_user")
+    def test_queries_independent_of_trash_size(self, client, user):
+        """
+        Assert that the number of queries for a page does not depend on the
+        number of items in the trash.
+        """
+        with CaptureQueriesContext(connection) as empty_trash:
+            client.get(reverse("password_change_done"))
+        for _ in range(5):
+            NachweisFactory(user=user).delete()
+        cache.clear()
+        with CaptureQueriesContext(connection) as full_trash:
+            client.get(reverse("password_change_done"))
+        assert len(full_trash) == len(empty_trash)
+
+    @pytest.mark.usefixtures("login_user")
+    def test_rendered_in_nav(self, client, deleted_objects):
+        """Assert that the navigation bar renders the trash count."""
+        response = client.get(reverse("password_change_done"))
+        assert response.context["trash_count"] == deleted_objects[0]
+        assert f'<span class="badge text-bg-secondary">{deleted_objects[0]}</span>' in response.content.decode()
@@ -7,6 +7,7 @@ from django.db.models import Q
 from tests.model_factory import AbteilungFactory, NachweisFactory
 from web import forms as _forms
 from web import models as _models
+from web.utils.models import NachweisFacetCounts
 
 
 class TestUserCreationForm:
@@ -257,6 +258,23 @@ class TestNachweisSearchForm:
             (datum_start.year, datum_start.year),
         ]
 
+    @pytest.mark.usefixtures("not_user_abteilung")
+    def test_add_facet_counts(self, user, datum_start, empty_choice):
+        """Assert that add_facet_counts adds the counts to the labels of the choices."""
+        NachweisFactory(user=user, datum_start=datum_start, eingereicht_bei="Alice")
+        NachweisFactory(user=user, datum_start=datum_start, eingereicht_bei="Bob")
+        form = _forms.NachweisSearchForm(user=user)
+        counts = NachweisFacetCounts(
+            total=2, status={}, jahre={datum_start.year: 2}, eingereicht_bei={"Alice": 1, "Bob": 0}, abteilungen={}
+        )
+        form.add_facet_counts(counts)
+        assert list(form.fields["jahr"].choices) == [empty_choice, (datum_start.year, f"{datum_start.year} (2)")]
+        assert list(form.fields["eingereicht_bei"].choices) == [
+            empty_choice,
+            ("Alice", "Alice (1)"),
+            ("Bob", "Bob (0)"),
+        ]
+
     @pytest.fixture
     def form_data(self, test_case, result):
         match test_case:
@@ -303,6 +321,13 @@ class TestNachweisSearchForm:
         assert not form.errors
         assert list(form.apply_filters(_models.Nachweis.objects.all())) == [result]
 
+    def test_apply_filters_text_search_ranked(self, user):
+        """Assert that the text search results are ordered by relevance."""
+        some = NachweisFactory(user=user, betrieb="Netzwerk " + "Kaffee " * 20, schule="Mathe", ausbildungswoche=2)
+        most = NachweisFactory(user=user, betrieb="Netzwerk Netzwerk", schule="Netzwerk", ausbildungswoche=1)
+        form = _forms.NachweisSearchForm(data={"q": "netz"}, user=user)
+        assert list(form.apply_filters(_models.Nachweis.objects.all())) == [most, some]
+
     @pytest.mark.parametrize("test_case, form_data", [("invalid", {"jahr": "foo"}), ("empty", {})])
     @pytest.mark.usefixtures("test_case")
     def test_apply_filters_invalid(self, user, result, not_result, form_data):
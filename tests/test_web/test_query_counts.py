@@ -0,0 +1,264 @@
+"""
+Query budgets for the views.
+
+Every URL of web.urls declares the maximum number of queries that a request
+to it may execute. The tests make each request with 1, 10 and 100 Nachweise
+in the database and check that the number of queries stays within the budget
+and does not grow with the number of Nachweise - a growing number of queries
+points to an N+1 problem.
+"""
+
+from datetime import date, timedelta
+from io import BytesIO
+from unittest import mock
+
+import pytest
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse
+from django.utils import timezone
+
+from tests.model_factory import AbteilungFactory, NachweisFactory
+from web import models as _models
+from web.utils import pdf_cache
+
+pytestmark = [pytest.mark.django_db, pytest.mark.urls("web.urls")]
+
+SIZES = (1, 10, 100)
+
+# The maximum number of queries per request for every URL name of web.urls:
+QUERY_BUDGETS = {
+    "login": 3,
+    "logout": 4,
+    "password_change": 3,
+    "password_change_done": 3,
+    "signup": 3,
+    "user_profile": 4,
+    "nachweis_add": 7,
+    "nachweis_change": 8,
+    "nachweis_delete": 10,
+    "nachweis_print": 6,
+    "nachweis_list": 8,
+    "abteilung_add": 5,
+    "abteilung_change": 7,
+    "abteilung_delete": 10,
+    "abteilung_list": 7,
+    "abteilung_ac": 6,
+    "print_preview": 2,
+    "trash": 8,
+    "restore_object": 9,
+    "hard_delete": 8,
+    "empty_trash": 9,
+    "missing": 8,
+    "finish_nachweis": 4,
+    "nachweis_download": 6,
+    "nachweis_batch_download": 8,
+    "nachweis_pdf_job": 8,
+    "pdf_job_status": 3,
+    "pdf_job_download": 5,
+    "home": 9,
+}
+
+
+def assert_query_budget(request, grow, budget, setup=None, sizes=SIZES):
+    """
+    For every n in `sizes`, call `grow(n)` to populate the database with n
+    Nachweise and then `request()` to make the request. The keyword arguments
+    returned by the optional `setup` callable are passed on to `request`.
+
+    Assert that every request executes at most `budget` queries and that the
+    number of queries does not depend on n.
+    """
+    counts = {}
+    for n in sizes:
+        grow(n)
+        kwargs = setup() if setup else {}
+        with CaptureQueriesContext(connection) as queries:
+            response = request(**kwargs)
+        assert response.status_code < 400, f"Status code {response.status_code} with {n} Nachweise"
+        counts[n] = len(queries)
+        assert counts[n] <= budget, (
+            f"{counts[n]} queries with {n} Nachweise exceed the budget of {budget}:\n"
+            + "\n".join(q["sql"] for q in queries.captured_queries)
+        )
+    assert len(set(counts.values())) == 1, f"The number of queries grows with the number of Nachweise: {counts}"
+
+
+@pytest.fixture
+def user(create_user):
+    """Create a user with all the permissions of the web app."""
+    user = create_user()
+    user.profile.start_date = date.today() - timedelta(weeks=150)
+    user.profile.interval = _models.UserProfile.IntervalType.WEEKLY
+    user.profile.save()
+    user.user_permissions.set(Permission.objects.filter(content_type__app_label="web"))
+    return user
+
+
+@pytest.fixture(autouse=True)
+def login(client, user):
+    client.force_login(user)
+
+
+@pytest.fixture
+def nachweis(user):
+    return NachweisFactory(user=user, abteilung=AbteilungFactory(user=user))
+
+
+@pytest.fixture
+def grow(user):
+    """
+    Return a function that gives the user n active Nachweise - each with its
+    own Abteilung - plus one Nachweis in the trash for every active one.
+    """
+    today = date.today()
+    # Leave the current week free for the Nachweise of the other fixtures:
+    start = today - timedelta(days=today.weekday(), weeks=2)
+
+    existing = 0
+
+    def inner(n):
+        nonlocal existing
+        abteilungen = _models.Abteilung.objects.bulk_create(
+            AbteilungFactory.build(user=user, name=f"Abteilung {i}") for i in range(existing, n)
+        )
+        nachweise = []
+        for i, abteilung in zip(range(existing, n), abteilungen):
+            monday = start - timedelta(weeks=i)
+            nachweise.append(
+                NachweisFactory.build(
+                    user=user,
+                    abteilung=abteilung,
+                    nummer=i + 1,
+                    datum_start=monday,
+                    datum_ende=monday + timedelta(days=4),
+                    eingereicht_bei=f"Ausbilder {i % 3}",
+                )
+            )
+            nachweise.append(
+                NachweisFactory.build(
+                    user=user, abteilung=abteilung, nummer=1000 + i, datum_start=monday, deleted_at=timezone.now()
+                )
+            )
+        _models.Nachweis.objects.bulk_create(nachweise)
+        existing = max(existing, n)
+        # Measure requests with a cold cache:
+        cache.clear()
+
+    return inner
+
+
+@pytest.fixture(autouse=True)
+def mock_renderer():
+    """Replace the PDF renderer with a mock that returns a minimal PDF."""
+
+    def pdf_response(*_args, **_kwargs):
+        return mock.Mock(status_code=200, content=b"%PDF", raw=BytesIO(b"%PDF"))
+
+    with mock.patch("web.utils.gotenberg.get_renderer") as get_renderer_mock:
+        get_renderer_mock.return_value.html_to_pdf.side_effect = pdf_response
+        get_renderer_mock.return_value.merge_pdfs.side_effect = pdf_response
+        yield
+
+
+@pytest.fixture
+def view_requests(client, user, nachweis, settings):
+    """
+    Return a (request, setup) 2-tuple for every URL name of web.urls.
+
+    The setup callables prepare the objects that the request consumes and
+    return them as keyword arguments for the request.
+    """
+
+    def new_nachweis():
+        return {"pk": NachweisFactory(user=user, abteilung=None).pk}
+
+    def new_deleted_nachweis():
+        obj = NachweisFactory(user=user, abteilung=None)
+        obj.delete()
+        return {"pk": obj.pk}
+
+    def new_abteilung():
+        return {"pk": AbteilungFactory(user=user).pk}
+
+    def new_job(status=_models.PdfJob.Status.PENDING):
+        job = _models.PdfJob.objects.create(nachweis=nachweis, user=user, key="key", status=status)
+        return {"pk": job.pk}
+
+    def new_done_job():
+        pdf_cache.put(nachweis, "key", b"%PDF")
+        return new_job(status=_models.PdfJob.Status.DONE)
+
+    def no_jobs():
+        # Start without a pending job that the request could reuse:
+        _models.PdfJob.objects.all().delete()
+        return {}
+
+    def no_batch_limit():
+        # Download all the Nachweise, no matter how many there are:
+        settings.PDF_BATCH_MAX_NACHWEISE = sum(SIZES) + 1
+        return {}
+
+    def login():
+        client.force_login(user)
+        return {}
+
+    def url(name, **kwargs):
+        return reverse(name, kwargs=kwargs)
+
+    return {
+        "login": (lambda: client.get(url("login")), None),
+        "logout": (lambda: client.post(url("logout")), login),
+        "password_change": (lambda: client.get(url("password_change")), None),
+        "password_change_done": (lambda: client.get(url("password_change_done")), None),
+        "signup": (lambda: client.get(url("signup")), None),
+        "user_profile": (lambda: client.get(url("user_profile")), None),
+        "nachweis_add": (lambda: client.get(url("nachweis_add")), None),
+        "nachweis_change": (lambda: client.get(url("nachweis_change", pk=nachweis.pk)), None),
+        "nachweis_delete": (lambda pk: client.post(url("nachweis_delete", pk=pk)), new_nachweis),
+        "nachweis_print": (lambda: client.get(url("nachweis_print", pk=nachweis.pk)), None),
+        "nachweis_list": (lambda: client.get(url("nachweis_list")), None),
+        "abteilung_add": (lambda: client.get(url("abteilung_add")), None),
+        "abteilung_change": (lambda: client.get(url("abteilung_change", pk=nachweis.abteilung_id)), None),
+        "abteilung_delete": (lambda pk: client.post(url("abteilung_delete", pk=pk)), new_abteilung),
+        "abteilung_list": (lambda: client.get(url("abteilung_list")), None),
+        "abteilung_ac": (
+            lambda: client.get(
+                url("abteilung_ac"), {"model": "web.abteilung", "q": "Abteilung", "sl": "name__icontains"}
+            ),
+            None,
+        ),
+        "print_preview": (lambda: client.get(url("print_preview"), {"nummer": "1", "betrieb": "Test"}), None),
+        "trash": (lambda: client.get(url("trash")), None),
+        "restore_object": (
+            lambda pk: client.post(url("restore_object", model_name="nachweis", pk=pk)),
+            new_deleted_nachweis,
+        ),
+        "hard_delete": (
+            lambda pk: client.post(url("hard_delete", model_name="nachweis", pk=pk)),
+            new_deleted_nachweis,
+        ),
+        "empty_trash": (lambda: client.post(url("empty_trash")), None),
+        "missing": (lambda: client.get(url("missing")), None),
+        "finish_nachweis": (lambda: client.post(url("finish_nachweis"), {"pk": nachweis.pk}), None),
+        "nachweis_download": (lambda: client.get(url("nachweis_download", pk=nachweis.pk)), None),
+        "nachweis_batch_download": (lambda: client.get(url("nachweis_batch_download")), no_batch_limit),
+        "nachweis_pdf_job": (lambda: client.post(url("nachweis_pdf_job", pk=nachweis.pk)), no_jobs),
+        "pdf_job_status": (lambda pk: client.get(url("pdf_job_status", pk=pk)), new_job),
+        "pdf_job_download": (lambda pk: client.get(url("pdf_job_download", pk=pk)), new_done_job),
+        "home": (lambda: client.get(url("home")), None),
+    }
+
+
+def test_every_url_has_a_budget():
+    """Assert that a query budget is declared for every URL name of web.urls."""
+    names = {name for name in get_resolver("web.urls").reverse_dict if isinstance(name, str)}
+    assert names == set(QUERY_BUDGETS)
+
+
+@pytest.mark.parametrize("name", QUERY_BUDGETS)
+def test_query_budget(view_requests, grow, name):
+    request, setup = view_requests[name]
+    assert_query_budget(request, grow, QUERY_BUDGETS[name], setup=setup)
@@ -1,7 +1,16 @@
+from unittest import mock
+
 import pytest
 from django.contrib.auth.models import Group
 
+from tests.model_factory import AbteilungFactory, NachweisFactory
 from web.signals import create_azubi_group
+from web.utils.models import (
+    MISSING_NACHWEISE_CACHE,
+    NACHWEIS_COUNT_CACHE,
+    NACHWEIS_FACETS_CACHE,
+    TRASH_COUNT_CACHE,
+)
 
 
 @pytest.fixture
@@ -44,3 +53,135 @@ def test_create_azubi_group(modified_settings, codename, expected):
     create_azubi_group()
     group = Group.objects.get(name=modified_settings.AZUBI_GROUP_NAME)
     assert group.permissions.filter(codename=codename).exists() == expected
+
+
+@pytest.fixture
+def mock_invalidate():
+    with mock.patch("web.signals.invalidate_user_cache") as m:
+        yield m
+
+
+@pytest.mark.django_db
+def test_invalidate_missing_nachweise_on_save(user, mock_invalidate):
+    """Assert that saving a Nachweis invalidates the user's missing Nachweise."""
+    NachweisFactory(user=user, abteilung=None)
+    mock_invalidate.assert_any_call(MISSING_NACHWEISE_CACHE, user.pk)
+
+
+@pytest.mark.django_db
+def test_invalidate_missing_nachweise_on_hard_delete(user, mock_invalidate):
+    """Assert that hard-deleting a Nachweis invalidates the user's missing Nachweise."""
+    obj = NachweisFactory(user=user, abteilung=None)
+    mock_invalidate.reset_mock()
+    obj.hard_delete()
+    mock_invalidate.assert_any_call(MISSING_NACHWEISE_CACHE, user.pk)
+
+
+@pytest.mark.django_db
+def test_invalidate_missing_nachweise_on_profile_save(user, mock_invalidate):
+    """Assert that saving the user profile invalidates the user's missing Nachweise."""
+    user.profile.save()
+    mock_invalidate.assert_any_call(MISSING_NACHWEISE_CACHE, user.pk)
+
+
+@pytest.mark.django_db
+def test_invalidate_trash_count_on_soft_delete(user, mock_invalidate):
+    """Assert that soft-deleting an item invalidates the user's trash count."""
+    obj = NachweisFactory(user=user, abteilung=None)
+    mock_invalidate.reset_mock()
+    obj.delete()
+    mock_invalidate.assert_any_call(TRASH_COUNT_CACHE, user.pk)
+
+
+@pytest.mark.django_db
+def test_invalidate_trash_count_on_hard_delete(user, mock_invalidate):
+    """Assert that hard-deleting an item invalidates the user's trash count."""
+    obj = NachweisFactory(user=user, abteilung=None)
+    mock_invalidate.reset_mock()
+    obj.hard_delete()
+    mock_invalidate.assert_any_call(TRASH_COUNT_CACHE, user.pk)
+
+
+@pytest.mark.django_db
+def test_trash_count_not_invalidated_on_regular_save(user, mock_invalidate):
+    """Assert that saving an item that is not in the trash keeps the trash count."""
+    NachweisFactory(user=user, abteilung=None)
+    assert mock.call(TRASH_COUNT_CACHE, user.pk) not in mock_invalidate.call_args_list
+
+
+@pytest.mark.django_db
+def test_invalidate_nachweis_count_on_save(user, mock_invalidate):
+    """Assert that saving a Nachweis invalidates the counts of the user's Nachweis list."""
+    NachweisFactory(user=user, abteilung=None)
+    mock_invalidate.assert_any_call(NACHWEIS_COUNT_CACHE, user.pk)
+
+
+@pytest.mark.django_db
+def test_invalidate_nachweis_count_on_hard_delete(user, mock_invalidate):
+    """Assert that hard-deleting a Nachweis invalidates the counts of the user's Nachweis list."""
+    obj = NachweisFactory(user=user, abteilung=None)
+    mock_invalidate.reset_mock()
+    obj.hard_delete()
+    mock_invalidate.assert_any_call(NACHWEIS_COUNT_CACHE, user.pk)
+
+
+@pytest.mark.django_db
+def test_invalidate_nachweis_count_on_abteilung_hard_delete(user, mock_invalidate):
+    """Assert that hard-deleting an Abteilung invalidates the counts of the user's Nachweis list."""
+    obj = AbteilungFactory(user=user)
+    mock_invalidate.reset_mock()
+    obj.hard_delete()
+    mock_invalidate.assert_any_call(NACHWEIS_COUNT_CACHE, user.pk)
+
+
+@pytest.mark.django_db
+def test_invalidate_nachweis_facets_on_save(user, mock_invalidate):
+    """Assert that saving a Nachweis invalidates the filter choices of the user's Nachweis list."""
+    NachweisFactory(user=user, abteilung=None)
+    mock_invalidate.assert_any_call(NACHWEIS_FACETS_CACHE, user.pk)
+
+
+@pytest.mark.django_db
+def test_invalidate_nachweis_facets_on_abteilung_save(user, mock_invalidate):
+    """Assert that saving an Abteilung invalidates the filter choices of the user's Nachweis list."""
+    AbteilungFactory(user=user)
+    mock_invalidate.assert_any_call(NACHWEIS_FACETS_CACHE, user.pk)
+
+
+@pytest.mark.django_db
+def test_invalidate_nachweis_facets_on_abteilung_hard_delete(user, mock_invalidate):
+    """Assert that hard-deleting an Abteilung invalidates the filter choices of the user's Nachweis list."""
+    obj = AbteilungFactory(user=user)
+    mock_invalidate.reset_mock()
+    obj.hard_delete()
+    mock_invalidate.assert_any_call(NACHWEIS_FACETS_CACHE, user.pk)
+
+
+@pytest.fixture
+def mock_pdf_cache():
+    with mock.patch("web.signals.pdf_cache") as m:
+        yield m
+
+
+@pytest.mark.django_db
+def test_invalidate_nachweis_pdf_on_save(user, mock_pdf_cache):
+    """Assert that saving a Nachweis removes its cached PDFs."""
+    obj = NachweisFactory(user=user, abteilung=None)
+    mock_pdf_cache.reset_mock()
+    obj.save()
+    mock_pdf_cache.invalidate_nachweis.assert_called_with(obj)
+
+
+@pytest.mark.django_db
+def test_invalidate_user_pdf_on_name_change(user, mock_pdf_cache):
+    """Assert that changing the user's name removes the user's cached PDFs."""
+    user.first_name = "Alice"
+    user.save()
+    mock_pdf_cache.invalidate_user.assert_called_with(user.pk)
+
+
+@pytest.mark.django_db
+def test_user_pdf_not_invalidated_on_login(user, mock_pdf_cache):
+    """Assert that updating only the last login keeps the user's cached PDFs."""
+    user.save(update_fields=["last_login"])
+    mock_pdf_cache.invalidate_user.assert_not_called()
@@ -83,11 +83,11 @@ class TestChangelistTemplate:
         return mock.Mock(pk=42)
 
     @pytest.fixture
-    def col_classes(self):
-        return {"bar": "text-danger"}
+    def column_css(self):
+        return ["td-foo", "td-bar text-danger", "td-baz"]
 
     @pytest.fixture
-    def context(self, rf, list_display, headers, result_row, result_obj, col_classes):
+    def context(self, rf, list_display, headers, result_row, result_obj, column_css):
         row = OrderedDict(zip(list_display, result_row))
         row["obj"] = result_obj
         return {
@@ -95,21 +95,14 @@ class TestChangelistTemplate:
             "list_display": list_display,
             "headers": headers,
             "result_rows": [row],
-            "col_classes": col_classes,
+            "result_table": [(row, list(zip(column_css, result_row)))],
         }
 
-    def test_adds_additional_col_classes(self, render_template, context, soup):
-        """Assert that additional CSS classes for <td> elements are inserted."""
-        td = soup(render_template(context)).find("tbody").find("tr").find_all("td")[1]
-        assert "text-danger" in td["class"]
-
-    def test_adds_col_names(self, render_template, context, soup):
-        """
-        Assert that the <td> elements for the result items include their
-        respective 'name' from the list_display list.
-        """
-        td = soup(render_template(context)).find("tbody").find("tr").find("td")
-        assert "td-foo" in td["class"]
+    def test_renders_cells(self, render_template, context, soup):
+        """Assert that the <td> elements include their values and CSS classes."""
+        tds = soup(render_template(context)).find("tbody").find("tr").find_all("td")
+        assert [td.text for td in tds] == ["Spam", "Eels", "Hovercraft"]
+        assert [td["class"] for td in tds] == [["td-foo"], ["td-bar", "text-danger"], ["td-baz"]]
 
     def test_renders_action_buttons(self, render_template, context, soup):
         """Assert that the expected action buttons are rendered."""
@@ -1,21 +1,29 @@
 from collections import OrderedDict
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
+from io import BytesIO
 from unittest import mock
 from urllib.parse import urlparse
 
 import pytest
+from asgiref.sync import async_to_sync
 from django.contrib.auth import SESSION_KEY
-from django.contrib.auth.models import AnonymousUser
 from django.core.exceptions import PermissionDenied
-from django.http import FileResponse, HttpResponse
+from django.db import connection
+from django.http import FileResponse, Http404, HttpResponse
+from django.template.defaultfilters import linebreaksbr, truncatewords
+from django.test.utils import CaptureQueriesContext
 from django.urls import path, reverse
 
 from tests.model_factory import AbteilungFactory, NachweisFactory
 from tests.test_web.model_factory import NachweisDummyFactory
 from tests.test_web.models import NachweisDummy
 from web import actions as _actions
+from web import forms as _forms
 from web import models as _models
 from web import views as _views
+from web.utils import pdf_cache
+from web.utils.models import annotate_excerpts, get_missing_nachweise
+from web.utils.pagination import KeysetPaginator
 
 
 def dummy_view(*_args, **_kwargs):
@@ -48,6 +56,13 @@ urlpatterns = [
     path("missing/", _views.MissingView.as_view(), name="missing"),
     path("nachweis/finish/", _views.finish_nachweis_view, name="finish_nachweis"),
     path("nachweis/<int:pk>/download/", _views.nachweis_download_view, name="nachweis_download"),
+    path("nachweis/download/", _views.nachweis_batch_download_view, name="nachweis_batch_download"),
+    path("nachweis/<int:pk>/pdf/", _views.nachweis_pdf_job_view, name="nachweis_pdf_job"),
+    path("async/nachweis/<int:pk>/download/", _views.anachweis_download_view, name="anachweis_download"),
+    path("async/nachweis/download/", _views.anachweis_batch_download_view, name="anachweis_batch_download"),
+    path("async/print_preview", _views.aprint_preview, name="aprint_preview"),
+    path("pdf/<int:pk>/", _views.pdf_job_status_view, name="pdf_job_status"),
+    path("pdf/<int:pk>/download/", _views.pdf_job_download_view, name="pdf_job_download"),
     path("print_preview", _views.print_preview, name="print_preview"),
     path("", _views.DashboardView.as_view(), name="home"),
     # Templates require these for rendering:
@@ -98,39 +113,15 @@ class TestAbteilungAutocompleteView:
 
 
 class TestBaseViewMixin:
-    @pytest.fixture
-    def mock_collect(self, deleted_objects):
-        """Mock the collect_deleted_objects function."""
-        with mock.patch("web.views.collect_deleted_objects") as m:
-            querysets = deleted_objects[1]
-            m.return_value = [(qs.model, qs) for qs in querysets]
-
     def test_get_context_data(self, mock_super_method):
         """Assert that the expected items are added to the context data."""
         view = _views.BaseViewMixin()
         view.title = "foo"
         view.submit_button_text = "bar"
         with mock_super_method(_views.BaseViewMixin.get_context_data, {}):
-            with mock.patch.object(view, "get_trash_count", new=mock.Mock(return_value=42)):
-                context = view.get_context_data()
-                assert context["title"] == "foo"
-                assert context["submit_button_text"] == "bar"
-                assert context["trash_count"] == 42
-
-    @pytest.mark.usefixtures("mock_collect", "login_user")
-    def test_get_trash_count(self, rf, deleted_objects, user):
-        """Assert that get_trash_count counts the number of deleted objects."""
-        view = _views.BaseViewMixin()
-        view.request = rf.get("/")
-        view.request.user = user
-        assert view.get_trash_count() == deleted_objects[0]
-
-    def test_get_trash_count_unauthenticated_user(self, rf):
-        """Assert that get_trash_count returns 0 if the user is not authenticated."""
-        view = _views.BaseViewMixin()
-        view.request = rf.get("/")
-        view.request.user = AnonymousUser()
-        assert view.get_trash_count() == 0
+            context = view.get_context_data()
+            assert context["title"] == "foo"
+            assert context["submit_button_text"] == "bar"
 
 
 class TestModelViewMixin:
@@ -287,6 +278,71 @@ class TestChangelistView:
             )
         ]
 
+    def test_get_column_css(self, view):
+        """
+        Assert that get_column_css returns the CSS classes for the cells of
+        every column.
+        """
+        with mock.patch.object(view, "get_column_classes", new=mock.Mock(return_value={"abteilung": "foo bar"})):
+            assert view.get_column_css() == [
+                "td-nummer",
+                "td-zeitraum_item",
+                "td-abteilung foo bar",
+                "td-fertig",
+                "td-unterschrieben",
+            ]
+
+    @pytest.mark.django_db
+    def test_get_result_table(self, view, factory):
+        """Assert that get_result_table pairs the values with the CSS classes."""
+        obj = factory(fertig=True, unterschrieben=False)
+        rows = view.get_result_rows(object_list=[obj])
+        assert view.get_result_table(rows) == [
+            (
+                rows[0],
+                [
+                    ("td-nummer", obj.nummer),
+                    ("td-zeitraum_item", "24.11.2025 - 28.11.2025"),
+                    ("td-abteilung", str(obj.abteilung)),
+                    ("td-fertig", _views.BOOLEAN_TRUE_ICON),
+                    ("td-unterschrieben", _views.BOOLEAN_FALSE_ICON),
+                ],
+            )
+        ]
+
+    def test_column_accessors_compiled_once(self, view):
+        """Assert that the column accessors are only compiled once per view."""
+        with mock.patch.object(view, "get_column_accessor") as get_column_accessor_mock:
+            view.get_result_row(mock.Mock())
+            view.get_result_row(mock.Mock())
+        assert get_column_accessor_mock.call_count == len(view.list_display)
+
+    def test_get_list_select_related(self, view):
+        """
+        Assert that get_list_select_related returns the foreign keys in
+        list_display plus the relations in list_select_related.
+        """
+        assert view.get_list_select_related() == ["abteilung"]
+        view.list_select_related = ["abteilung", "foo"]
+        assert view.get_list_select_related() == ["abteilung", "foo"]
+
+    @pytest.mark.django_db
+    def test_get_queryset_select_related(self, get_user_req, view, mock_super_method):
+        """Assert that get_queryset fetches the foreign keys in list_display."""
+        view.setup(get_user_req)
+        with mock_super_method(_views.ChangelistView.get_queryset, NachweisDummy.objects.all()):
+            queryset = view.get_queryset()
+        assert queryset.query.select_related == {"abteilung": {}}
+
+    @pytest.mark.django_db
+    def test_get_queryset_list_defer(self, get_user_req, view, mock_super_method):
+        """Assert that get_queryset defers the fields in list_defer."""
+        view.list_defer = ["fertig"]
+        view.setup(get_user_req)
+        with mock_super_method(_views.ChangelistView.get_queryset, NachweisDummy.objects.all()):
+            queryset = view.get_queryset()
+        assert queryset.query.deferred_loading == ({"fertig"}, True)
+
     @pytest.mark.parametrize("user_perms", [[("change", NachweisDummy)]])
     @pytest.mark.usefixtures("login_user", "user_perms", "set_user_perms")
     def test_get_actions(self, get_user_req, view, print_action):
@@ -812,6 +868,180 @@ class TestNachweisListView:
         assert obj in object_list
         assert other_obj in object_list
 
+    @pytest.mark.django_db
+    def test_get_queryset_defers_texts(self, rf, url, user):
+        """
+        Assert that get_queryset defers the texts and only fetches their
+        beginning instead.
+        """
+        view = _views.NachweisListView()
+        view.setup(rf.get(url))
+        view.request.user = user
+        queryset = view.get_queryset()
+        assert queryset.query.deferred_loading == ({"betrieb", "schule"}, True)
+        assert {"betrieb_excerpt", "schule_excerpt"} <= set(queryset.query.annotations)
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "Foo",
+            " ".join(f"Wort{i}" for i in range(40)),
+            "Foo\nBar <b>Baz</b>",
+        ],
+    )
+    def test_betrieb_truncated_like_full_text(self, rf, url, user, text):
+        """
+        Assert that the 'betrieb' list callable truncates the excerpt like
+        truncatewords would truncate the full text.
+        """
+        obj = NachweisFactory(user=user, betrieb=text)
+        view = _views.NachweisListView()
+        view.setup(rf.get(url))
+        view.request.user = user
+        assert view.betrieb(view.get_queryset().get(pk=obj.pk)) == truncatewords(linebreaksbr(text), 30)
+
+    @pytest.mark.django_db
+    def test_betrieb_excerpt_cut_off(self, rf, url, user):
+        """
+        Assert that the 'betrieb' list callable marks the text as truncated,
+        with the suffix of truncatewords, if the excerpt was cut off before 30
+        words.
+        """
+        obj = NachweisFactory(user=user, betrieb="Donaudampfschifffahrtsgesellschaft " * 50)
+        view = _views.NachweisListView()
+        view.setup(rf.get(url))
+        view.request.user = user
+        value = view.betrieb(view.get_queryset().get(pk=obj.pk))
+        assert truncatewords(obj.betrieb, 30).endswith("Donaudampfschifffahrtsgesellschaft …")
+        assert value.endswith("Donaudampfschifffahrtsgesellschaft …")
+        assert len(value.split()) < 30
+
+    @pytest.mark.django_db
+    @pytest.mark.usefixtures("login_user", "user_perms", "set_user_perms")
+    @pytest.mark.parametrize("user_perms", [[("view", _models.Nachweis)]])
+    def test_keyset_pagination(self, client, url, user):
+        """Assert that the list can be paged through with the cursors."""
+        NachweisFactory.create_batch(13, user=user, abteilung=None)
+        expected = list(_models.Nachweis.objects.filter(user=user).order_by("-ausbildungswoche", "-pk"))
+        response = client.get(url)
+        assert response.context["keyset_pagination"]
+        assert isinstance(response.context["paginator"], KeysetPaginator)
+        assert list(response.context["object_list"]) == expected[:10]
+        assert response.context["paginator"].count == len(expected)
+
+        page_obj = response.context["page_obj"]
+        response = client.get(url, data={"cursor": page_obj.next_cursor})
+        assert list(response.context["object_list"]) == expected[10:]
+        assert not response.context["page_obj"].has_next()
+
+        page_obj = response.context["page_obj"]
+        response = client.get(url, data={"cursor": page_obj.previous_cursor})
+        assert list(response.context["object_list"]) == expected[:10]
+
+    @pytest.mark.django_db
+    @pytest.mark.usefixtures("login_user", "user_perms", "set_user_perms")
+    @pytest.mark.parametrize("user_perms", [[("view", _models.Nachweis)]])
+    def test_keyset_pagination_count_cached(self, client, url, user):
+        """Assert that the total count is not queried again on the next page."""
+        NachweisFactory.create_batch(13, user=user, abteilung=None)
+        response = client.get(url)
+        next_cursor = response.context["page_obj"].next_cursor
+        with CaptureQueriesContext(connection) as queries:
+            client.get(url, data={"cursor": next_cursor})
+        assert not any("COUNT(" in query["sql"] and "web_nachweis" in query["sql"] for query in queries)
+
+    @pytest.mark.django_db
+    @pytest.mark.usefixtures("login_user", "user_perms", "set_user_perms")
+    @pytest.mark.parametrize("user_perms", [[("view", _models.Nachweis)]])
+    def test_page_number_pagination_count_cached(self, client, url, user, search_term):
+        """
+        Assert that the counts are not queried again on the next page of
+        results that are paginated with page numbers.
+        """
+        NachweisFactory.create_batch(13, user=user, betrieb=search_term, abteilung=None)
+        client.get(url, data={"q": search_term})
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, data={"q": search_term, "page": 2})
+        assert response.context["page_obj"].number == 2
+        assert response.context["paginator"].count == 13
+        assert not any("COUNT(" in query["sql"] and "web_nachweis" in query["sql"] for query in queries)
+
+    @pytest.mark.django_db
+    @pytest.mark.usefixtures("login_user", "user_perms", "set_user_perms")
+    @pytest.mark.parametrize("user_perms", [[("view", _models.Nachweis)]])
+    def test_search_relevance_uses_page_numbers(self, client, url, obj, search_term):
+        """
+        Assert that results ordered by relevance are paginated with page
+        numbers instead of cursors.
+        """
+        response = client.get(url, data={"q": search_term})
+        assert not isinstance(response.context["paginator"], KeysetPaginator)
+        assert "keyset_pagination" not in response.context
+        assert "page_range" in response.context
+
+    @pytest.mark.django_db
+    @pytest.mark.usefixtures("login_user", "user_perms", "set_user_perms")
+    @pytest.mark.parametrize("user_perms", [[("view", _models.Nachweis)]])
+    def test_invalid_cursor(self, client, url):
+        """Assert that an invalid cursor results in a 404."""
+        assert client.get(url, data={"cursor": "foo"}).status_code == 404
+
+    @pytest.mark.django_db
+    @pytest.mark.usefixtures("login_user", "user_perms", "set_user_perms")
+    @pytest.mark.parametrize("user_perms", [[("view", _models.Nachweis)]])
+    def test_search_form_created_once(self, client, url, search_term):
+        """Assert that the search form is only created once per request."""
+        form_class = mock.Mock(wraps=_forms.NachweisSearchForm)
+        with mock.patch.object(_views.NachweisListView, "search_form_class", form_class):
+            response = client.get(url, data={"q": search_term})
+        assert response.status_code == 200
+        form_class.assert_called_once()
+
+    @pytest.mark.django_db
+    @pytest.mark.usefixtures("login_user", "user_perms", "set_user_perms")
+    @pytest.mark.parametrize("user_perms", [[("view", _models.Nachweis)]])
+    def test_eingereicht_choices(self, client, url, user):
+        """Assert that the context contains the choices of the 'eingereicht_bei' filter."""
+        NachweisFactory(user=user, eingereicht_bei="Bob")
+        NachweisFactory(user=user, eingereicht_bei="Alice")
+        response = client.get(url)
+        assert list(response.context["eingereicht_choices"]) == [("", "---------"), ("Alice", "Alice"), ("Bob", "Bob")]
+
+    @pytest.mark.django_db
+    @pytest.mark.usefixtures("login_user", "user_perms", "set_user_perms")
+    @pytest.mark.parametrize("user_perms", [[("view", _models.Nachweis)]])
+    def test_facet_counts(self, client, url, user, obj, other_obj, abteilung):
+        """Assert that the context contains the facet counts of the current results."""
+        other_obj.fertig = True
+        other_obj.save()
+        response = client.get(url, data={"unsigned": "1"})
+        facet_counts = response.context["facet_counts"]
+        assert facet_counts.total == 2
+        assert facet_counts.status == {"unfinished": 1, "unsubmitted": 2, "unsigned": 2}
+        assert (abteilung.pk, abteilung.name, 1) in response.context["abteilung_facets"]
+        assert "nicht fertig (1)" in response.content.decode()
+
+    @pytest.mark.django_db
+    @pytest.mark.usefixtures("login_user", "user_perms", "set_user_perms")
+    @pytest.mark.parametrize("user_perms", [[("view", _models.Nachweis)]])
+    def test_facet_counts_filtered(self, client, url, obj, other_obj, abteilung):
+        """Assert that only the results of the current search are counted."""
+        response = client.get(url, data={"abteilung": abteilung.pk})
+        assert response.context["facet_counts"].total == 1
+        assert response.context["facet_counts"].abteilungen[abteilung.pk] == 1
+        assert response.context["facet_counts"].abteilungen[other_obj.abteilung_id] == 0
+
+    @pytest.mark.django_db
+    @pytest.mark.usefixtures("login_user", "user_perms", "set_user_perms")
+    @pytest.mark.parametrize("user_perms", [[("view", _models.Nachweis)]])
+    def test_eingereicht_choices_without_counts(self, client, url, user):
+        """Assert that the choices for the finish modal do not include the counts."""
+        NachweisFactory(user=user, eingereicht_bei="Bob")
+        response = client.get(url)
+        assert ("Bob", "Bob") in response.context["eingereicht_choices"]
+        assert ("Bob", "Bob (1)") in response.context["search_form"].fields["eingereicht_bei"].choices
+
     def test_zeitraum_date_localized(self):
         """
         Assert that the dates produced by the 'zeitraum' list callable are
@@ -1034,6 +1264,7 @@ class TestPapierkorbView:
             fertig=True,
             unterschrieben=False,
         )
+        obj = annotate_excerpts(_models.Nachweis.objects.filter(pk=obj.pk), "betrieb").get()
         view = _views.PapierkorbView()
         assert view.get_obj_info(obj) == [
             ("Nummer", 42),
@@ -1292,6 +1523,61 @@ class TestMissingView:
         response = client.get(reverse("missing"))
         assert response.status_code == 200
 
+    @pytest.mark.usefixtures("login_user", "interval")
+    def test_paginated(self, client, user):
+        """Assert that the view lists the missing Nachweise of the requested page."""
+        user.profile.start_date = date.today() - timedelta(days=3000)
+        user.profile.save()
+        response = client.get(reverse("missing"), data={"page": 2})
+        assert response.status_code == 200
+        assert response.context["object_list"] == get_missing_nachweise(user)[50:100]
+        assert response.context["paginator"].count == len(get_missing_nachweise(user))
+
+    @pytest.mark.usefixtures("login_user", "interval")
+    def test_post_all(self, client, user, add_permission):
+        """Assert that a POST with 'all' creates all the missing Nachweise."""
+        add_permission(user, "add", _models.Nachweis._meta)
+        missing = get_missing_nachweise(user)
+        response = client.post(reverse("missing"), data={"all": "1"}, follow=True)
+        assert response.status_code == 200
+        assert _models.Nachweis.objects.filter(user=user).count() == len(missing)
+        assert get_missing_nachweise(user) == []
+        assert f"{len(missing)} Nachweis(e) erstellt." in [str(m) for m in response.context["messages"]]
+
+    @pytest.mark.usefixtures("login_user", "interval")
+    def test_post_selected(self, client, user, add_permission):
+        """Assert that a POST creates the selected missing Nachweise."""
+        add_permission(user, "add", _models.Nachweis._meta)
+        user.profile.start_date = date.today() - timedelta(days=100)
+        user.profile.save()
+        missing = get_missing_nachweise(user)
+        selected = [missing[0][0].isoformat(), missing[2][0].isoformat()]
+        response = client.post(reverse("missing"), data={"start": selected})
+        assert response.status_code == 302
+        assert sorted(_models.Nachweis.objects.filter(user=user).values_list("datum_start", flat=True)) == sorted(
+            [missing[2][0], missing[0][0]]
+        )
+
+    @pytest.mark.usefixtures("login_user", "interval")
+    def test_post_nothing_selected(self, client, user, add_permission):
+        """Assert that a POST without a selection does not create anything."""
+        add_permission(user, "add", _models.Nachweis._meta)
+        response = client.post(reverse("missing"))
+        assert response.status_code == 302
+        assert not _models.Nachweis.objects.filter(user=user).exists()
+
+    @pytest.mark.usefixtures("login_user", "interval")
+    def test_post_invalid_date(self, client, user, add_permission):
+        """Assert that a POST with an invalid date returns a 400 response."""
+        add_permission(user, "add", _models.Nachweis._meta)
+        assert client.post(reverse("missing"), data={"start": "foo"}).status_code == 400
+
+    @pytest.mark.usefixtures("login_user", "interval")
+    def test_post_requires_add_permission(self, client, user):
+        """Assert that creating the missing Nachweise requires the 'add' permission."""
+        assert client.post(reverse("missing"), data={"all": "1"}).status_code == 403
+        assert not _models.Nachweis.objects.filter(user=user).exists()
+
     @pytest.mark.usefixtures("interval")
     def test_requires_authentication(self, client):
         response = client.get(reverse("missing"))
@@ -1349,7 +1635,9 @@ class TestNachweisDownloadView:
     @pytest.mark.usefixtures("set_user_perms", "login_user")
     def test(self, client, download_url):
         """Assert that the view returns a FileResponse object."""
-        response = client.get(download_url)
+        pdf_response = mock.Mock(status_code=200, raw=BytesIO(b"%PDF"))
+        with mock.patch("web.utils.gotenberg.html_to_pdf", new=mock.Mock(return_value=pdf_response)):
+            response = client.get(download_url)
         assert response.status_code == 200
         assert isinstance(response, FileResponse)
 
@@ -1357,3 +1645,239 @@ class TestNachweisDownloadView:
     def test_download_requires_permission(self, client, download_url):
         """Assert that only users with 'view' permission can download."""
         assert client.get(download_url).status_code == 403
+
+
+class TestAsyncViews:
+    @pytest.fixture
+    def obj(self, user):
+        return NachweisFactory(user=user)
+
+    @pytest.fixture
+    def login(self, async_client, user):
+        async_client.force_login(user)
+
+    @pytest.fixture
+    def mock_to_pdf(self):
+        with mock.patch("web.views.anachweis_to_pdf", new=mock.AsyncMock(return_value=HttpResponse("pdf"))) as m:
+            yield m
+
+    @pytest.fixture
+    def mock_batch_to_pdf(self):
+        with mock.patch("web.views.anachweise_to_pdf", new=mock.AsyncMock(return_value=HttpResponse("pdf"))) as m:
+            yield m
+
+    @pytest.mark.parametrize("user_perms", [[("view", _models.Nachweis)]])
+    @pytest.mark.usefixtures("set_user_perms", "login")
+    def test_download(self, async_client, obj, mock_to_pdf):
+        response = async_to_sync(async_client.get)(reverse("anachweis_download", kwargs={"pk": obj.pk}))
+        assert response.status_code == 200
+        assert mock_to_pdf.call_args.args[1] == obj
+
+    @pytest.mark.usefixtures("login")
+    def test_download_requires_permission(self, async_client, obj, mock_to_pdf):
+        response = async_to_sync(async_client.get)(reverse("anachweis_download", kwargs={"pk": obj.pk}))
+        assert response.status_code == 403
+
+    @pytest.mark.parametrize("user_perms", [[("view", _models.Nachweis)]])
+    @pytest.mark.usefixtures("set_user_perms", "login")
+    def test_download_other_user(self, async_rf, user, superuser, mock_to_pdf):
+        # Call the view directly: the 404 response would be rendered in
+        # another thread, which cannot access the test database.
+        other = NachweisFactory(user=superuser)
+        request = async_rf.get("/")
+        request.auser = mock.AsyncMock(return_value=user)
+        with pytest.raises(Http404):
+            async_to_sync(_views.anachweis_download_view)(request, pk=other.pk)
+
+    @pytest.mark.parametrize("user_perms", [[("view", _models.Nachweis)]])
+    @pytest.mark.usefixtures("set_user_perms", "login")
+    def test_batch_download(self, async_client, user, mock_batch_to_pdf):
+        nachweise = [NachweisFactory(user=user) for _ in range(2)]
+        response = async_to_sync(async_client.get)(reverse("anachweis_batch_download"), {"zip": "1"})
+        assert response.status_code == 200
+        args, kwargs = mock_batch_to_pdf.call_args
+        assert set(args[1]) == set(nachweise)
+        assert kwargs["as_zip"]
+
+    @pytest.mark.parametrize("user_perms", [[("view", _models.Nachweis)]])
+    @pytest.mark.usefixtures("set_user_perms", "login")
+    def test_batch_download_nothing_found(self, async_client, mock_batch_to_pdf):
+        response = async_to_sync(async_client.get)(reverse("anachweis_batch_download"))
+        assert response.status_code == 302
+        mock_batch_to_pdf.assert_not_called()
+
+    @pytest.mark.parametrize("user_perms", [[("view", _models.Nachweis)]])
+    @pytest.mark.usefixtures("set_user_perms", "login")
+    def test_batch_download_too_many(self, async_client, user, mock_batch_to_pdf, settings):
+        settings.PDF_BATCH_MAX_NACHWEISE = 1
+        NachweisFactory.create_batch(2, user=user)
+        response = async_to_sync(async_client.get)(reverse("anachweis_batch_download"))
+        assert response.status_code == 302
+        mock_batch_to_pdf.assert_not_called()
+
+    @pytest.mark.usefixtures("login")
+    def test_print_preview(self, async_client, user):
+        response = async_to_sync(async_client.get)(reverse("aprint_preview"), {"nummer": 42})
+        assert response.status_code == 200
+        assert response.context["zfill_nummer"] == "042"
+
+
+class TestPdfJobViews:
+    @pytest.fixture
+    def obj(self, user):
+        return NachweisFactory(user=user)
+
+    @pytest.fixture
+    def job(self, obj):
+        return _models.PdfJob.objects.create(nachweis=obj, user=obj.user, key="foo", html="<p>foo</p>")
+
+    @pytest.fixture
+    def done_job(self, job):
+        pdf_cache.put(job.nachweis, job.key, b"%PDF")
+        job.status = _models.PdfJob.Status.DONE
+        job.save()
+        return job
+
+    @pytest.mark.parametrize("user_perms", [[("view", _models.Nachweis)]])
+    @pytest.mark.usefixtures("set_user_perms", "login_user")
+    def test_enqueue(self, client, obj):
+        """Assert that a POST request enqueues a PDF job for the Nachweis."""
+        response = client.post(reverse("nachweis_pdf_job", kwargs={"pk": obj.pk}))
+        assert response.status_code == 200
+        job = _models.PdfJob.objects.get(nachweis=obj)
+        assert response.json()["status"] == "pending"
+        assert response.json()["status_url"] == reverse("pdf_job_status", kwargs={"pk": job.pk})
+
+    @pytest.mark.usefixtures("login_user")
+    def test_enqueue_requires_permission(self, client, obj):
+        """Assert that only users with 'view' permission can enqueue a job."""
+        assert client.post(reverse("nachweis_pdf_job", kwargs={"pk": obj.pk})).status_code == 403
+
+    @pytest.mark.usefixtures("login_user")
+    def test_status(self, client, job):
+        """Assert that the status view returns the status of the job."""
+        data = client.get(reverse("pdf_job_status", kwargs={"pk": job.pk})).json()
+        assert data["status"] == "pending"
+        assert "download_url" not in data
+
+    @pytest.mark.usefixtures("login_user")
+    def test_status_done(self, client, done_job):
+        """Assert that the status of a finished job includes the download URL."""
+        data = client.get(reverse("pdf_job_status", kwargs={"pk": done_job.pk})).json()
+        assert data["download_url"] == reverse("pdf_job_download", kwargs={"pk": done_job.pk})
+
+    @pytest.mark.usefixtures("login_user")
+    def test_status_other_user(self, client, superuser):
+        """Assert that users cannot see the jobs of other users."""
+        other = NachweisFactory(user=superuser)
+        job = _models.PdfJob.objects.create(nachweis=other, user=superuser, key="foo")
+        assert client.get(reverse("pdf_job_status", kwargs={"pk": job.pk})).status_code == 404
+
+    @pytest.mark.parametrize("user_perms", [[("view", _models.Nachweis)]])
+    @pytest.mark.usefixtures("set_user_perms", "login_user")
+    def test_download(self, client, done_job):
+        """Assert that the PDF of a finished job can be downloaded."""
+        response = client.get(reverse("pdf_job_download", kwargs={"pk": done_job.pk}))
+        assert isinstance(response, FileResponse)
+        assert b"".join(response.streaming_content) == b"%PDF"
+
+    @pytest.mark.parametrize("user_perms", [[("view", _models.Nachweis)]])
+    @pytest.mark.usefixtures("set_user_perms", "login_user")
+    def test_download_not_done(self, client, job):
+        """Assert that the PDF of an unfinished job cannot be downloaded."""
+        assert client.get(reverse("pdf_job_download", kwargs={"pk": job.pk})).status_code == 404
+
+    @pytest.mark.parametrize("user_perms", [[("view", _models.Nachweis)]])
+    @pytest.mark.usefixtures("set_user_perms", "login_user")
+    def test_download_pdf_removed(self, client, done_job):
+        """Assert that the user is redirected if the PDF is no longer cached."""
+        pdf_cache.invalidate_nachweis(done_job.nachweis)
+        response = client.get(reverse("pdf_job_download", kwargs={"pk": done_job.pk}))
+        assert response.status_code == 302
+
+
+class TestNachweisBatchDownloadView:
+    @pytest.fixture
+    def nachweise(self, user):
+        return [
+            NachweisFactory(user=user, nummer=2, datum_start=date(2025, 1, 13), fertig=True),
+            NachweisFactory(user=user, nummer=1, datum_start=date(2025, 1, 6), fertig=False),
+            NachweisFactory(user=user, nummer=3, datum_start=date(2025, 1, 20), fertig=False),
+        ]
+
+    @pytest.fixture
+    def not_user_nachweis(self, superuser):
+        return NachweisFactory(user=superuser)
+
+    @pytest.fixture
+    def url(self):
+        return reverse("nachweis_batch_download")
+
+    @pytest.fixture
+    def mock_to_pdf(self):
+        with mock.patch("web.views.nachweise_to_pdf") as m:
+            m.return_value = HttpResponse("pdf")
+            yield m
+
+    def downloaded(self, mock_to_pdf):
+        """Return the Nachweise that were passed to nachweise_to_pdf."""
+        return list(mock_to_pdf.call_args.args[1])
+
+    @pytest.mark.parametrize("user_perms", [[("view", _models.Nachweis)]])
+    @pytest.mark.usefixtures("set_user_perms", "login_user", "not_user_nachweis")
+    def test_all(self, client, url, nachweise, mock_to_pdf):
+        """
+        Assert that all the Nachweise of the user are downloaded in
+        chronological order.
+        """
+        assert client.get(url).status_code == 200
+        assert self.downloaded(mock_to_pdf) == [nachweise[1], nachweise[0], nachweise[2]]
+        assert mock_to_pdf.call_args.kwargs["as_zip"] is False
+
+    @pytest.mark.parametrize("user_perms", [[("view", _models.Nachweis)]])
+    @pytest.mark.usefixtures("set_user_perms", "login_user")
+    def test_filtered(self, client, url, nachweise, mock_to_pdf):
+        """Assert that the filters of the Nachweis list are applied."""
+        client.get(url, data={"unfinished": "1"})
+        assert self.downloaded(mock_to_pdf) == [nachweise[1], nachweise[2]]
+
+    @pytest.mark.parametrize("user_perms", [[("view", _models.Nachweis)]])
+    @pytest.mark.usefixtures("set_user_perms", "login_user")
+    def test_selected(self, client, url, nachweise, mock_to_pdf, not_user_nachweis):
+        """Assert that only the selected Nachweise of the user are downloaded."""
+        client.get(url, data={"pk": [nachweise[0].pk, not_user_nachweis.pk, "foo"]})
+        assert self.downloaded(mock_to_pdf) == [nachweise[0]]
+
+    @pytest.mark.parametrize("user_perms", [[("view", _models.Nachweis)]])
+    @pytest.mark.usefixtures("set_user_perms", "login_user", "nachweise")
+    def test_zip(self, client, url, mock_to_pdf):
+        """Assert that the Nachweise are downloaded as a ZIP file if requested."""
+        client.get(url, data={"zip": "1"})
+        assert mock_to_pdf.call_args.kwargs["as_zip"] is True
+
+    @pytest.mark.parametrize("user_perms", [[("view", _models.Nachweis)]])
+    @pytest.mark.usefixtures("set_user_perms", "login_user")
+    def test_nothing_to_download(self, client, url, mock_to_pdf):
+        """Assert that the view redirects back if there is nothing to download."""
+        response = client.get(url)
+        assert response.status_code == 302
+        mock_to_pdf.assert_not_called()
+
+    @pytest.mark.parametrize("user_perms", [[("view", _models.Nachweis)]])
+    @pytest.mark.usefixtures("set_user_perms", "login_user", "nachweise")
+    def test_too_many(self, client, url, mock_to_pdf, settings):
+        """
+        Assert that the view redirects back with a message if more Nachweise
+        were selected than can be downloaded at once.
+        """
+        settings.PDF_BATCH_MAX_NACHWEISE = 2
+        response = client.get(url, follow=True)
+        assert response.redirect_chain[0] == (reverse("nachweis_list"), 302)
+        assert "höchstens 2 Nachweise" in str(list(response.context["messages"])[0])
+        mock_to_pdf.assert_not_called()
+
+    @pytest.mark.usefixtures("login_user", "nachweise")
+    def test_requires_permission(self, client, url, mock_to_pdf):
+        """Assert that only users with 'view' permission can download."""
+        assert client.get(url).status_code == 403
+        mock_to_pdf.assert_not_called()
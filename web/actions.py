@@ -1,10 +1,13 @@
+import copy
 from collections import OrderedDict
-from typing import Any
-from urllib.parse import urlencode
+from typing import Any, Callable
+from urllib.parse import quote, urlencode
 
+from django.conf import settings
 from django.http import HttpRequest
 from django.urls import reverse
 from django.utils.html import format_html
+from django.utils.http import RFC3986_SUBDELIMS
 from django.utils.safestring import SafeString, mark_safe
 
 from web import models as _models
@@ -31,6 +34,10 @@ class ListAction:
 
         {% render_action action request row=result_row %}
 
+    The actions are declared once for all requests. For rendering the rows of
+    a request, the view binds a copy of each action to the request (see bind).
+    A bound action computes the parts that are the same for every row - like
+    permission checks or URLs - only once.
     """
 
     url_name: str = ""
@@ -42,6 +49,24 @@ class ListAction:
         self.label = label or self.label
         self.css = css or self.css
         self.title = title or self.title
+        self._once_cache = None
+
+    def bind(self, request: HttpRequest) -> "ListAction":
+        """Return a copy of this action for rendering the rows of the given request."""
+        action = copy.copy(self)
+        action._once_cache = {}
+        return action
+
+    def once(self, key: Any, func: Callable[[], Any]) -> Any:
+        """
+        Return the result of func, calling it only once per request if the
+        action is bound to a request.
+        """
+        if self._once_cache is None:
+            return func()
+        if key not in self._once_cache:
+            self._once_cache[key] = func()
+        return self._once_cache[key]
 
     def get_title(self, row: OrderedDict) -> str:
         return self.title
@@ -87,7 +112,7 @@ class LinkAction(ListAction):
 
     def get_url(self, request: HttpRequest, row: OrderedDict) -> str:
         """Return the URL for the action on the given result row."""
-        return reverse(self.url_name)
+        return self.once("url", lambda: reverse(self.url_name))
 
     def render(self, request: HttpRequest, row: OrderedDict) -> SafeString:
         """Render the action button for the given result row."""
@@ -102,6 +127,26 @@ class LinkAction(ListAction):
         )
 
 
+# A placeholder for the primary key in URL templates. Only digits, so that it
+# matches any path converter:
+_PK_PLACEHOLDER = "9" * 20
+
+
+def get_url_template(url_name: str, pk_url_kwarg: str = "pk") -> tuple[str, str]:
+    """
+    Reverse the URL with the given name for a placeholder primary key and
+    return the parts of the URL before and after the primary key.
+    """
+    prefix, suffix = reverse(url_name, kwargs={pk_url_kwarg: _PK_PLACEHOLDER}).split(_PK_PLACEHOLDER)
+    return prefix, suffix
+
+
+def fill_url_template(template: tuple[str, str], pk: Any) -> str:
+    """Return the URL of the given URL template for the given primary key."""
+    # Quote like reverse does:
+    return f"{template[0]}{quote(str(pk), safe=RFC3986_SUBDELIMS + '/~:@')}{template[1]}"
+
+
 class ModelAction(LinkAction):
     """A list view action that acts on a model object."""
 
@@ -113,14 +158,21 @@ class ModelAction(LinkAction):
 
     def get_url(self, request: HttpRequest, row: OrderedDict) -> str:
         """Return the URL for the action on the given object."""
-        return reverse(self.url_name, kwargs={self.pk_url_kwarg: row["obj"].pk})
+        template = self.once("url", lambda: get_url_template(self.url_name, self.pk_url_kwarg))
+        return fill_url_template(template, row["obj"].pk)
 
 
 class ChangePermActionMixin:
-    """An action mixin that checks if the user has 'change' permissions."""
+    """
+    An action mixin that checks if the user has 'change' permissions.
+
+    The permission is a model permission, so a bound action checks it only
+    once per model.
+    """
 
     def has_permission(self, request: HttpRequest, row: OrderedDict) -> bool:
-        return perms.has_change_permission(request.user, row["obj"]._meta)
+        opts = row["obj"]._meta
+        return self.once(("change", opts.label), lambda: perms.has_change_permission(request.user, opts))
 
 
 class EditAction(ChangePermActionMixin, ModelAction):
@@ -155,7 +207,7 @@ class AddMissingAction(LinkAction):
         return "Fehlenden Nachweis erstellen"
 
     def has_permission(self, request: HttpRequest, row: OrderedDict) -> bool:
-        return perms.has_add_permission(request.user, _models.Nachweis._meta)
+        return self.once("add", lambda: perms.has_add_permission(request.user, _models.Nachweis._meta))
 
     def get_initial_data(self, request: HttpRequest, row: OrderedDict) -> dict:
         """Return initial data for the missing Nachweis."""
@@ -194,15 +246,26 @@ class FinishNachweisAction(ChangePermActionMixin, ListAction):
 
 class DownloadNachweisAction(ListAction):
     def has_permission(self, request: HttpRequest, row: OrderedDict) -> bool:
-        return perms.has_view_permission(request.user, row["obj"]._meta)
+        opts = row["obj"]._meta
+        return self.once(("view", opts.label), lambda: perms.has_view_permission(request.user, opts))
 
     def render(self, request: HttpRequest, row: OrderedDict) -> SafeString:
         if not self.has_permission(request, row):
             return ""
-        url = reverse("nachweis_download", kwargs={"pk": row["obj"].pk})
+        # The link downloads the PDF directly. If a worker processes the PDF
+        # jobs, the PDF is requested from the job URL instead when JavaScript
+        # is available (see pdf_download.js).
+        url = fill_url_template(self.once("url", lambda: get_url_template("nachweis_download")), row["obj"].pk)
+        job_url = ""
+        if settings.PDF_WORKER:
+            job_url = format_html(
+                ' data-job-url="{}"',
+                fill_url_template(self.once("job_url", lambda: get_url_template("nachweis_pdf_job")), row["obj"].pk),
+            )
         return format_html(
-            '<a href="{url}" class="{css}" title="Nachweis herunterladen">{label}</a>',
+            '<a href="{url}" class="{css}" title="Nachweis herunterladen"{job_url}>{label}</a>',
             url=url,
-            css="btn btn-outline-primary btn-sm w-100",
+            job_url=job_url,
+            css="btn btn-outline-primary btn-sm w-100 pdf-download-btn",
             label=mark_safe('<i class="bi bi-download"></i>'),
         )
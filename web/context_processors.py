@@ -0,0 +1,20 @@
+from django.utils.functional import SimpleLazyObject
+
+from web.utils.models import get_cached_deleted_objects_count
+
+
+def trash_count(request):
+    """
+    Add the number of items in the current user's trash can to the context.
+
+    The count is only computed when a template actually renders it, so
+    responses without the navigation bar (popups, auth pages) do not query for
+    it.
+    """
+
+    def get_trash_count():
+        if not request.user.is_authenticated:
+            return 0
+        return get_cached_deleted_objects_count(request.user)
+
+    return {"trash_count": SimpleLazyObject(get_trash_count)}
@@ -9,6 +9,8 @@ from django.db.models.query import QuerySet
 from mizdb_tomselect.widgets import MIZSelect
 
 from web import models as _models
+from web.utils.models import NachweisFacetCounts, get_cached_nachweis_facets
+from web.utils.search import FTS5SearchBackend, LookupSearchBackend
 
 
 class UserCreationForm(BaseUserCreationForm):
@@ -137,6 +139,10 @@ class SearchForm(forms.Form):
             text_search_lookup = "contains"
 
             ==> queryset.filter(Q(foo__contains=?) | Q(bar__contains=?))
+
+    The filters are created by the `text_search_backend`. Set it to a
+    FTS5SearchBackend to query a full-text index instead; `apply_filters` then
+    also orders the results by relevance.
     """
 
     q = forms.CharField(label="Textsuche", required=False)
@@ -144,6 +150,7 @@ class SearchForm(forms.Form):
     lookups: dict
     text_search_fields: Iterable = ()
     text_search_lookup: str = "icontains"
+    text_search_backend: LookupSearchBackend = LookupSearchBackend()
 
     class Media:
         js = ["web/js/search_form.js", "web/js/remove_empty_fields.js"]
@@ -155,11 +162,11 @@ class SearchForm(forms.Form):
 
     def get_text_search_filters(self) -> Q:
         """Create a filter from the data of the text search formfield."""
-        q = Q()
         if self.is_valid() and self.cleaned_data["q"]:
-            for field in self.text_search_fields:
-                q |= Q(**{"".join([field, LOOKUP_SEP, self.text_search_lookup]): self.cleaned_data["q"]})
-        return q
+            return self.text_search_backend.get_filters(
+                self.text_search_fields, self.cleaned_data["q"], self.text_search_lookup
+            )
+        return Q()
 
     def get_filters(self) -> dict:
         """Turn the form data into parameters for queryset.filter()."""
@@ -205,7 +212,12 @@ class SearchForm(forms.Form):
         """Apply the filters from the search form's data on the given queryset."""
         if not self.is_valid() or not self.cleaned_data:
             return queryset
-        return queryset.filter(self.get_text_search_filters(), **self.get_filters())
+        queryset = queryset.filter(self.get_text_search_filters(), **self.get_filters())
+        if self.cleaned_data["q"]:
+            queryset = self.text_search_backend.order_by_relevance(
+                queryset, self.text_search_fields, self.cleaned_data["q"]
+            )
+        return queryset
 
 
 class NachweisSearchForm(SearchForm):
@@ -234,24 +246,19 @@ class NachweisSearchForm(SearchForm):
     }
 
     text_search_fields = ["betrieb", "schule"]
+    text_search_backend = FTS5SearchBackend(_models.Nachweis, "web_nachweis_fts")
 
     def __init__(self, *, user, **kwargs):
         super().__init__(**kwargs)
-        eingereicht_choices = [("", "---------")]
-        for name in (
-            _models.Nachweis.objects.filter(user=user)
-            .values_list("eingereicht_bei", flat=True)
-            .order_by("eingereicht_bei")
-            .distinct()
-        ):
-            if name:
-                eingereicht_choices.append((name, name))
-        self.fields["eingereicht_bei"].choices = eingereicht_choices
+        facets = get_cached_nachweis_facets(user)
+        self.fields["eingereicht_bei"].choices = [("", "---------")] + [(name, name) for name in facets.eingereicht_bei]
         self.fields["abteilung"].queryset = self.fields["abteilung"].queryset.filter(user=user)
-        self.fields["jahr"].choices = [("", "---------")] + [
-            (jahr, jahr)
-            for jahr in _models.Nachweis.objects.filter(user=user)
-            .values_list("datum_start__year", flat=True)
-            .order_by("datum_start__year")
-            .distinct()
-        ]
+        self.fields["jahr"].choices = [("", "---------")] + [(jahr, jahr) for jahr in facets.jahre]
+
+    def add_facet_counts(self, counts: NachweisFacetCounts) -> None:
+        """Add the number of results to the labels of the year and recipient choices."""
+        for name, facet in (("jahr", counts.jahre), ("eingereicht_bei", counts.eingereicht_bei)):
+            self.fields[name].choices = [
+                (value, f"{label} ({facet[value]})" if value in facet else label)
+                for value, label in self.fields[name].choices
+            ]
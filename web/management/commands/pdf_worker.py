@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from web.utils import pdf_jobs
+
+
+class Command(BaseCommand):
+    help = "Process the pending PDF jobs (see web.utils.pdf_jobs)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="The number of seconds to wait between checks for new jobs.",
+        )
+        parser.add_argument("--once", action="store_true", help="Exit when no job is pending.")
+
+    def handle(self, *args, **options):
+        try:
+            pdf_jobs.work(interval=options["interval"], once=options["once"])
+        except KeyboardInterrupt:  # pragma: no cover
+            pass
@@ -0,0 +1,78 @@
+from django.db import migrations
+from django.db.utils import OperationalError
+
+# Full-text index of the Nachweis texts for the text search of the Nachweis
+# list (see web.utils.search.FTS5SearchBackend). The index is an external
+# content table, i.e. it does not store a copy of the texts, and is kept in
+# sync by triggers - those also fire for bulk_create and queryset.update().
+# 'remove_diacritics 2' lets 'Prufung' find 'Prüfung'.
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE web_nachweis_fts USING fts5(
+        betrieb, schule,
+        content='web_nachweis', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER web_nachweis_fts_insert AFTER INSERT ON web_nachweis BEGIN
+        INSERT INTO web_nachweis_fts(rowid, betrieb, schule) VALUES (new.id, new.betrieb, new.schule);
+    END
+    """,
+    """
+    CREATE TRIGGER web_nachweis_fts_delete AFTER DELETE ON web_nachweis BEGIN
+        INSERT INTO web_nachweis_fts(web_nachweis_fts, rowid, betrieb, schule)
+        VALUES ('delete', old.id, old.betrieb, old.schule);
+    END
+    """,
+    """
+    CREATE TRIGGER web_nachweis_fts_update AFTER UPDATE OF betrieb, schule ON web_nachweis BEGIN
+        INSERT INTO web_nachweis_fts(web_nachweis_fts, rowid, betrieb, schule)
+        VALUES ('delete', old.id, old.betrieb, old.schule);
+        INSERT INTO web_nachweis_fts(rowid, betrieb, schule) VALUES (new.id, new.betrieb, new.schule);
+    END
+    """,
+    "INSERT INTO web_nachweis_fts(web_nachweis_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS web_nachweis_fts_insert",
+    "DROP TRIGGER IF EXISTS web_nachweis_fts_delete",
+    "DROP TRIGGER IF EXISTS web_nachweis_fts_update",
+    "DROP TABLE IF EXISTS web_nachweis_fts",
+]
+
+
+def create_fts_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute(CREATE_SQL[0])
+        except OperationalError:
+            # SQLite was compiled without FTS5: the text search falls back to
+            # 'icontains' lookups.
+            return
+        for sql in CREATE_SQL[1:]:
+            cursor.execute(sql)
+
+
+def drop_fts_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for sql in DROP_SQL:
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("web", "0007_nachweis_user_related_name"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_index, drop_fts_index, elidable=False),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-16 20:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('web', '0008_nachweis_fts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='nachweis',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['user', '-ausbildungswoche'], name='nachweis_user_woche_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='nachweis',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['user', '-datum_start', 'datum_ende'], name='nachweis_user_datum_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='nachweis',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['user', '-nummer'], name='nachweis_user_nummer_idx'),
+        ),
+    ]
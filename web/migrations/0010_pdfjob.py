@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-16 21:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('web', '0009_nachweis_user_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PdfJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64)),
+                ('html', models.TextField(blank=True)),
+                ('status', models.CharField(choices=[('pending', 'wartend'), ('running', 'in Bearbeitung'), ('done', 'fertig'), ('failed', 'fehlgeschlagen')], default='pending', max_length=10)),
+                ('error', models.TextField(blank=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('nachweis', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pdf_jobs', to='web.nachweis')),
+                ('user', models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Benutzer')),
+            ],
+            options={
+                'verbose_name': 'PDF-Auftrag',
+                'verbose_name_plural': 'PDF-Aufträge',
+                'ordering': ['created'],
+                'indexes': [models.Index(fields=['status', 'created'], name='pdfjob_status_idx')],
+            },
+        ),
+    ]
@@ -65,6 +65,25 @@ class Nachweis(SoftDeleteModel):
         verbose_name = "Nachweis"
         verbose_name_plural = "Nachweise"
         ordering = ["-ausbildungswoche"]
+        # Every view queries the Nachweise of one user that are not in the
+        # trash, either in a certain order or for a certain date:
+        indexes = [
+            models.Index(
+                fields=["user", "-ausbildungswoche"],
+                name="nachweis_user_woche_idx",
+                condition=models.Q(deleted_at__isnull=True),
+            ),
+            models.Index(
+                fields=["user", "-datum_start", "datum_ende"],
+                name="nachweis_user_datum_idx",
+                condition=models.Q(deleted_at__isnull=True),
+            ),
+            models.Index(
+                fields=["user", "-nummer"],
+                name="nachweis_user_nummer_idx",
+                condition=models.Q(deleted_at__isnull=True),
+            ),
+        ]
 
     def __str__(self):
         return f"Nachweis #{self.nummer}"
@@ -81,3 +100,37 @@ class Abteilung(SoftDeleteModel):
         verbose_name = "Abteilung"
         verbose_name_plural = "Abteilungen"
         ordering = ["name"]
+
+
+class PdfJob(models.Model):
+    """
+    A job that converts a Nachweis into a PDF.
+
+    The jobs are processed in the background by the pdf_worker management
+    command (see web.utils.pdf_jobs).
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "wartend"
+        RUNNING = "running", "in Bearbeitung"
+        DONE = "done", "fertig"
+        FAILED = "failed", "fehlgeschlagen"
+
+    nachweis = models.ForeignKey("Nachweis", on_delete=models.CASCADE, related_name="pdf_jobs")
+    user = models.ForeignKey("User", on_delete=models.CASCADE, editable=False, verbose_name="Benutzer")
+    # The PDF cache key and the HTML to convert:
+    key = models.CharField(max_length=64)
+    html = models.TextField(blank=True)
+    status = models.CharField(max_length=10, choices=Status, default=Status.PENDING)
+    error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "PDF-Auftrag"
+        verbose_name_plural = "PDF-Aufträge"
+        ordering = ["created"]
+        indexes = [models.Index(fields=["status", "created"], name="pdfjob_status_idx")]
+
+    def __str__(self):
+        return f"PDF-Auftrag für {self.nachweis}"
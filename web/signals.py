@@ -3,9 +3,19 @@ from django.conf import settings
 from django.contrib.auth import get_permission_codename
 from django.contrib.auth.management import create_permissions
 from django.contrib.auth.models import Group, Permission
-from django.db.models.signals import post_migrate
+from django.db.models.signals import post_delete, post_migrate, post_save
 from django.dispatch import receiver
 
+from web import models as _models
+from web.utils import pdf_cache
+from web.utils.cache import invalidate_user_cache
+from web.utils.models import (
+    MISSING_NACHWEISE_CACHE,
+    NACHWEIS_COUNT_CACHE,
+    NACHWEIS_FACETS_CACHE,
+    TRASH_COUNT_CACHE,
+)
+
 
 def _assure_permissions_created():  # pragma: no cover
     """Ensure that permissions for the web app have been created."""
@@ -33,3 +43,86 @@ def create_azubi_group(app="web", **kwargs):
     # that the group contains all the expected permissions?
     azubi_permissions = Permission.objects.filter(codename__in=codenames)
     azubi_group.permissions.set(azubi_permissions)
+
+
+@receiver(post_save, sender=_models.Nachweis, dispatch_uid="nachweis_saved_invalidate_missing")
+@receiver(post_delete, sender=_models.Nachweis, dispatch_uid="nachweis_deleted_invalidate_missing")
+@receiver(post_save, sender=_models.UserProfile, dispatch_uid="profile_saved_invalidate_missing")
+@receiver(post_delete, sender=_models.UserProfile, dispatch_uid="profile_deleted_invalidate_missing")
+def invalidate_missing_nachweise(sender, instance, **kwargs):
+    """
+    Invalidate the cached missing Nachweis objects of the user whose Nachweis
+    or profile changed.
+
+    Soft-deleting and restoring a Nachweis saves it, so these are covered by
+    post_save.
+    """
+    invalidate_user_cache(MISSING_NACHWEISE_CACHE, instance.user_id)
+
+
+@receiver(post_save, sender=_models.Nachweis, dispatch_uid="nachweis_saved_invalidate_count")
+@receiver(post_delete, sender=_models.Nachweis, dispatch_uid="nachweis_deleted_invalidate_count")
+@receiver(post_delete, sender=_models.Abteilung, dispatch_uid="abteilung_deleted_invalidate_count")
+def invalidate_nachweis_count(sender, instance, **kwargs):
+    """
+    Invalidate the cached result counts of the Nachweis list of the user.
+
+    The counts per Abteilung change when an Abteilung is deleted, too (see
+    invalidate_nachweis_facets).
+    """
+    invalidate_user_cache(NACHWEIS_COUNT_CACHE, instance.user_id)
+
+
+@receiver(post_save, sender=_models.Nachweis, dispatch_uid="nachweis_saved_invalidate_facets")
+@receiver(post_delete, sender=_models.Nachweis, dispatch_uid="nachweis_deleted_invalidate_facets")
+@receiver(post_save, sender=_models.Abteilung, dispatch_uid="abteilung_saved_invalidate_facets")
+@receiver(post_delete, sender=_models.Abteilung, dispatch_uid="abteilung_deleted_invalidate_facets")
+def invalidate_nachweis_facets(sender, instance, **kwargs):
+    """
+    Invalidate the cached filter choices of the Nachweis list of the user.
+
+    Deleting an Abteilung also unsets it on its Nachweise, without sending
+    any signals for them.
+    """
+    invalidate_user_cache(NACHWEIS_FACETS_CACHE, instance.user_id)
+
+
+@receiver(post_save, dispatch_uid="soft_delete_model_saved_invalidate_trash_count")
+@receiver(post_delete, dispatch_uid="soft_delete_model_deleted_invalidate_trash_count")
+def invalidate_trash_count(sender, instance, signal, **kwargs):
+    """
+    Invalidate the cached trash count of the user whose item was soft-deleted,
+    restored or hard-deleted.
+    """
+    if sender._meta.app_label != "web" or not hasattr(sender, "deleted_objects"):
+        return
+    if signal is post_save:
+        # Soft-deleting and restoring only update the soft-delete fields. Other
+        # saves only affect the trash if the item is in the trash:
+        update_fields = kwargs.get("update_fields") or ()
+        if "deleted_at" not in update_fields and instance.deleted_at is None:
+            return
+    invalidate_user_cache(TRASH_COUNT_CACHE, instance.user_id)
+
+
+@receiver(post_save, sender=_models.Nachweis, dispatch_uid="nachweis_saved_invalidate_pdf")
+@receiver(post_delete, sender=_models.Nachweis, dispatch_uid="nachweis_deleted_invalidate_pdf")
+def invalidate_nachweis_pdf(sender, instance, **kwargs):
+    """Remove the cached PDFs of the Nachweis that changed."""
+    pdf_cache.invalidate_nachweis(instance)
+
+
+@receiver(post_save, sender=_models.User, dispatch_uid="user_saved_invalidate_pdf")
+@receiver(post_delete, sender=_models.User, dispatch_uid="user_deleted_invalidate_pdf")
+def invalidate_user_pdf(sender, instance, signal, **kwargs):
+    """
+    Remove the cached PDFs of the user, if the user's name changed or the user
+    was deleted.
+
+    The name is printed on every Nachweis. Saves that only update other fields
+    (like the last_login update on every login) keep the cache.
+    """
+    update_fields = kwargs.get("update_fields")
+    if signal is post_save and update_fields and not {"first_name", "last_name"} & set(update_fields):
+        return
+    pdf_cache.invalidate_user(instance.pk)
@@ -0,0 +1,97 @@
+// Download the PDF of a Nachweis via a background PDF job.
+// Requires getCookie from finish.js.
+
+// The number of milliseconds between two status requests:
+const PDF_POLL_INTERVAL = 1000;
+// The maximum number of status requests before falling back to the direct
+// download:
+const PDF_MAX_POLLS = 60;
+
+/*
+ * Add an error message to the messages container.
+ */
+function addPdfErrorMessage(error) {
+    const messageContainer = document.querySelector("#messages-container");
+    if (messageContainer) {
+        const alert = document.createElement("div");
+        alert.className = "alert alert-dismissible alert-danger";
+        alert.setAttribute("role", "alert");
+        alert.textContent = `PDF Erzeugung fehlgeschlagen: ${error}`;
+        alert.insertAdjacentHTML(
+            "beforeend",
+            '<button type="button" class="btn-close" data-bs-dismiss="alert" aria-label="Close"></button>'
+        );
+        messageContainer.appendChild(alert);
+    }
+}
+
+/*
+ * Download the PDF directly from the URL of the download button, without a
+ * PDF job.
+ */
+function downloadPdfDirectly(button) {
+    button.classList.remove("disabled");
+    window.location = button.href;
+}
+
+/*
+ * Request the status data of a PDF job. The promise is rejected if the
+ * response is not OK.
+ */
+function fetchPdfJob(url, options) {
+    return fetch(url, options).then(response => {
+        if (!response.ok) {
+            throw new Error(response.statusText);
+        }
+        return response.json();
+    });
+}
+
+/*
+ * Handle the status data of a PDF job: download the PDF if the job is done,
+ * otherwise check the status again after a while. Fall back to the direct
+ * download if the job takes too long or its status cannot be requested.
+ */
+function handlePdfJob(button, data, polls = 0) {
+    if (data.status === "done") {
+        button.classList.remove("disabled");
+        window.location = data.download_url;
+    } else if (data.status === "failed") {
+        button.classList.remove("disabled");
+        addPdfErrorMessage(data.error);
+    } else if (polls >= PDF_MAX_POLLS) {
+        downloadPdfDirectly(button);
+    } else {
+        setTimeout(() => {
+            fetchPdfJob(data.status_url, { headers: { "X-Requested-With": "XMLHttpRequest" } })
+                .then(data => handlePdfJob(button, data, polls + 1))
+                .catch(() => downloadPdfDirectly(button));
+        }, PDF_POLL_INTERVAL);
+    }
+}
+
+/*
+ * Enqueue a PDF job for the Nachweis of the given download button. Fall back
+ * to the direct download if the job cannot be enqueued.
+ */
+function requestPdf(button) {
+    button.classList.add("disabled");
+    fetchPdfJob(button.dataset.jobUrl, {
+        method: "POST",
+        headers: {
+            "X-Requested-With": "XMLHttpRequest",
+            "X-CSRFToken": getCookie("csrftoken")
+        }
+    })
+        .then(data => handlePdfJob(button, data))
+        .catch(() => downloadPdfDirectly(button));
+}
+
+document.addEventListener("DOMContentLoaded", function () {
+    document.querySelectorAll("a.pdf-download-btn[data-job-url]").forEach((button) => {
+        button.addEventListener("click", (event) => {
+            event.preventDefault();
+            requestPdf(button);
+        });
+    });
+});
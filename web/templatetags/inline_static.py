@@ -0,0 +1,35 @@
+import re
+from functools import cache
+
+from django.contrib.staticfiles import finders
+from django.template import Library
+from django.utils.safestring import SafeString, mark_safe
+
+register = Library()
+
+
+def minify_css(css: str) -> str:
+    """Remove the comments and the redundant whitespace from the given CSS."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)
+    css = re.sub(r"\s+", " ", css)
+    return re.sub(r"\s*([{};:,>])\s*", r"\1", css).strip()
+
+
+@cache
+def _load_css(path: str) -> str:
+    absolute_path = finders.find(path)
+    if not absolute_path:
+        raise ValueError(f"Static file not found: {path}")
+    with open(absolute_path, encoding="utf-8") as f:
+        return minify_css(f.read())
+
+
+@register.simple_tag
+def inline_css(path: str) -> SafeString:
+    """
+    Return a style element with the minified content of the given static CSS
+    file.
+
+    The file is read and minified once per process.
+    """
+    return mark_safe(f"<style>{_load_css(path)}</style>")
@@ -26,9 +26,15 @@ def add_qs(request: HttpRequest, name: str, value: Any) -> str:
 
 
 @register.simple_tag
-def remove_qs(request: HttpRequest, name: str) -> str:
-    """Remove a parameter from the query string of the current request."""
-    return _get_querystring(request, remove=[name])
+def filter_qs(request: HttpRequest, name: str, value: Any) -> str:
+    """Set a filter parameter and go back to the first page of the results."""
+    return _get_querystring(request, add={name: value}, remove=["page", "cursor"])
+
+
+@register.simple_tag
+def remove_qs(request: HttpRequest, *names: str) -> str:
+    """Remove parameters from the query string of the current request."""
+    return _get_querystring(request, remove=list(names))
 
 
 @register.simple_tag
@@ -37,5 +43,5 @@ def nachweis_status(request: HttpRequest, status: str) -> str:
     if status in request.GET:
         return _get_querystring(request, remove=[status])
     else:
-        # Remove 'page' parameter when adding a filter
-        return _get_querystring(request, add={status: "1"}, remove=["page"])
+        # Remove the 'page' and 'cursor' parameters when adding a filter
+        return _get_querystring(request, add={status: "1"}, remove=["page", "cursor"])
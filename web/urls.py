@@ -1,8 +1,18 @@
+from django.conf import settings
 from django.contrib.auth.views import logout_then_login
 from django.urls import path
 
 from web import views
 
+if settings.ASYNC_VIEWS:
+    nachweis_download_view = views.anachweis_download_view
+    nachweis_batch_download_view = views.anachweis_batch_download_view
+    print_preview = views.aprint_preview
+else:
+    nachweis_download_view = views.nachweis_download_view
+    nachweis_batch_download_view = views.nachweis_batch_download_view
+    print_preview = views.print_preview
+
 urlpatterns = [
     # Auth
     path("login/", views.LoginView.as_view(), name="login"),
@@ -32,13 +42,17 @@ urlpatterns = [
     # Autocomplete
     path("abteilung_ac/", views.AbteilungAutocompleteView.as_view(), name="abteilung_ac"),
     # Other
-    path("preview/", views.print_preview, name="print_preview"),
+    path("preview/", print_preview, name="print_preview"),
     path("trash/", views.PapierkorbView.as_view(), name="trash"),
     path("<str:model_name>/<int:pk>/restore/", views.restore_object, name="restore_object"),
     path("<str:model_name>/<int:pk>/hard_delete/", views.HardDeleteView.as_view(), name="hard_delete"),
     path("trash/empty/", views.empty_trash, name="empty_trash"),
     path("missing/", views.MissingView.as_view(), name="missing"),
     path("nachweis/finish/", views.finish_nachweis_view, name="finish_nachweis"),
-    path("nachweis/<int:pk>/download/", views.nachweis_download_view, name="nachweis_download"),
+    path("nachweis/<int:pk>/download/", nachweis_download_view, name="nachweis_download"),
+    path("nachweis/download/", nachweis_batch_download_view, name="nachweis_batch_download"),
+    path("nachweis/<int:pk>/pdf/", views.nachweis_pdf_job_view, name="nachweis_pdf_job"),
+    path("pdf/<int:pk>/", views.pdf_job_status_view, name="pdf_job_status"),
+    path("pdf/<int:pk>/download/", views.pdf_job_download_view, name="pdf_job_download"),
     path("", views.DashboardView.as_view(), name="home"),
 ]
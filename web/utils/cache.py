@@ -0,0 +1,48 @@
+import time
+from typing import Any, Callable
+
+from django.core.cache import cache
+
+# One day; cached values are usually invalidated much earlier than that.
+DEFAULT_TIMEOUT = 60 * 60 * 24
+
+
+def _version_key(namespace: str, user_id: int) -> str:
+    return f"{namespace}:{user_id}:version"
+
+
+def get_user_cache_key(namespace: str, user_id: int, *parts: Any) -> str:
+    """
+    Return the cache key for a value of the given namespace that belongs to the
+    user with the given id.
+
+    The key includes the current cache version of the user, so that all values
+    of the namespace can be invalidated at once with `invalidate_user_cache`.
+    """
+    version_key = _version_key(namespace, user_id)
+    # Use a timestamp as the initial version rather than a counter starting at
+    # 1, so that an evicted version key can never lead back to stale values:
+    cache.add(version_key, time.time_ns(), timeout=None)
+    version = cache.get(version_key)
+    return ":".join(str(part) for part in (namespace, user_id, version, *parts))
+
+
+def get_or_set_for_user(
+    namespace: str,
+    user_id: int,
+    default: Callable[[], Any],
+    *parts: Any,
+    timeout: int = DEFAULT_TIMEOUT,
+) -> Any:
+    """
+    Return the user's cached value for the given namespace and key parts.
+
+    If nothing is cached yet, call `default` and cache its return value.
+    """
+    return cache.get_or_set(get_user_cache_key(namespace, user_id, *parts), default, timeout=timeout)
+
+
+def invalidate_user_cache(namespace: str, user_id: int) -> None:
+    """Invalidate all cached values of the given namespace for the given user."""
+    # Values cached under the old version simply expire.
+    cache.delete(_version_key(namespace, user_id))
@@ -39,9 +39,23 @@ def count_business_days(start: date, end: date) -> int:
     """
     if end < start:
         return 0
-    c = 0
-    for day_delta in range((end - start).days + 1):
-        d = start + timedelta(days=day_delta)
-        if d.isoweekday() < 6:
-            c += 1
-    return c
+    weeks, rest = divmod((end - start).days + 1, 7)
+    # Every full week has 5 business days; count the remaining days one by one:
+    return weeks * 5 + sum(1 for i in range(rest) if (start.weekday() + i) % 7 < 5)
+
+
+def previous_business_day(d: date) -> date:
+    """Return the last business day before the given date."""
+    d -= timedelta(days=1)
+    while d.isoweekday() > 5:
+        d -= timedelta(days=1)
+    return d
+
+
+def subtract_business_days(d: date, n: int) -> date:
+    """Return the business day that lies `n` business days before the given date."""
+    weeks, rest = divmod(n, 5)
+    d -= timedelta(weeks=weeks)
+    for _ in range(rest):
+        d = previous_business_day(d)
+    return d
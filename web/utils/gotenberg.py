@@ -1,16 +1,38 @@
+import asyncio
+import shutil
 import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from enum import Enum
+from functools import cache
 from io import BytesIO
-from pathlib import Path
+from typing import BinaryIO, Iterable, Optional
+from weakref import WeakKeyDictionary
 
+import httpx
 import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib import messages
-from django.http import FileResponse, HttpRequest
+from django.core.exceptions import ImproperlyConfigured
+from django.http import FileResponse, HttpRequest, HttpResponse
 from django.shortcuts import redirect
 from django.template.loader import get_template
 from django.urls import reverse
+from django.utils.http import content_disposition_header
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 
 from web.models import Nachweis
+from web.utils import pdf_cache
+
+# The maximum number of concurrent conversion requests of a batch export:
+MAX_WORKERS = 4
+
+# The response status codes of gotenberg requests that are retried:
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
 
 
 class CONVERSION(Enum):
@@ -22,6 +44,15 @@ class CONVERSION(Enum):
     URL = "url"
 
 
+PRINT_MARGINS = {"marginTop": 0, "marginRight": 0, "marginBottom": 0, "marginLeft": 0}
+
+
+def render_nachweis(request: HttpRequest, nachweis: Nachweis) -> str:
+    """Render the print view HTML of the given Nachweis."""
+    context = {"object": nachweis, "zfill_nummer": str(nachweis.nummer).zfill(3)}
+    return get_template("print.html").render(context, request)
+
+
 def nachweis_to_pdf(
     request: HttpRequest,
     nachweis: Nachweis,
@@ -31,28 +62,296 @@ def nachweis_to_pdf(
     """
     Generate FileResponse with a PDF of the given Nachweis object.
 
-    Redirect to `redirect_url` if PDF generation failed.
+    The PDF is served from the PDF cache, if it was already converted from the
+    same HTML. Redirect to `redirect_url` if PDF generation failed.
     """
-    kwargs = {"data": {"marginTop": 0, "marginRight": 0, "marginBottom": 0, "marginLeft": 0}, **kwargs}
+    kwargs = {"data": PRINT_MARGINS, **kwargs}
+    filename = f"{nachweis.nummer}.pdf"
+    html = render_nachweis(request, nachweis)
+    key = pdf_cache.get_key(html, kwargs["data"])
+    if path := pdf_cache.get(nachweis, key):
+        try:
+            return FileResponse(open(path, "rb"), as_attachment=True, filename=filename)
+        except FileNotFoundError:  # pragma: no cover
+            # Evicted by a concurrent request in the meantime.
+            pass
 
-    context = {"object": nachweis, "zfill_nummer": str(nachweis.nummer).zfill(3)}
-    html = get_template("print.html").render(context, request)
-    gotenberg_response = html_to_pdf(html, **kwargs)
+    try:
+        gotenberg_response = html_to_pdf(html, stream=True, **kwargs)
+    except requests.RequestException as e:
+        messages.error(request, f"PDF Erzeugung fehlgeschlagen: {e}")
+        return redirect(reverse(redirect_url))
 
     if not gotenberg_response.status_code == 200:
         messages.error(request, f"PDF Erzeugung fehlgeschlagen: {gotenberg_response.text}")
         return redirect(reverse(redirect_url))
     else:
-        return FileResponse(BytesIO(gotenberg_response.content), as_attachment=True, filename=f"{nachweis.nummer}.pdf")
+        # Stream the PDF from gotenberg to the client, storing it in the cache
+        # on the way:
+        reader = pdf_cache.CachingReader(gotenberg_response.raw, nachweis, key)
+        return FileResponse(reader, as_attachment=True, filename=filename)
+
+
+def nachweise_to_pdf(
+    request: HttpRequest,
+    nachweise: Iterable[Nachweis],
+    as_zip: bool = False,
+    redirect_url: str = "nachweis_list",
+    max_workers: int = MAX_WORKERS,
+    **kwargs,
+) -> FileResponse:
+    """
+    Generate a FileResponse with the PDFs of the given Nachweis objects, either
+    merged into a single PDF or as a ZIP file.
+
+    The PDFs are converted concurrently, by at most `max_workers` requests at
+    a time. Redirect to `redirect_url` if PDF generation failed.
+    """
+    kwargs = {"data": PRINT_MARGINS, **kwargs}
+    nachweise = list(nachweise)
+    # Render the templates up front: database access must happen in this
+    # thread, only the conversion requests are made by the workers.
+    documents = [render_nachweis(request, nachweis) for nachweis in nachweise]
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            responses = list(executor.map(lambda html: html_to_pdf(html, **kwargs), documents))
+    except requests.RequestException as e:
+        messages.error(request, f"PDF Erzeugung fehlgeschlagen: {e}")
+        return redirect(reverse(redirect_url))
+
+    failed = [r for r in responses if r.status_code != 200]
+    if failed:
+        messages.error(request, f"PDF Erzeugung fehlgeschlagen: {failed[0].text}")
+        return redirect(reverse(redirect_url))
+
+    if as_zip:
+        return FileResponse(_zip_pdfs(nachweise, responses), as_attachment=True, filename="Nachweise.zip")
+
+    try:
+        merge_response = merge_pdfs([r.content for r in responses], stream=True)
+    except requests.RequestException as e:
+        messages.error(request, f"PDF Erzeugung fehlgeschlagen: {e}")
+        return redirect(reverse(redirect_url))
+    if not merge_response.status_code == 200:
+        messages.error(request, f"PDF Erzeugung fehlgeschlagen: {merge_response.text}")
+        return redirect(reverse(redirect_url))
+    return FileResponse(_spool(merge_response.raw), as_attachment=True, filename="Nachweise.pdf")
+
+
+def _spool(stream: BinaryIO) -> BinaryIO:
+    """
+    Copy the given stream into a temporary file and return the file.
+
+    The merged PDF is written to disk rather than kept in memory, and the
+    connection to gotenberg is released before the PDF is sent to the client.
+    """
+    file = tempfile.TemporaryFile()
+    shutil.copyfileobj(stream, file)
+    file.seek(0)
+    return file
+
 
+def _zip_pdfs(nachweise: list[Nachweis], responses: list) -> BinaryIO:
+    """Return a temporary ZIP file of the PDFs of the given conversion responses."""
+    archive = tempfile.TemporaryFile()
+    with zipfile.ZipFile(archive, "w") as zf:
+        for nachweis, response in zip(nachweise, responses):
+            zf.writestr(f"{nachweis.nummer}.pdf", response.content)
+    archive.seek(0)
+    return archive
 
-def _gotenberg_request(
-    conversion: CONVERSION,
-    base_url: str = "http://gotenberg:3000/forms/chromium/convert/",
+
+def _pdf_response(content: bytes, filename: str) -> HttpResponse:
+    """Return a response with the given file as attachment."""
+    content_type = "application/zip" if filename.endswith(".zip") else "application/pdf"
+    headers = {"Content-Disposition": content_disposition_header(True, filename)}
+    return HttpResponse(content, content_type=content_type, headers=headers)
+
+
+async def anachweis_to_pdf(
+    request: HttpRequest,
+    nachweis: Nachweis,
+    redirect_url: str = "nachweis_list",
     **kwargs,
-) -> requests.Response:
+) -> HttpResponse:
+    """
+    The async version of nachweis_to_pdf.
+
+    The PDF is returned in one piece rather than streamed: it is small, and
+    a synchronous file iterator would have to be consumed in a thread anyway.
+    """
+    kwargs = {"data": PRINT_MARGINS, **kwargs}
+    filename = f"{nachweis.nummer}.pdf"
+    # Rendering may access the database:
+    html = await sync_to_async(render_nachweis)(request, nachweis)
+    key = pdf_cache.get_key(html, kwargs["data"])
+    # Access the PDF cache in a thread, so that the file system access does
+    # not block the event loop:
+    if content := await sync_to_async(_read_cached_pdf, thread_sensitive=False)(nachweis, key):
+        return _pdf_response(content, filename)
+
+    try:
+        gotenberg_response = await get_renderer().ahtml_to_pdf(html, **kwargs)
+    except requests.RequestException as e:
+        messages.error(request, f"PDF Erzeugung fehlgeschlagen: {e}")
+        return redirect(reverse(redirect_url))
+
+    if not gotenberg_response.status_code == 200:
+        messages.error(request, f"PDF Erzeugung fehlgeschlagen: {gotenberg_response.text}")
+        return redirect(reverse(redirect_url))
+    await sync_to_async(pdf_cache.put, thread_sensitive=False)(nachweis, key, gotenberg_response.content)
+    return _pdf_response(gotenberg_response.content, filename)
+
+
+def _read_cached_pdf(nachweis: Nachweis, key: str) -> Optional[bytes]:
+    """Return the cached PDF for the given Nachweis and key, if there is one."""
+    if path := pdf_cache.get(nachweis, key):
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:  # pragma: no cover
+            # Evicted by a concurrent request in the meantime.
+            pass
+    return None
+
+
+async def anachweise_to_pdf(
+    request: HttpRequest,
+    nachweise: Iterable[Nachweis],
+    as_zip: bool = False,
+    redirect_url: str = "nachweis_list",
+    max_workers: int = MAX_WORKERS,
+    **kwargs,
+) -> HttpResponse:
+    """
+    The async version of nachweise_to_pdf.
+
+    The PDFs are converted concurrently on the event loop, by at most
+    `max_workers` requests at a time.
+    """
+    kwargs = {"data": PRINT_MARGINS, **kwargs}
+
+    def render():
+        nachweise_list = list(nachweise)
+        return nachweise_list, [render_nachweis(request, nachweis) for nachweis in nachweise_list]
+
+    # Querying and rendering access the database:
+    nachweise, documents = await sync_to_async(render)()
+    renderer = get_renderer()
+    semaphore = asyncio.Semaphore(max_workers)
+
+    async def convert(html):
+        async with semaphore:
+            return await renderer.ahtml_to_pdf(html, **kwargs)
+
+    try:
+        responses = await asyncio.gather(*(convert(html) for html in documents))
+    except requests.RequestException as e:
+        messages.error(request, f"PDF Erzeugung fehlgeschlagen: {e}")
+        return redirect(reverse(redirect_url))
+
+    failed = [r for r in responses if r.status_code != 200]
+    if failed:
+        messages.error(request, f"PDF Erzeugung fehlgeschlagen: {failed[0].text}")
+        return redirect(reverse(redirect_url))
+
+    if as_zip:
+        archive = await sync_to_async(_zip_pdfs, thread_sensitive=False)(nachweise, responses)
+        with archive:
+            return _pdf_response(archive.read(), "Nachweise.zip")
+
+    try:
+        merge_response = await renderer.amerge_pdfs([r.content for r in responses])
+    except requests.RequestException as e:
+        messages.error(request, f"PDF Erzeugung fehlgeschlagen: {e}")
+        return redirect(reverse(redirect_url))
+    if not merge_response.status_code == 200:
+        messages.error(request, f"PDF Erzeugung fehlgeschlagen: {merge_response.text}")
+        return redirect(reverse(redirect_url))
+    return _pdf_response(merge_response.content, "Nachweise.pdf")
+
+
+@cache
+def get_session() -> requests.Session:
+    """
+    Return the session for the requests against gotenberg.
+
+    The session is shared by all threads, so that the connections to gotenberg
+    are pooled and kept alive. Requests that fail with one of the
+    RETRY_STATUS_CODES or with a connection error are retried with an
+    exponential backoff. Read timeouts are not retried.
+    """
+    retry = Retry(
+        total=settings.GOTENBERG_RETRIES,
+        backoff_factor=settings.GOTENBERG_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUS_CODES,
+        # The conversions are idempotent, so POST requests may be retried:
+        allowed_methods=None,
+        # Raise read timeouts right away: gotenberg did receive the request,
+        # and every retry would make the client wait for the full read
+        # timeout again:
+        read=False,
+        # Return the last response instead of raising an exception, so that
+        # the callers can report the error message of gotenberg:
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.GOTENBERG_POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _post(path: str, **kwargs) -> requests.Response:
+    """Make a POST request against the given path of the gotenberg URL."""
+    kwargs.setdefault("timeout", settings.GOTENBERG_TIMEOUT)
+    return get_session().post(url=f"{settings.GOTENBERG_URL.rstrip('/')}{path}", **kwargs)
+
+
+def _gotenberg_request(conversion: CONVERSION, **kwargs) -> requests.Response:
     """Make a request against the gotenberg URL with the given conversion method."""
-    return requests.post(url=f"{base_url}{conversion.value}", **kwargs)
+    return _post(f"/forms/chromium/convert/{conversion.value}", **kwargs)
+
+
+# The async clients for the requests against gotenberg, one per event loop:
+_async_clients: WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient] = WeakKeyDictionary()
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Return the async client for the requests against gotenberg.
+
+    The async views share one client per event loop, so that the connections
+    to gotenberg are pooled like those of the session (see get_session).
+    Unlike the session, the client only retries failed connection attempts.
+    """
+    loop = asyncio.get_running_loop()
+    if loop not in _async_clients:
+        connect_timeout, read_timeout = settings.GOTENBERG_TIMEOUT
+        _async_clients[loop] = httpx.AsyncClient(
+            base_url=settings.GOTENBERG_URL.rstrip("/"),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            transport=httpx.AsyncHTTPTransport(
+                retries=settings.GOTENBERG_RETRIES,
+                limits=httpx.Limits(
+                    max_connections=settings.GOTENBERG_POOL_SIZE,
+                    max_keepalive_connections=settings.GOTENBERG_POOL_SIZE,
+                ),
+            ),
+        )
+    return _async_clients[loop]
+
+
+async def _apost(path: str, **kwargs) -> httpx.Response:
+    """
+    Make an async POST request against the given path of the gotenberg URL.
+
+    Raise a requests.RequestException if the request fails, just like the
+    synchronous requests.
+    """
+    try:
+        return await get_async_client().post(path, **kwargs)
+    except httpx.HTTPError as e:
+        raise requests.ConnectionError(str(e)) from e
 
 
 def url_to_pdf(url: str, **kwargs) -> requests.Response:
@@ -71,15 +370,151 @@ def url_to_pdf(url: str, **kwargs) -> requests.Response:
     return _gotenberg_request(CONVERSION.URL, data=data, files=files)
 
 
-def html_to_pdf(html: str, **kwargs) -> requests.Response:
-    """Convert the given HTML into a PDF."""
-    # NOTE: gotenberg *requires* the file to be called 'index.html', so create
-    # the file directly in a temporary directory, rather than using a
-    # NamedTemporaryFile (which cannot have the *exact* name 'index.html').
-    with tempfile.TemporaryDirectory() as tmpdir:
-        with open(Path(tmpdir) / "index.html", "w+") as f:  # '+' -> read and write
-            f.write(html)
-            f.seek(0)
-            data = kwargs.get("data", {})
-            files = {"file": f, **kwargs.get("files", {})}
-            return _gotenberg_request(CONVERSION.HTML, data=data, files=files)
+class PdfRenderer:
+    """
+    The interface of the backends that convert HTML into PDFs.
+
+    The methods return response-like objects with the attributes status_code,
+    content, text (the error message) and raw (a file-like object with the
+    PDF). The backend is selected with the PDF_RENDERER setting.
+    """
+
+    def html_to_pdf(self, html: str, stream: bool = False, **kwargs) -> requests.Response:
+        """
+        Convert the given HTML into a PDF.
+
+        If `stream` is True, the backend may defer the download of the PDF
+        until it is read from the 'raw' attribute of the response.
+        """
+        raise NotImplementedError  # pragma: no cover
+
+    def merge_pdfs(self, pdfs: list[bytes], stream: bool = False, **kwargs) -> requests.Response:
+        """
+        Merge the given PDFs into one PDF, in the given order.
+
+        `stream` works like it does for html_to_pdf.
+        """
+        raise NotImplementedError  # pragma: no cover
+
+    async def ahtml_to_pdf(self, html: str, **kwargs) -> requests.Response:
+        """The async version of html_to_pdf. By default, convert in a thread."""
+        return await sync_to_async(self.html_to_pdf, thread_sensitive=False)(html, **kwargs)
+
+    async def amerge_pdfs(self, pdfs: list[bytes], **kwargs) -> requests.Response:
+        """The async version of merge_pdfs. By default, merge in a thread."""
+        return await sync_to_async(self.merge_pdfs, thread_sensitive=False)(pdfs, **kwargs)
+
+
+class GotenbergRenderer(PdfRenderer):
+    """Convert with Chromium in the gotenberg service."""
+
+    def html_to_pdf(self, html: str, stream: bool = False, **kwargs) -> requests.Response:
+        # NOTE: gotenberg *requires* the file to be called 'index.html':
+        data = kwargs.get("data", {})
+        files = {"file": ("index.html", html.encode(), "text/html"), **kwargs.get("files", {})}
+        response = _gotenberg_request(CONVERSION.HTML, data=data, files=files, stream=stream)
+        if stream:
+            # Let reads from 'raw' undo any content encoding:
+            response.raw.decode_content = True
+        return response
+
+    def merge_pdfs(self, pdfs: list[bytes], stream: bool = False, **kwargs) -> requests.Response:
+        # gotenberg merges the files in the alphanumerical order of their names:
+        width = len(str(len(pdfs)))
+        files = [("files", (f"{i:0{width}}.pdf", pdf, "application/pdf")) for i, pdf in enumerate(pdfs)]
+        response = _post("/forms/pdfengines/merge", files=files, stream=stream, **kwargs)
+        if stream:
+            response.raw.decode_content = True
+        return response
+
+    async def ahtml_to_pdf(self, html: str, **kwargs) -> httpx.Response:
+        data = kwargs.get("data", {})
+        files = {"file": ("index.html", html.encode(), "text/html"), **kwargs.get("files", {})}
+        return await _apost(f"/forms/chromium/convert/{CONVERSION.HTML.value}", data=data, files=files)
+
+    async def amerge_pdfs(self, pdfs: list[bytes], **kwargs) -> httpx.Response:
+        width = len(str(len(pdfs)))
+        files = [("files", (f"{i:0{width}}.pdf", pdf, "application/pdf")) for i, pdf in enumerate(pdfs)]
+        return await _apost("/forms/pdfengines/merge", files=files, **kwargs)
+
+
+@dataclass
+class LocalResponse:
+    """The response-like result of a conversion by the LocalRenderer."""
+
+    status_code: int
+    content: bytes = b""
+    text: str = ""
+
+    @property
+    def raw(self) -> BytesIO:
+        return BytesIO(self.content)
+
+
+class LocalRenderer(PdfRenderer):
+    """
+    Convert in-process with WeasyPrint, without a gotenberg service.
+
+    Requires the optional 'local-pdf' dependencies (weasyprint and pypdf).
+    WeasyPrint does not run JavaScript and supports less CSS than Chromium, so
+    the PDFs may look slightly different.
+    """
+
+    def __init__(self):
+        try:
+            import pypdf
+            import weasyprint
+        except ImportError as e:  # pragma: no cover
+            raise ImproperlyConfigured("LocalRenderer requires the 'local-pdf' dependencies.") from e
+        self.weasyprint = weasyprint
+        self.pypdf = pypdf
+
+    def get_page_css(self, data: dict) -> str:
+        """Return the @page CSS rule for the gotenberg margin form fields in `data`."""
+        margins = [data.get(f"margin{side}") for side in ("Top", "Right", "Bottom", "Left")]
+        if all(m is None for m in margins):
+            return ""
+        # Like gotenberg, interpret plain numbers as inches:
+        margins = " ".join(f"{m}in" if isinstance(m, (int, float)) else str(m or 0) for m in margins)
+        return f"@page {{ margin: {margins} }}"
+
+    def html_to_pdf(self, html: str, stream: bool = False, **kwargs) -> LocalResponse:
+        stylesheets = []
+        if css := self.get_page_css(kwargs.get("data", {})):
+            stylesheets.append(self.weasyprint.CSS(string=css))
+        try:
+            pdf = self.weasyprint.HTML(string=html).write_pdf(stylesheets=stylesheets)
+        except Exception as e:
+            return LocalResponse(status_code=500, text=str(e))
+        return LocalResponse(status_code=200, content=pdf)
+
+    def merge_pdfs(self, pdfs: list[bytes], stream: bool = False, **kwargs) -> LocalResponse:
+        writer = self.pypdf.PdfWriter()
+        try:
+            for pdf in pdfs:
+                writer.append(BytesIO(pdf))
+            out = BytesIO()
+            writer.write(out)
+        except Exception as e:
+            return LocalResponse(status_code=500, text=str(e))
+        return LocalResponse(status_code=200, content=out.getvalue())
+
+
+@cache
+def _load_renderer(path: str) -> PdfRenderer:
+    return import_string(path)()
+
+
+def get_renderer() -> PdfRenderer:
+    """Return the PDF renderer selected by the PDF_RENDERER setting."""
+    return _load_renderer(settings.PDF_RENDERER)
+
+
+def html_to_pdf(html: str, stream: bool = False, **kwargs) -> requests.Response:
+    """Convert the given HTML into a PDF with the selected PDF renderer."""
+    return get_renderer().html_to_pdf(html, stream=stream, **kwargs)
+
+
+def merge_pdfs(pdfs: list[bytes], stream: bool = False, **kwargs) -> requests.Response:
+    """Merge the given PDFs into one PDF, in the given order."""
+    return get_renderer().merge_pdfs(pdfs, stream=stream, **kwargs)
@@ -1,12 +1,39 @@
 import calendar
+import hashlib
+from collections.abc import Sequence
 from datetime import date, timedelta
-from typing import Optional
+from functools import cached_property
+from itertools import islice
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional
+from urllib.parse import urlencode
 
 from django.apps import apps
+from django.db import transaction
+from django.db.models import Count, Q, QuerySet
+from django.db.models.functions import Substr
+from django.http import QueryDict
 
 from web import models as _models
+from web.utils import cache as cache_utils
 from web.utils import date as date_utils
-from web.utils.date import count_week_numbers, get_week_friday, get_week_monday
+from web.utils.date import get_week_friday, get_week_monday
+
+# The cache namespace for the missing Nachweis objects of a user:
+MISSING_NACHWEISE_CACHE = "missing_nachweise"
+# The cache namespace for the number of soft-deleted items of a user:
+TRASH_COUNT_CACHE = "trash_count"
+# The cache namespace for the result counts of the Nachweis list of a user:
+NACHWEIS_COUNT_CACHE = "nachweis_count"
+# The cache namespace for the filter choices of the Nachweis list of a user:
+NACHWEIS_FACETS_CACHE = "nachweis_facets"
+# The filters of the status toggles of the Nachweis list:
+NACHWEIS_STATUS_FILTERS = {
+    "unfinished": Q(fertig=False),
+    "unsubmitted": Q(eingereicht_bei=""),
+    "unsigned": Q(unterschrieben=False),
+}
+# The number of characters of a text that the lists load (see annotate_excerpts):
+EXCERPT_LENGTH = 500
 
 
 def _get_soft_delete_models(app_label="web"):
@@ -29,6 +56,156 @@ def collect_deleted_objects(user):
     return objects
 
 
+def count_deleted_objects(user) -> int:
+    """
+    Count the soft-deleted items of all models for the current user with a
+    single query.
+    """
+    querysets = [
+        model.deleted_objects.filter(user=user).order_by().values("pk")
+        for model in _get_soft_delete_models(app_label="web")
+    ]
+    if not querysets:  # pragma: no cover
+        return 0
+    return querysets[0].union(*querysets[1:], all=True).count()
+
+
+def get_cached_deleted_objects_count(user) -> int:
+    """
+    Return the number of soft-deleted items of the given user from the cache.
+
+    The cached count is invalidated whenever an item is soft-deleted, restored
+    or hard-deleted (see web.signals).
+    """
+    return cache_utils.get_or_set_for_user(TRASH_COUNT_CACHE, user.pk, lambda: count_deleted_objects(user))
+
+
+def _get_search_key(params: QueryDict, exclude: Iterable[str] = ()) -> str:
+    """Return a cache key for the search with the given query parameters."""
+    search = sorted((k, v) for k, v in params.lists() if k not in exclude)
+    return hashlib.md5(urlencode(search, doseq=True).encode()).hexdigest()
+
+
+class NachweisFacets(NamedTuple):
+    """The distinct values of a user's Nachweise that the Nachweis list can be filtered by."""
+
+    jahre: list[int]
+    eingereicht_bei: list[str]
+    abteilungen: list[tuple[int, str]]
+
+
+def get_nachweis_facets(user) -> NachweisFacets:
+    """
+    Return the years, the recipients and the Abteilungen of the user's
+    Nachweise, queried together as their distinct combinations.
+    """
+    jahre, eingereicht_bei, abteilungen = set(), set(), {}
+    for jahr, name, abteilung_id, abteilung_name in (
+        _models.Nachweis.objects.filter(user=user)
+        .values_list("datum_start__year", "eingereicht_bei", "abteilung_id", "abteilung__name")
+        .order_by()
+        .distinct()
+    ):
+        jahre.add(jahr)
+        if name:
+            eingereicht_bei.add(name)
+        if abteilung_id is not None:
+            abteilungen[abteilung_id] = abteilung_name
+    return NachweisFacets(
+        jahre=sorted(jahre),
+        eingereicht_bei=sorted(eingereicht_bei),
+        abteilungen=sorted(abteilungen.items(), key=lambda item: item[1]),
+    )
+
+
+def get_cached_nachweis_facets(user) -> NachweisFacets:
+    """
+    Return the facets of the user's Nachweise from the cache.
+
+    The cached facets are invalidated whenever a Nachweis or an Abteilung of
+    the user changes (see web.signals).
+    """
+    return cache_utils.get_or_set_for_user(NACHWEIS_FACETS_CACHE, user.pk, lambda: get_nachweis_facets(user))
+
+
+class NachweisFacetCounts(NamedTuple):
+    """The number of results of the Nachweis list, in total and for every filter option."""
+
+    total: int
+    status: dict[str, int]
+    jahre: dict[int, int]
+    eingereicht_bei: dict[str, int]
+    abteilungen: dict[int, int]
+
+
+def count_nachweis_facets(queryset: QuerySet, facets: NachweisFacets) -> NachweisFacetCounts:
+    """
+    Count the Nachweise of the given queryset, in total and for every status
+    filter and every year, recipient and Abteilung of the given facets.
+
+    Every option is counted by its own conditional Count, so that all the
+    counts are computed in a single aggregate query.
+    """
+    options = {f"status_{name}": ("status", name, q) for name, q in NACHWEIS_STATUS_FILTERS.items()}
+    for i, jahr in enumerate(facets.jahre):
+        options[f"jahr_{i}"] = ("jahre", jahr, Q(jahr=jahr))
+    for i, name in enumerate(facets.eingereicht_bei):
+        options[f"eingereicht_bei_{i}"] = ("eingereicht_bei", name, Q(eingereicht_bei=name))
+    for i, (pk, _name) in enumerate(facets.abteilungen):
+        options[f"abteilung_{i}"] = ("abteilungen", pk, Q(abteilung_id=pk))
+    totals = queryset.order_by().aggregate(
+        total=Count("pk"), **{alias: Count("pk", filter=q) for alias, (_, _, q) in options.items()}
+    )
+    counts = {"status": {}, "jahre": {}, "eingereicht_bei": {}, "abteilungen": {}}
+    for alias, (field, value, _q) in options.items():
+        counts[field][value] = totals[alias]
+    return NachweisFacetCounts(total=totals["total"], **counts)
+
+
+def get_cached_nachweis_facet_counts(
+    user, queryset: QuerySet, params: QueryDict, exclude: Iterable[str] = ()
+) -> NachweisFacetCounts:
+    """
+    Return the counts of the given queryset of the user's Nachweis list,
+    cached per search (the query parameters, except those in `exclude`).
+
+    The cached counts are invalidated whenever a Nachweis of the user changes
+    (see web.signals).
+    """
+    key = _get_search_key(params, exclude)
+    return cache_utils.get_or_set_for_user(
+        NACHWEIS_COUNT_CACHE, user.pk, lambda: count_nachweis_facets(queryset, get_cached_nachweis_facets(user)), key
+    )
+
+
+def annotate_excerpts(queryset: QuerySet, *fields: str, length: int = EXCERPT_LENGTH) -> QuerySet:
+    """
+    Annotate the beginning of the given text fields as '<field>_excerpt', so
+    that lists can show the beginning of a text without loading all of it.
+
+    One character more than `length` is fetched, so that get_excerpt can tell
+    whether the text continues.
+    """
+    return queryset.annotate(**{f"{field}_excerpt": Substr(field, 1, length + 1) for field in fields})
+
+
+def get_excerpt(obj, field: str, length: int = EXCERPT_LENGTH) -> tuple[str, bool]:
+    """
+    Return the excerpt of the given field of an object from a queryset with
+    annotate_excerpts, and whether the text continues after the excerpt.
+
+    The excerpt of a text that continues ends with the last complete word.
+    """
+    excerpt = getattr(obj, f"{field}_excerpt")
+    if len(excerpt) <= length:
+        return excerpt, False
+    if excerpt[length].isspace():
+        return excerpt[:length], True
+    # Drop the last word, which was cut off:
+    words = excerpt[:length].rsplit(maxsplit=1)
+    return (words[0] if len(words) > 1 else ""), True
+
+
 def get_current_nachweis(user: _models.User) -> Optional[_models.Nachweis]:
     """
     Return the user's Nachweis object for the current interval.
@@ -55,78 +232,231 @@ def get_current_nachweis(user: _models.User) -> Optional[_models.Nachweis]:
     return user_nachweise.filter(datum_start=start, datum_ende=end).first()
 
 
+class _Schedule(NamedTuple):
+    """The regular grid of Nachweis period start dates for an interval."""
+
+    first: date  # the earliest regular period start
+    last: date  # the most recent regular period start
+    is_period_start: Callable[[date], bool]
+    # A filter for Nachweis objects that begin on a regular period start:
+    period_start_filter: Q
+    # Count the regular period starts between two (inclusive) period starts:
+    count: Callable[[date, date], int]
+    # Return the period start that lies n periods before the given one:
+    subtract: Callable[[date, int], date]
+    period_end: Callable[[date], date]
+    # Whether the very first period begins on the user's start date rather than
+    # on a regular period start (e.g. if the Ausbildung began mid-week):
+    check_start_date: bool
+
+
+def _month_end(d: date) -> date:
+    return date(d.year, d.month, calendar.monthrange(d.year, d.month)[1])
+
+
+def _subtract_months(d: date, n: int) -> date:
+    year, month = divmod(d.year * 12 + d.month - 1 - n, 12)
+    return date(year, month + 1, 1)
+
+
+def _get_schedule(profile: _models.UserProfile, today: date) -> Optional[_Schedule]:
+    """
+    Return the schedule of expected Nachweis periods for the given user
+    profile, or None if no schedule can be derived from it.
+    """
+    start = profile.start_date
+    if not start:
+        return None
+    match profile.interval:
+        case profile.IntervalType.DAILY:
+            # All business days since the start of the Ausbildung, excluding
+            # today:
+            first = start
+            while first.isoweekday() > 5:
+                first += timedelta(days=1)
+            return _Schedule(
+                first=first,
+                last=date_utils.previous_business_day(today),
+                is_period_start=lambda d: d.isoweekday() < 6,
+                # NOTE: the week_day lookup counts from Sunday (1) to Saturday (7)
+                period_start_filter=~Q(datum_start__week_day__in=[1, 7]),
+                count=date_utils.count_business_days,
+                subtract=date_utils.subtract_business_days,
+                period_end=lambda d: d,
+                check_start_date=False,
+            )
+        case profile.IntervalType.WEEKLY:
+            # The Mondays since the start of the Ausbildung. The first week may
+            # not have started on a Monday, and the current week is handled by
+            # get_current_nachweis.
+            return _Schedule(
+                first=get_week_monday(start + timedelta(weeks=1)),
+                last=get_week_monday(today - timedelta(weeks=1)),
+                is_period_start=lambda d: d.isoweekday() == 1,
+                period_start_filter=Q(datum_start__iso_week_day=1),
+                count=lambda lo, hi: max((hi - lo).days // 7 + 1, 0),
+                subtract=lambda d, n: d - timedelta(weeks=n),
+                period_end=get_week_friday,
+                check_start_date=True,
+            )
+        case profile.IntervalType.MONTHLY:
+            # The first days of a month since the start of the Ausbildung. The
+            # first month may not have started on the 1st.
+            return _Schedule(
+                first=_month_end(start) + timedelta(days=1),
+                last=(today - timedelta(days=1)).replace(day=1),
+                is_period_start=lambda d: d.day == 1,
+                period_start_filter=Q(datum_start__day=1),
+                count=lambda lo, hi: date_utils.count_months(lo, hi) + 1 if lo <= hi else 0,
+                subtract=_subtract_months,
+                period_end=_month_end,
+                check_start_date=True,
+            )
+        case _:
+            return None
+
+
+def iter_missing_nachweise(user: _models.User, offset: int = 0) -> Iterator[tuple[date, date]]:
+    """
+    Look for any gaps in the Nachweis chain and yield the dates of missing
+    Nachweis objects, with the most recent gap first.
+
+    The user's Nachweis dates are streamed from the database in descending
+    order and the missing periods between two consecutive Nachweis objects are
+    derived arithmetically, so the cost only depends on the number of
+    Nachweis objects and gaps - and not on the length of the Ausbildung.
+
+    If `offset` is given, skip that many missing periods. Whole gaps are
+    skipped arithmetically without generating their periods.
+    """
+    schedule = _get_schedule(user.profile, date.today())
+    if schedule is None:
+        return
+    start = user.profile.start_date
+    nachweis_dates = (
+        _models.Nachweis.objects.filter(user=user, datum_start__range=(start, max(start, schedule.last)))
+        .order_by("-datum_start")
+        .values_list("datum_start", flat=True)
+        .distinct()
+    )
+
+    def gap(newest: date, n: int) -> Iterator[tuple[date, date]]:
+        """Yield the periods of a gap of n periods, minus the offset."""
+        nonlocal offset
+        if offset >= n:
+            offset -= n
+            return
+        d = schedule.subtract(newest, offset)
+        for _ in range(n - offset):
+            yield d, schedule.period_end(d)
+            d = schedule.subtract(d, 1)
+        offset = 0
+
+    expected = schedule.last
+    has_start_nachweis = False
+    for d in nachweis_dates.iterator():
+        if d < schedule.first:
+            has_start_nachweis = has_start_nachweis or d == start
+            continue
+        if not schedule.is_period_start(d):
+            continue
+        # Every expected period between the previous Nachweis and this one is
+        # missing:
+        if d < expected:
+            yield from gap(expected, schedule.count(d, expected) - 1)
+        expected = schedule.subtract(d, 1)
+    # The periods before the oldest Nachweis are missing as well:
+    yield from gap(expected, schedule.count(schedule.first, expected))
+
+    if schedule.check_start_date and not has_start_nachweis and not offset:
+        yield start, schedule.period_end(start)
+
+
+def count_missing_nachweise(user: _models.User) -> int:
+    """Count the missing Nachweis objects of the given user with one query."""
+    schedule = _get_schedule(user.profile, date.today())
+    if schedule is None:
+        return 0
+    start = user.profile.start_date
+    counts = _models.Nachweis.objects.filter(user=user).aggregate(
+        present=Count(
+            "datum_start",
+            distinct=True,
+            filter=schedule.period_start_filter & Q(datum_start__range=(schedule.first, schedule.last)),
+        ),
+        start=Count("pk", filter=Q(datum_start=start)),
+    )
+    missing = schedule.count(schedule.first, schedule.last) - counts["present"]
+    if schedule.check_start_date and not counts["start"]:
+        missing += 1
+    return missing
+
+
+class MissingNachweise(Sequence):
+    """
+    A lazy sequence of the missing Nachweis periods of a user, with the most
+    recent gap first.
+
+    The length is counted with a single query and slicing only generates the
+    periods of the requested slice, so that paginating over the missing
+    Nachweise does not require computing all of them.
+    """
+
+    def __init__(self, user: _models.User):
+        self.user = user
+
+    @cached_property
+    def _count(self) -> int:
+        return cache_utils.get_or_set_for_user(
+            MISSING_NACHWEISE_CACHE,
+            self.user.pk,
+            lambda: count_missing_nachweise(self.user),
+            "count",
+            date.today().isoformat(),
+        )
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[tuple[date, date]]:
+        return iter_missing_nachweise(self.user)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if stop <= start:
+                return []
+            periods = islice(iter_missing_nachweise(self.user, offset=start), stop - start)
+            return list(periods)[::step]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("MissingNachweise index out of range")
+        return next(iter_missing_nachweise(self.user, offset=index))
+
+
 def get_missing_nachweise(user: _models.User) -> list[tuple[date, date]]:
     """
     Look for any gaps in the Nachweis chain and return the dates of missing
     Nachweis objects, with the most recent gap first.
     """
-    user_nachweise = _models.Nachweis.objects.filter(user=user)
-    start = user.profile.start_date  # TODO: handle no start date
-    today = date.today()
-    nachweis_dates = user_nachweise.values_list("datum_start", flat=True)
-    match user.profile.interval:
-        case user.profile.IntervalType.DAILY:
-            # To determine the gaps in a DAILY schedule, compare the set of
-            # Nachweis dates with a set of all business days since the start of
-            # the user's Ausbildung.
-
-            # Create a set of all business days since the start of the Ausbildung:
-            # https://www.geeksforgeeks.org/python/python-program-to-get-total-business-days-between-two-dates/
-            bdays = set()
-            for day_delta in range((today - start).days):
-                d = start + timedelta(days=day_delta)
-                if d.isoweekday() < 6:
-                    bdays.add(d)
-
-            # Subtract all Nachweis dates to get the gaps:
-            missing = bdays.difference(nachweis_dates)
-            return [(d, d) for d in sorted(missing, reverse=True)]
-        case user.profile.IntervalType.WEEKLY:
-            # To determine the gaps in a WEEKLY schedule, compare a set of
-            # Mondays since the start of the Ausbildung with the Mondays of
-            # Nachweis objects (datum_start).
-            mondays = set()
-
-            start_monday = get_week_monday(start + timedelta(weeks=1))
-            # Exclude the current week (handled by get_current_nachweis):
-            end_monday = get_week_monday(today - timedelta(weeks=1))
+    return list(iter_missing_nachweise(user))
 
-            for week_delta in range(count_week_numbers(start_monday, end_monday)):
-                mondays.add(start_monday + timedelta(weeks=week_delta))
-            missing = mondays.difference(nachweis_dates)
 
-            # Check if there is a Nachweis for the very first week
-            # (which may not have started on a Monday):
-            if not nachweis_dates.filter(datum_start=start).exists():
-                missing.add(start)
+def get_cached_missing_nachweise(user: _models.User) -> list[tuple[date, date]]:
+    """
+    Return the result of get_missing_nachweise for the given user from the
+    cache.
 
-            return [(d, get_week_friday(d)) for d in sorted(missing, reverse=True)]
-        case user.profile.IntervalType.MONTHLY:
-            # To determine the gaps in a MONTHLY schedule, compare a set of
-            # first days of a month since the start of the Ausbildung with the
-            # first days of Nachweis objects.
-            firsts = set()
-            month = timedelta(days=31)
-
-            # Start on the month after the first; Nachweis for the first month
-            # must be handled differently since it is not guaranteed that the
-            # Ausbildung began on the 1st exactly.
-            d = (start + month).replace(day=1)
-            while d < today:
-                firsts.add(d)
-                d = (d + month).replace(day=1)
-            missing = firsts.difference(nachweis_dates)
-
-            # Check if there is a Nachweis for the very first month:
-            if not nachweis_dates.filter(datum_start=start).exists():
-                missing.add(start)
-
-            return [
-                (d, date(d.year, d.month, calendar.monthrange(d.year, d.month)[1]))
-                for d in sorted(missing, reverse=True)
-            ]
-        case _:
-            return []
+    The cached result is only valid for the current day and is invalidated
+    whenever a Nachweis or the profile of the user changes (see web.signals).
+    """
+    return cache_utils.get_or_set_for_user(
+        MISSING_NACHWEISE_CACHE,
+        user.pk,
+        lambda: get_missing_nachweise(user),
+        date.today().isoformat(),
+    )
 
 
 def initial_data_for_date(user: _models.User, d: date) -> dict:
@@ -152,13 +482,45 @@ def initial_data_for_date(user: _models.User, d: date) -> dict:
     }
     user_start_date = user.profile.start_date
     if user_start_date:
-        # Derive additional initial data from the user's start date:
-        initial["ausbildungswoche"] = date_utils.count_week_numbers(user_start_date, start)
+        # Derive additional initial data from the user's start date. The first
+        # period may begin before the start date (e.g. on the Monday before):
+        # count it as the first period rather than as period 0.
+        counted = max(start, user_start_date)
+        initial["ausbildungswoche"] = date_utils.count_week_numbers(user_start_date, counted)
         match user.profile.interval:
             case _models.UserProfile.IntervalType.DAILY:
-                initial["nummer"] = date_utils.count_business_days(user_start_date, start)
+                initial["nummer"] = date_utils.count_business_days(user_start_date, counted)
             case _models.UserProfile.IntervalType.WEEKLY:
                 initial["nummer"] = initial["ausbildungswoche"]
             case _models.UserProfile.IntervalType.MONTHLY:
-                initial["nummer"] = date_utils.count_months(user_start_date, start) + 1
+                initial["nummer"] = date_utils.count_months(user_start_date, counted) + 1
     return initial
+
+
+def create_missing_nachweise(user: _models.User, starts: Optional[Iterable[date]] = None) -> list[_models.Nachweis]:
+    """
+    Create empty draft Nachweise for the user's missing periods in one go.
+
+    If `starts` is given, only fill the missing periods that begin on one of
+    these dates; other dates are ignored.
+    """
+    missing = iter_missing_nachweise(user)
+    if starts is not None:
+        starts = set(starts)
+        missing = (period for period in missing if period[0] in starts)
+    # initial_data_for_date only does date arithmetic, so deriving the numbers
+    # of all the new Nachweise does not cost any queries.
+    nachweise = []
+    for start, end in missing:
+        data = initial_data_for_date(user, start)
+        # Use the dates of the missing period itself; the first period begins
+        # on the start date, which may not be the regular period start.
+        data.update(datum_start=start, datum_ende=end)
+        nachweise.append(_models.Nachweis(user=user, betrieb="", schule="", **data))
+    with transaction.atomic():
+        created = _models.Nachweis.objects.bulk_create(nachweise)
+    # bulk_create does not send the post_save signal:
+    cache_utils.invalidate_user_cache(MISSING_NACHWEISE_CACHE, user.pk)
+    cache_utils.invalidate_user_cache(NACHWEIS_COUNT_CACHE, user.pk)
+    cache_utils.invalidate_user_cache(NACHWEIS_FACETS_CACHE, user.pk)
+    return created
@@ -0,0 +1,158 @@
+"""
+Keyset (cursor) pagination.
+
+Django's Paginator counts all results and fetches a page with LIMIT/OFFSET,
+which makes the database skip over all the rows of the previous pages. The
+KeysetPaginator instead continues after the ordering values of the last row of
+the current page (or before those of the first row), so that every page costs
+the same. The position is passed between requests as an opaque cursor.
+"""
+
+import base64
+import binascii
+import json
+from collections.abc import Callable, Sequence
+from functools import cached_property
+from typing import Any
+
+from django.core.paginator import InvalidPage
+from django.db.models import Model, Q, QuerySet
+
+NEXT = "n"
+PREVIOUS = "p"
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+class KeysetPage(Sequence):
+    """A page of the results of a KeysetPaginator."""
+
+    def __init__(
+        self,
+        object_list: list[Model],
+        paginator: "KeysetPaginator",
+        has_next: bool,
+        has_previous: bool,
+    ):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f"<KeysetPage of {len(self)} objects>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self) -> bool:
+        return self._has_next
+
+    def has_previous(self) -> bool:
+        return self._has_previous
+
+    def has_other_pages(self) -> bool:
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self) -> str | None:
+        """The cursor of the page after this one."""
+        if not self._has_next:
+            return None
+        return self.paginator.encode_cursor(NEXT, self.object_list[-1])
+
+    @property
+    def previous_cursor(self) -> str | None:
+        """The cursor of the page before this one."""
+        if not self._has_previous:
+            return None
+        return self.paginator.encode_cursor(PREVIOUS, self.object_list[0])
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset by the values of the given ordering.
+
+    The ordering must be unique (end with the primary key) and its fields must
+    not be null. The total number of results is only counted when `count` is
+    accessed; pass a callable as `count` to provide it otherwise (e.g. from
+    the cache).
+    """
+
+    def __init__(
+        self,
+        queryset: QuerySet,
+        per_page: int,
+        ordering: Sequence[str],
+        count: Callable[[], int] | None = None,
+    ):
+        self.ordering = list(ordering)
+        self.queryset = queryset.order_by(*self.ordering)
+        self.per_page = int(per_page)
+        self._count = count or self.queryset.count
+
+    @cached_property
+    def count(self) -> int:
+        """The total number of results."""
+        return self._count()
+
+    def get_values(self, obj: Model) -> list[Any]:
+        """Return the values of the ordering fields of the given object."""
+        return [getattr(obj, field.lstrip("-")) for field in self.ordering]
+
+    def encode_cursor(self, direction: str, obj: Model) -> str:
+        """Return the cursor for the page in the given direction from obj."""
+        data = json.dumps([direction, [str(value) for value in self.get_values(obj)]])
+        return base64.urlsafe_b64encode(data.encode()).decode()
+
+    def decode_cursor(self, cursor: str) -> tuple[str, list[str]]:
+        """Return the direction and the ordering values of the given cursor."""
+        try:
+            direction, values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (binascii.Error, UnicodeError, ValueError, TypeError):
+            raise InvalidCursor("Ungültiger Cursor")
+        if direction not in (NEXT, PREVIOUS) or not isinstance(values, list) or len(values) != len(self.ordering):
+            raise InvalidCursor("Ungültiger Cursor")
+        return direction, values
+
+    def get_filter(self, values: list[Any], direction: str) -> Q:
+        """
+        Return the filter for the rows after (NEXT) or before (PREVIOUS) the
+        row with the given ordering values.
+        """
+        q = Q()
+        equal = {}
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip("-")
+            descending = field.startswith("-")
+            lookup = "lt" if descending == (direction == NEXT) else "gt"
+            q |= Q(**equal, **{f"{name}__{lookup}": value})
+            equal[name] = value
+        return q
+
+    def page(self, cursor: str | None = None) -> KeysetPage:
+        """Return the page for the given cursor, or the first page."""
+        if not cursor:
+            direction, queryset = NEXT, self.queryset
+        else:
+            direction, values = self.decode_cursor(cursor)
+            try:
+                queryset = self.queryset.filter(self.get_filter(values, direction))
+            except (ValueError, TypeError):
+                raise InvalidCursor("Ungültiger Cursor")
+        if direction == PREVIOUS:
+            # Fetch the rows before the cursor backwards:
+            queryset = queryset.reverse()
+        # Fetch one more row to find out if there are more:
+        object_list = list(queryset[: self.per_page + 1])
+        has_more = len(object_list) > self.per_page
+        del object_list[self.per_page :]
+        if direction == PREVIOUS:
+            object_list.reverse()
+            return KeysetPage(object_list, self, has_next=True, has_previous=has_more)
+        return KeysetPage(object_list, self, has_next=has_more, has_previous=bool(cursor))
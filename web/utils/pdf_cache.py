@@ -0,0 +1,145 @@
+"""
+A disk cache for the PDFs of Nachweis objects.
+
+The PDFs are stored under PDF_CACHE_DIR as <user id>/<nachweis id>-<key>.pdf,
+where the key is a hash of the rendered HTML, the version of the print
+template and the conversion options. A PDF is therefore only served from the
+cache if it would be converted from the exact same input.
+
+The cache is bounded to PDF_CACHE_MAX_SIZE bytes; when it grows larger, the
+least recently used PDFs are removed. Stale PDFs of changed Nachweise are
+removed right away (see web.signals).
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from functools import cache
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+from django.conf import settings
+from django.template.loader import get_template
+
+from web.models import Nachweis
+
+PRINT_TEMPLATE = "print.html"
+
+
+def _get_cache_dir() -> Path:
+    return Path(settings.PDF_CACHE_DIR)
+
+
+@cache
+def get_template_version(template_name: str = PRINT_TEMPLATE) -> str:
+    """Return a hash of the source of the given template."""
+    source = get_template(template_name).template.source
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+def get_key(html: str, options: Optional[dict] = None) -> str:
+    """Return the cache key for a PDF converted from the given HTML."""
+    h = hashlib.sha256()
+    h.update(get_template_version().encode())
+    h.update(json.dumps(options or {}, sort_keys=True).encode())
+    h.update(html.encode())
+    return h.hexdigest()
+
+
+def get_path(nachweis: Nachweis, key: str) -> Path:
+    """Return the path of the cached PDF of the given Nachweis."""
+    return _get_cache_dir() / str(nachweis.user_id) / f"{nachweis.pk}-{key}.pdf"
+
+
+def get(nachweis: Nachweis, key: str) -> Optional[Path]:
+    """Return the path to the cached PDF, or None if it is not cached."""
+    path = get_path(nachweis, key)
+    try:
+        # Mark the file as recently used:
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return path
+
+
+def put(nachweis: Nachweis, key: str, content: bytes) -> Path:
+    """Store the PDF of the given Nachweis and return its path."""
+    path = get_path(nachweis, key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write to a temporary file first, so that concurrent requests never see
+    # a partially written PDF:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(content)
+    os.replace(tmp, path)
+    evict()
+    return path
+
+
+class CachingReader:
+    """
+    A file-like wrapper around a stream that stores everything read from it as
+    the PDF of the given Nachweis.
+
+    The PDF is only stored once the stream was read to the end; closing the
+    reader before that discards it.
+    """
+
+    def __init__(self, stream: BinaryIO, nachweis: Nachweis, key: str) -> None:
+        self.stream = stream
+        self.path = get_path(nachweis, key)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, self._tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        self._file: Optional[BinaryIO] = os.fdopen(fd, "wb")
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self.stream.read(size)
+        if self._file is not None:
+            if chunk:
+                self._file.write(chunk)
+            else:
+                # End of the stream: the PDF is complete.
+                self._file.close()
+                self._file = None
+                os.replace(self._tmp, self.path)
+                evict()
+        return chunk
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            Path(self._tmp).unlink(missing_ok=True)
+        self.stream.close()
+
+
+def evict(max_size: Optional[int] = None) -> None:
+    """Remove the least recently used PDFs until the cache fits max_size."""
+    if max_size is None:
+        max_size = settings.PDF_CACHE_MAX_SIZE
+    files = []
+    for path in _get_cache_dir().glob("*/*.pdf"):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:  # pragma: no cover
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files, key=lambda f: f[0]):
+        if total <= max_size:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+
+
+def invalidate_nachweis(nachweis: Nachweis) -> None:
+    """Remove the cached PDFs of the given Nachweis."""
+    for path in (_get_cache_dir() / str(nachweis.user_id)).glob(f"{nachweis.pk}-*.pdf"):
+        path.unlink(missing_ok=True)
+
+
+def invalidate_user(user_id: int) -> None:
+    """Remove the cached PDFs of all the Nachweise of the given user."""
+    shutil.rmtree(_get_cache_dir() / str(user_id), ignore_errors=True)
@@ -0,0 +1,122 @@
+"""
+Background conversion of Nachweis PDFs.
+
+Converting a Nachweis takes gotenberg a few seconds. Instead of waiting for
+that in the request, a view can enqueue a PdfJob and let the client poll the
+status of the job until the PDF is ready. The jobs are processed by the
+pdf_worker management command; the finished PDFs are stored in the PDF cache
+(see web.utils.pdf_cache).
+"""
+
+import time
+from datetime import timedelta
+from typing import Optional
+
+import requests
+from django.http import HttpRequest
+from django.utils import timezone
+
+from web.models import Nachweis, PdfJob
+from web.utils import pdf_cache
+from web.utils.gotenberg import PRINT_MARGINS, html_to_pdf, render_nachweis
+
+# Remove finished jobs after this long:
+MAX_AGE = timedelta(days=1)
+
+# Fail unfinished jobs that have not been updated for this long: a running job
+# whose worker crashed, or a pending job that no worker picked up. A conversion
+# takes at most a few minutes, including the retries of the requests.
+STALE_AGE = timedelta(minutes=10)
+
+UNFINISHED = [PdfJob.Status.PENDING, PdfJob.Status.RUNNING]
+
+
+def enqueue(request: HttpRequest, nachweis: Nachweis) -> PdfJob:
+    """
+    Return a job for the conversion of the given Nachweis.
+
+    The print view is rendered right away, since rendering requires the
+    request. If the PDF is already cached, the job is done right away. If a
+    job for the same PDF is still pending and not stale, return that job
+    instead.
+    """
+    html = render_nachweis(request, nachweis)
+    key = pdf_cache.get_key(html, PRINT_MARGINS)
+    if pdf_cache.get(nachweis, key):
+        return PdfJob.objects.create(nachweis=nachweis, user_id=nachweis.user_id, key=key, status=PdfJob.Status.DONE)
+    unfinished = PdfJob.objects.filter(
+        nachweis=nachweis, key=key, status__in=UNFINISHED, updated__gte=timezone.now() - STALE_AGE
+    )
+    if job := unfinished.first():
+        return job
+    return PdfJob.objects.create(nachweis=nachweis, user_id=nachweis.user_id, key=key, html=html)
+
+
+def claim_next() -> Optional[PdfJob]:
+    """Mark the oldest pending job as running and return it."""
+    for pk in PdfJob.objects.filter(status=PdfJob.Status.PENDING).values_list("pk", flat=True)[:10]:
+        # Only claim the job if no other worker claimed it in the meantime:
+        claimed = PdfJob.objects.filter(pk=pk, status=PdfJob.Status.PENDING).update(
+            status=PdfJob.Status.RUNNING, updated=timezone.now()
+        )
+        if claimed:
+            return PdfJob.objects.select_related("nachweis").get(pk=pk)
+    return None
+
+
+def run(job: PdfJob) -> PdfJob:
+    """Convert the HTML of the given job and store the PDF in the PDF cache."""
+    try:
+        response = html_to_pdf(job.html, data=PRINT_MARGINS)
+    except requests.RequestException as e:
+        job.status, job.error = PdfJob.Status.FAILED, str(e)
+    else:
+        if response.status_code == 200:
+            pdf_cache.put(job.nachweis, job.key, response.content)
+            job.status = PdfJob.Status.DONE
+        else:
+            job.status, job.error = PdfJob.Status.FAILED, response.text
+    # The HTML is no longer needed:
+    job.html = ""
+    job.save(update_fields=["status", "error", "html", "updated"])
+    return job
+
+
+def run_next() -> Optional[PdfJob]:
+    """Run the oldest pending job, if there is one, and return it."""
+    if job := claim_next():
+        return run(job)
+    return None
+
+
+def fail_stale(stale_age: timedelta = STALE_AGE) -> int:
+    """Mark the unfinished jobs that are older than stale_age as failed."""
+    return PdfJob.objects.filter(status__in=UNFINISHED, updated__lt=timezone.now() - stale_age).update(
+        status=PdfJob.Status.FAILED, error="Zeitüberschreitung", html="", updated=timezone.now()
+    )
+
+
+def cleanup(max_age: timedelta = MAX_AGE, stale_age: timedelta = STALE_AGE) -> None:
+    """
+    Delete the finished jobs that are older than max_age and fail the stale
+    unfinished jobs (see fail_stale).
+    """
+    PdfJob.objects.filter(
+        status__in=[PdfJob.Status.DONE, PdfJob.Status.FAILED],
+        updated__lt=timezone.now() - max_age,
+    ).delete()
+    fail_stale(stale_age)
+
+
+def work(interval: float = 1.0, once: bool = False) -> None:
+    """
+    Run the pending jobs until interrupted, checking for new jobs every
+    `interval` seconds. With `once`, return when no job is pending.
+    """
+    while True:
+        cleanup()
+        while run_next():
+            pass
+        if once:
+            return
+        time.sleep(interval)
@@ -26,6 +26,10 @@ def has_view_permission(user: AbstractUser, opts: Options) -> bool:
     return user.has_perm(get_perm("view", opts))
 
 
+async def ahas_view_permission(user: AbstractUser, opts: Options) -> bool:
+    return await user.ahas_perm(get_perm("view", opts))
+
+
 def add_azubi_permissions(user):
     """Give the user default 'Azubi' permissions to use the app."""
     user.groups.add(Group.objects.get(name=settings.AZUBI_GROUP_NAME))
@@ -0,0 +1,90 @@
+import re
+from typing import Iterable
+
+from django.db import connections, router
+from django.db.models import Model, Q, QuerySet
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.expressions import RawSQL
+
+# Approximates the 'unicode61' tokenizer: runs of letters and digits.
+_token_pattern = re.compile(r"\w+")
+
+
+class LookupSearchBackend:
+    """
+    Text search backend that applies a field lookup (e.g. 'icontains') to each
+    of the search fields and combines the filters with logical OR.
+    """
+
+    def get_filters(self, fields: Iterable[str], term: str, lookup: str = "icontains") -> Q:
+        """Return a filter for the search term."""
+        q = Q()
+        for field in fields:
+            q |= Q(**{"".join([field, LOOKUP_SEP, lookup]): term})
+        return q
+
+    def order_by_relevance(self, queryset: QuerySet, fields: Iterable[str], term: str) -> QuerySet:
+        """Order the search results by relevance; lookups do not rank results."""
+        return queryset
+
+
+class FTS5SearchBackend(LookupSearchBackend):
+    """
+    Text search backend that queries an SQLite FTS5 index of the model.
+
+    Every word of the search term must match the start of a word in one of the
+    search fields ('Daten' finds 'Datenbanken'). Results are ranked with bm25.
+
+    Falls back to the field lookups if the index is not available, i.e. if the
+    database is not SQLite or SQLite was compiled without FTS5, or if the
+    search term does not contain any words.
+
+    The index table is created by a migration, see
+    web/migrations/0008_nachweis_fts.py.
+    """
+
+    def __init__(self, model: type[Model], table: str):
+        self.model = model
+        self.table = table
+        self._available: dict[str, bool] = {}
+
+    def is_available(self, using: str = "") -> bool:
+        """Return whether the index table exists on the given database."""
+        using = using or router.db_for_read(self.model)
+        if using not in self._available:
+            connection = connections[using]
+            with connection.cursor() as cursor:
+                self._available[using] = connection.vendor == "sqlite" and (
+                    self.table in connection.introspection.table_names(cursor)
+                )
+        return self._available[using]
+
+    def get_match_expression(self, fields: Iterable[str], term: str) -> str:
+        """
+        Return the FTS5 MATCH expression for the search term: every word as a
+        quoted prefix query, restricted to the given columns.
+        """
+        words = " ".join(f'"{word}"*' for word in _token_pattern.findall(term))
+        if not words:
+            return ""
+        return f"{{{' '.join(fields)}}} : ({words})"
+
+    def get_filters(self, fields: Iterable[str], term: str, lookup: str = "icontains") -> Q:
+        fields = list(fields)
+        match = self.get_match_expression(fields, term)
+        if not match or not self.is_available():
+            return super().get_filters(fields, term, lookup)
+        return Q(pk__in=RawSQL(f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s", [match]))
+
+    def order_by_relevance(self, queryset: QuerySet, fields: Iterable[str], term: str) -> QuerySet:
+        match = self.get_match_expression(fields, term)
+        if not match or not self.is_available(queryset.db):
+            return queryset
+        opts = self.model._meta
+        rank = RawSQL(
+            f"SELECT bm25({self.table}) FROM {self.table} WHERE {self.table} MATCH %s "
+            f'AND {self.table}.rowid = "{opts.db_table}"."{opts.pk.column}"',
+            [match],
+        )
+        ordering = queryset.query.order_by or opts.ordering
+        return queryset.order_by(rank.asc(), *ordering)
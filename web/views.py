@@ -1,19 +1,33 @@
 from collections import OrderedDict
 from datetime import date
+from functools import cached_property
+from operator import attrgetter
+from typing import Any, Callable
 
+from asgiref.sync import sync_to_async
 from django import forms
 from django.apps import apps
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import get_user_model, login
 from django.contrib.auth import views as auth_views
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.core.exceptions import PermissionDenied
+from django.core.paginator import InvalidPage
 from django.db import models
-from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
-from django.shortcuts import get_object_or_404, redirect, render
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseForbidden,
+    JsonResponse,
+)
+from django.shortcuts import aget_object_or_404, get_object_or_404, redirect, render
 from django.template.defaultfilters import linebreaksbr, truncatewords
 from django.urls import reverse, reverse_lazy
+from django.utils import dateformat
 from django.utils.formats import date_format
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
@@ -29,15 +43,34 @@ from mizdb_tomselect.widgets import MIZSelect
 from web import actions
 from web import forms as _forms
 from web import models as _models
-from web.utils import perms
+from web.utils import pdf_cache, pdf_jobs, perms
 from web.utils.date import count_week_numbers
 from web.utils.decorators import add_attrs
-from web.utils.gotenberg import nachweis_to_pdf
-from web.utils.models import collect_deleted_objects, get_current_nachweis, get_missing_nachweise
+from web.utils.gotenberg import anachweis_to_pdf, anachweise_to_pdf, nachweis_to_pdf, nachweise_to_pdf
+from web.utils.models import (
+    NACHWEIS_STATUS_FILTERS,
+    MissingNachweise,
+    annotate_excerpts,
+    collect_deleted_objects,
+    create_missing_nachweise,
+    get_cached_missing_nachweise,
+    get_cached_nachweis_facet_counts,
+    get_cached_nachweis_facets,
+    get_current_nachweis,
+    get_excerpt,
+)
+from web.utils.pagination import KeysetPaginator
 
 # Decorator for list_display callables
 list_display_callable = add_attrs
 
+# The markup for the values of boolean fields in the result lists:
+BOOLEAN_TRUE_ICON = mark_safe('<i class="bi bi-check-circle fs-4 text-success"></i>')
+BOOLEAN_FALSE_ICON = mark_safe('<i class="bi bi-x-circle fs-4 text-danger"></i>')
+
+# The date format of the start and end dates in the 'zeitraum' column:
+ZEITRAUM_FORMAT = "d. F Y"
+
 
 class AutocompleteView(BaseAutocompleteView):
     def has_add_permission(self, request):
@@ -59,17 +92,10 @@ class BaseViewMixin:
     submit_button_text = "Weiter"
     mainclass: str = ""  # the CSS class for the main element
 
-    def get_trash_count(self):
-        """Return the number of items in the trash can for the current user."""
-        if not self.request.user.is_authenticated:
-            return 0
-        return sum(qs.count() for qs in collect_deleted_objects(self.request.user))
-
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["title"] = self.title
         context["submit_button_text"] = self.submit_button_text
-        context["trash_count"] = self.get_trash_count()
         context["mainclass"] = self.mainclass
         return context
 
@@ -184,7 +210,7 @@ class BaseListView(BaseViewMixin, ListView):
         return []
 
     def get_actions(self, request):
-        return [*self._get_default_actions(request), *self.actions]
+        return [action.bind(request) for action in (*self._get_default_actions(request), *self.actions)]
 
     def get_column_classes(self):
         """
@@ -204,22 +230,60 @@ class BaseListView(BaseViewMixin, ListView):
         """
         return {}
 
+    def get_column_css(self) -> list[str]:
+        """
+        Return the CSS classes of the table cells for each column of
+        `list_display`: the column name prefixed with 'td-', plus the classes
+        from get_column_classes.
+        """
+        classes = self.get_column_classes()
+        return [f"td-{name} {classes[name]}" if classes.get(name) else f"td-{name}" for name in self.list_display]
+
+    def get_result_table(self, rows: list[OrderedDict]) -> list[tuple[OrderedDict, list[tuple[str, Any]]]]:
+        """
+        Pair each row with the (CSS classes, value) items of its table cells,
+        so that the template does not have to look up the classes per cell.
+        """
+        column_css = self.get_column_css()
+        # The values of the list_display items come first in every row:
+        return [(row, list(zip(column_css, row.values()))) for row in rows]
+
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         ctx["list_display"] = self.list_display
         ctx["result_rows"] = self.get_result_rows(ctx["object_list"])
+        ctx["result_table"] = self.get_result_table(ctx["result_rows"])
         ctx["headers"] = self.get_result_headers()
         ctx["actions"] = self.get_actions(self.request)
         paginator = ctx["paginator"]
-        ctx["page_range"] = list(paginator.get_elided_page_range(ctx["page_obj"].number))
-        ctx["col_classes"] = self.get_column_classes()
+        if isinstance(paginator, KeysetPaginator):
+            ctx["keyset_pagination"] = True
+        else:
+            ctx["page_range"] = list(paginator.get_elided_page_range(ctx["page_obj"].number))
         return ctx
 
 
 class ChangelistView(PermissionRequiredMixin, FilterUserMixin, ModelViewMixin, BaseListView):
+    """
+    List the objects of the current user.
+
+    The foreign keys in `list_display` are fetched along with the results;
+    declare any further relations that the list needs in
+    `list_select_related`. Fields that the list does not need can be excluded
+    from the query via `list_defer`.
+
+    With `keyset_ordering`, the list is paginated with cursors over that
+    ordering instead of page numbers (see web.utils.pagination) - unless the
+    results are ordered otherwise, e.g. by search relevance.
+    """
+
     template_name = "changelist.html"
     paginate_by = 10
     search_form_class = None
+    list_select_related = ()
+    list_defer = ()
+    keyset_ordering = None
+    cursor_kwarg = "cursor"
 
     def get_permission_required(self):
         if self.permission_required is None:
@@ -250,33 +314,56 @@ class ChangelistView(PermissionRequiredMixin, FilterUserMixin, ModelViewMixin, B
             row["obj"] = obj
         return rows
 
+    @cached_property
+    def column_accessors(self) -> list[Callable[[models.Model], Any]]:
+        """
+        The functions that return the values to display for the columns of
+        `list_display`, compiled once per request (a view instance handles
+        only one request).
+        """
+        return [self.get_column_accessor(name) for name in self.list_display]
+
+    def get_column_accessor(self, name: str) -> Callable[[models.Model], Any]:
+        """
+        Return a function that returns the value to display in the column of
+        the given list_display item for a result.
+        """
+        if hasattr(self, name) and callable(getattr(self, name)):
+            # A callable list_display item; call it with the result
+            return getattr(self, name)
+        # Should be a model field then:
+        field = self.opts.get_field(name)
+        if isinstance(field, models.ForeignKey):
+
+            def get_value(result):
+                value = getattr(result, field.name)
+                return str(value) if value is not None else None
+
+        else:
+            get_value = attrgetter(field.attname)
+        if getattr(field, "flatchoices", None):  # pragma: no cover
+            # The field has predefined choices; use the human-readable part of
+            # the choice:
+            choices = dict(field.flatchoices)
+            get_choice = get_value
+
+            def get_value(result):
+                return choices.get(get_choice(result), "")
+
+        if isinstance(field, models.BooleanField):
+            get_bool = get_value
+
+            def get_value(result):
+                value = get_bool(result)
+                if isinstance(value, bool):
+                    return BOOLEAN_TRUE_ICON if value else BOOLEAN_FALSE_ICON
+                return value
+
+        return get_value
+
     def get_result_row(self, result):
         """Return the values to display in the row for the given result."""
-        row = []
-        for name in self.list_display:
-            if hasattr(self, name) and callable(getattr(self, name)):
-                # A callable list_display item; call it with the result
-                value = getattr(self, name)(result)
-            else:
-                # Should be a model field then:
-                field = self.opts.get_field(name)
-                if isinstance(field, models.ForeignKey):
-                    value = getattr(result, field.name)
-                    if value is not None:
-                        value = str(value)
-                else:
-                    value = getattr(result, field.attname)
-                if getattr(field, "flatchoices", None):  # pragma: no cover
-                    # The field has predefined choices; use the human-readable
-                    # part of the choice:
-                    value = dict(field.flatchoices).get(value, "")
-                if isinstance(value, bool):
-                    if value:
-                        value = mark_safe('<i class="bi bi-check-circle fs-4 text-success"></i>')
-                    else:
-                        value = mark_safe('<i class="bi bi-x-circle fs-4 text-danger"></i>')
-            row.append(value)
-        return row
+        return [accessor(result) for accessor in self.column_accessors]
 
     def _get_default_actions(self, request):
         _actions = []
@@ -288,18 +375,61 @@ class ChangelistView(PermissionRequiredMixin, FilterUserMixin, ModelViewMixin, B
         if self.search_form_class:
             return self.search_form_class(data=request.GET, user=request.user)
 
+    @cached_property
+    def search_form(self) -> _forms.SearchForm | None:
+        """The search form of the request, created once for the queryset and the context."""
+        return self.get_search_form(self.request)
+
+    def get_list_select_related(self):
+        """
+        Return the relations to fetch along with the results: the foreign keys
+        in `list_display` plus the relations in `list_select_related`.
+        """
+        related = []
+        for name in self.list_display:
+            if hasattr(self, name) and callable(getattr(self, name)):
+                continue
+            field = self.opts.get_field(name)
+            if isinstance(field, models.ForeignKey):
+                related.append(field.name)
+        return [*related, *(name for name in self.list_select_related if name not in related)]
+
     def get_queryset(self):
         qs = super().get_queryset()
-        search_form = self.get_search_form(self.request)
-        if search_form and search_form.is_valid():
-            return search_form.apply_filters(qs)
+        if related := self.get_list_select_related():
+            qs = qs.select_related(*related)
+        if self.list_defer:
+            qs = qs.defer(*self.list_defer)
+        if self.search_form and self.search_form.is_valid():
+            return self.search_form.apply_filters(qs)
         return qs
 
+    def get_count(self, queryset):
+        """Return the total number of results for the pagination."""
+        return queryset.count()
+
+    def get_paginator(self, queryset, *args, **kwargs):
+        paginator = super().get_paginator(queryset, *args, **kwargs)
+        # Count like the keyset pagination does, so that subclasses can
+        # supply a cached count:
+        paginator.count = self.get_count(queryset)
+        return paginator
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.keyset_ordering or queryset.query.order_by:
+            return super().paginate_queryset(queryset, page_size)
+        paginator = KeysetPaginator(queryset, page_size, self.keyset_ordering, count=lambda: self.get_count(queryset))
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidPage as e:
+            raise Http404(str(e))
+        return paginator, page, page.object_list, page.has_other_pages()
+
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         ctx["has_add_permission"] = perms.has_add_permission(self.request.user, self.opts)
         ctx["add_url"] = f"{self.model._meta.model_name}_add"
-        ctx["search_form"] = self.get_search_form(self.request)
+        ctx["search_form"] = self.search_form
         return ctx
 
 
@@ -416,6 +546,9 @@ class NachweisListView(ChangelistView):
     mainclass = "container-fluid px-5"
     search_form_class = _forms.NachweisSearchForm
     template_name = "nachweis_list.html"
+    # The list only shows the beginning of the texts (see get_queryset):
+    list_defer = ["betrieb", "schule"]
+    keyset_ordering = ["-ausbildungswoche", "-pk"]
 
     def get_column_classes(self):
         return {
@@ -431,39 +564,64 @@ class NachweisListView(ChangelistView):
 
     @list_display_callable()
     def zeitraum(self, obj):
-        dates = list(map(lambda d: date_format(d, "d. F Y"), [obj.datum_start, obj.datum_ende]))
-        return format_html('<span class="text-nowrap">{}</span> <br> <span class="text-nowrap">{}</span>', *dates)
+        return format_html(
+            '<span class="text-nowrap">{}</span> <br> <span class="text-nowrap">{}</span>',
+            dateformat.format(obj.datum_start, ZEITRAUM_FORMAT),
+            dateformat.format(obj.datum_ende, ZEITRAUM_FORMAT),
+        )
+
+    @staticmethod
+    def _truncate_excerpt(obj, field, num_words):
+        """
+        Truncate the excerpt of the given field like the truncatewords filter
+        would truncate the full text.
+        """
+        excerpt, continues = get_excerpt(obj, field)
+        html = truncatewords(linebreaksbr(excerpt), num_words)
+        if continues and len(excerpt.split()) <= num_words:
+            # truncatewords did not truncate; mark the text as truncated with
+            # the same suffix:
+            html = mark_safe(f"{html} …")
+        return html
 
     @list_display_callable(label="Betriebliche Tätigkeiten")
     def betrieb(self, obj):
-        return truncatewords(linebreaksbr(obj.betrieb), 30)
+        return self._truncate_excerpt(obj, "betrieb", 30)
 
     @list_display_callable(label="Berufsschule")
     def schule(self, obj):
-        return truncatewords(linebreaksbr(obj.schule), 10)
+        return self._truncate_excerpt(obj, "schule", 10)
 
     def get_queryset(self):
-        qs = super().get_queryset()
-        if self.request.GET.get("unfinished"):
-            qs = qs.filter(fertig=False)
-        if self.request.GET.get("unsubmitted"):
-            qs = qs.filter(eingereicht_bei="")
-        if self.request.GET.get("unsigned"):
-            qs = qs.filter(unterschrieben=False)
+        qs = annotate_excerpts(super().get_queryset(), "betrieb", "schule")
+        for status, q in NACHWEIS_STATUS_FILTERS.items():
+            if self.request.GET.get(status):
+                qs = qs.filter(q)
         return qs
 
+    @cached_property
+    def facet_counts(self):
+        """
+        The number of results, in total and per filter option. Counted once
+        per search, until a Nachweis of the user changes.
+        """
+        return get_cached_nachweis_facet_counts(
+            self.request.user, self.object_list, self.request.GET, exclude=[self.cursor_kwarg, self.page_kwarg]
+        )
+
+    def get_count(self, queryset):
+        return self.facet_counts.total
+
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        eingereicht_choices = [("", "---------")]
-        for name in (
-            _models.Nachweis.objects.filter(user=self.request.user)
-            .values_list("eingereicht_bei", flat=True)
-            .order_by("eingereicht_bei")
-            .distinct()
-        ):
-            if name:
-                eingereicht_choices.append((name, name))
-        ctx["eingereicht_choices"] = eingereicht_choices
+        # Copy the choices for the finish modal before the counts are added:
+        ctx["eingereicht_choices"] = list(self.search_form.fields["eingereicht_bei"].choices)
+        self.search_form.add_facet_counts(self.facet_counts)
+        ctx["facet_counts"] = self.facet_counts
+        ctx["abteilung_facets"] = [
+            (pk, name, self.facet_counts.abteilungen.get(pk, 0))
+            for pk, name in get_cached_nachweis_facets(self.request.user).abteilungen
+        ]
         return ctx
 
 
@@ -496,6 +654,10 @@ class AbteilungListView(ChangelistView):
 @login_required
 def print_preview(request):
     """Preview the print layout for a Nachweis object."""
+    return _render_print_preview(request)
+
+
+def _render_print_preview(request):
     form = forms.modelform_factory(_models.Nachweis, fields=forms.ALL_FIELDS)(data=request.GET.dict())
     # Validate the form. Without this step, form.instance will be missing data
     # for some fields.
@@ -530,22 +692,42 @@ class DashboardView(LoginRequiredMixin, BaseViewMixin, TemplateView):
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         current = get_current_nachweis(self.request.user)
-        recent = _models.Nachweis.objects.filter(user=self.request.user).order_by("-datum_start")
+        recent = (
+            _models.Nachweis.objects.filter(user=self.request.user).defer("betrieb", "schule").order_by("-datum_start")
+        )
         if current:
             recent = recent.exclude(pk=current.pk)
         ctx["current_nachweis"] = current
         ctx["last_nachweise"] = recent[:3]
-        ctx["missing_nachweise"] = [OrderedDict(start=s, end=e) for s, e in get_missing_nachweise(self.request.user)]
-        ctx["action"] = actions.AddMisingDashboardAction()
+        ctx["missing_nachweise"] = [
+            OrderedDict(start=s, end=e) for s, e in get_cached_missing_nachweise(self.request.user)
+        ]
+        ctx["action"] = actions.AddMisingDashboardAction().bind(self.request)
         return ctx
 
 
 class MissingView(LoginRequiredMixin, BaseListView):
+    """
+    List the missing Nachweise of the user.
+
+    A POST request creates empty Nachweise for the missing periods that were
+    selected (parameter 'start', as ISO dates), or for all of them (parameter
+    'all').
+    """
+
     title = "Fehlende Nachweise"
-    template_name = "list.html"
+    template_name = "missing.html"
     permission_required = [perms.get_perm("view", _models.Nachweis._meta)]
     actions = [actions.AddMissingAction()]
-    list_display = ["zeitraum"]
+    list_display = ["auswahl", "zeitraum"]
+
+    @list_display_callable(label="")
+    def auswahl(self, start, end):
+        return format_html(
+            '<input type="checkbox" class="form-check-input" name="start" value="{}" form="{}" aria-label="Auswählen">',
+            start.isoformat(),
+            "missing-bulk-form",
+        )
 
     @list_display_callable(label="Datum/Zeitraum")
     def zeitraum(self, start, end):
@@ -554,8 +736,10 @@ class MissingView(LoginRequiredMixin, BaseListView):
         else:
             return f"{date_format(start)} - {date_format(end)}"
 
-    def get_queryset(self) -> list[tuple[date, date]]:
-        return get_missing_nachweise(self.request.user)
+    def get_queryset(self) -> MissingNachweise:
+        # A lazy sequence; the paginator only generates the periods of the
+        # current page.
+        return MissingNachweise(self.request.user)
 
     def get_result_rows(self, object_list: list[tuple[date, date]]) -> list[OrderedDict]:
         rows = super().get_result_rows(object_list)
@@ -564,13 +748,31 @@ class MissingView(LoginRequiredMixin, BaseListView):
         return rows
 
     def get_result_row(self, result: tuple[date, date]) -> list:
-        return [self.zeitraum(*result)]
+        return [self.auswahl(*result), self.zeitraum(*result)]
 
     def get_context_data(self, **kwargs) -> dict:
         ctx = super().get_context_data(**kwargs)
         ctx["is_daily"] = self.request.user.profile.interval == _models.UserProfile.IntervalType.DAILY
+        ctx["has_add_permission"] = perms.has_add_permission(self.request.user, _models.Nachweis._meta)
         return ctx
 
+    def post(self, request, *args, **kwargs):
+        if not perms.has_add_permission(request.user, _models.Nachweis._meta):
+            raise PermissionDenied
+        if request.POST.get("all"):
+            starts = None
+        else:
+            try:
+                starts = [date.fromisoformat(d) for d in request.POST.getlist("start")]
+            except ValueError:
+                return HttpResponseBadRequest()
+            if not starts:
+                messages.warning(request, "Keine fehlenden Nachweise ausgewählt.")
+                return redirect("missing")
+        created = create_missing_nachweise(request.user, starts)
+        messages.success(request, f"{len(created)} Nachweis(e) erstellt.")
+        return redirect("missing")
+
 
 @require_POST
 def finish_nachweis_view(request):
@@ -592,6 +794,134 @@ def nachweis_download_view(request, pk):
     return nachweis_to_pdf(request, nachweis)
 
 
+def _pdf_job_data(job):
+    """Return the status data of the given PDF job for the JSON responses."""
+    data = {
+        "status": job.status,
+        "status_url": reverse("pdf_job_status", kwargs={"pk": job.pk}),
+        "error": job.error,
+    }
+    if job.status == _models.PdfJob.Status.DONE:
+        data["download_url"] = reverse("pdf_job_download", kwargs={"pk": job.pk})
+    return data
+
+
+@require_POST
+def nachweis_pdf_job_view(request, pk):
+    """Enqueue the conversion of the given Nachweis to PDF."""
+    if not perms.has_view_permission(request.user, _models.Nachweis._meta):
+        return HttpResponseForbidden()
+    nachweis = get_object_or_404(_models.Nachweis, pk=pk, user=request.user)
+    return JsonResponse(_pdf_job_data(pdf_jobs.enqueue(request, nachweis)))
+
+
+def pdf_job_status_view(request, pk):
+    """Return the status of the given PDF job."""
+    if not request.user.is_authenticated:
+        return HttpResponseForbidden()
+    job = get_object_or_404(_models.PdfJob.objects.only("status", "error"), pk=pk, user=request.user)
+    return JsonResponse(_pdf_job_data(job))
+
+
+def pdf_job_download_view(request, pk):
+    """Download the PDF of the given finished PDF job."""
+    if not perms.has_view_permission(request.user, _models.Nachweis._meta):
+        return HttpResponseForbidden()
+    job = get_object_or_404(
+        _models.PdfJob.objects.select_related("nachweis"),
+        pk=pk,
+        user=request.user,
+        status=_models.PdfJob.Status.DONE,
+    )
+    if not (path := pdf_cache.get(job.nachweis, job.key)):
+        # The Nachweis was changed or the PDF was evicted in the meantime.
+        messages.error(request, "Das PDF ist nicht mehr verfügbar. Bitte erneut herunterladen.")
+        return redirect("nachweis_list")
+    return FileResponse(open(path, "rb"), as_attachment=True, filename=f"{job.nachweis.nummer}.pdf")
+
+
+def _get_batch_download_queryset(request):
+    """
+    Return the Nachweise to download: the Nachweise selected via the 'pk'
+    parameter, or else all the Nachweise that match the current filters of
+    the Nachweis list.
+    """
+    list_view = NachweisListView()
+    list_view.setup(request)
+    queryset = list_view.get_queryset()
+    if pks := request.GET.getlist("pk"):
+        queryset = queryset.filter(pk__in=[pk for pk in pks if pk.isdigit()])
+    # Chronological order for printing. The print template shows the full
+    # texts and the name of the user, so load them along with every Nachweis:
+    return queryset.defer(None).select_related("user").order_by("datum_start", "nummer")
+
+
+def _check_batch_download_count(request, count):
+    """
+    Return a redirect to the Nachweis list if there are no Nachweise to
+    download or more than the PDF_BATCH_MAX_NACHWEISE setting allows.
+    """
+    if not count:
+        messages.warning(request, "Keine Nachweise zum Herunterladen gefunden.")
+        return redirect("nachweis_list")
+    if count > settings.PDF_BATCH_MAX_NACHWEISE:
+        messages.warning(
+            request,
+            f"Es können höchstens {settings.PDF_BATCH_MAX_NACHWEISE} Nachweise auf einmal heruntergeladen werden "
+            f"({count} ausgewählt). Bitte die Auswahl einschränken.",
+        )
+        return redirect("nachweis_list")
+    return None
+
+
+def nachweis_batch_download_view(request):
+    """
+    Download several Nachweise as one merged PDF, or as a ZIP file if the
+    parameter 'zip' is set.
+
+    Download the Nachweise selected via the 'pk' parameter, or else all the
+    Nachweise that match the current filters of the Nachweis list.
+    """
+    if not perms.has_view_permission(request.user, _models.Nachweis._meta):
+        return HttpResponseForbidden()
+    queryset = _get_batch_download_queryset(request)
+    if response := _check_batch_download_count(request, queryset.count()):
+        return response
+    return nachweise_to_pdf(request, queryset, as_zip=bool(request.GET.get("zip")))
+
+
+# Async versions of the views that wait for gotenberg, for the ASGI
+# deployment (see the ASYNC_VIEWS setting). The event loop keeps serving other
+# requests while the PDFs are converted.
+
+
+async def anachweis_download_view(request, pk):
+    """The async version of nachweis_download_view."""
+    user = await request.auser()
+    if not await perms.ahas_view_permission(user, _models.Nachweis._meta):
+        return HttpResponseForbidden()
+    nachweis = await aget_object_or_404(_models.Nachweis, pk=pk, user=user)
+    return await anachweis_to_pdf(request, nachweis)
+
+
+async def anachweis_batch_download_view(request):
+    """The async version of nachweis_batch_download_view."""
+    user = await request.auser()
+    if not await perms.ahas_view_permission(user, _models.Nachweis._meta):
+        return HttpResponseForbidden()
+    queryset = await sync_to_async(_get_batch_download_queryset)(request)
+    if response := _check_batch_download_count(request, await queryset.acount()):
+        return response
+    return await anachweise_to_pdf(request, queryset, as_zip=bool(request.GET.get("zip")))
+
+
+@login_required
+async def aprint_preview(request):
+    """The async version of print_preview."""
+    # Rendering runs the context processors, which may query the database:
+    return await sync_to_async(_render_print_preview)(request)
+
+
 ################################################################################
 # DELETE VIEWS & RECYCLE BIN
 ################################################################################
@@ -666,11 +996,14 @@ class PapierkorbView(BaseViewMixin, ListView):
         """Return a list of deleted objects, plus additional info."""
         deleted_objects = []
         for qs in self.get_queryset():
+            if qs.model is _models.Nachweis:
+                # The overview only shows the beginning of betrieb:
+                qs = annotate_excerpts(qs, "betrieb").defer("betrieb", "schule")
             objects = []
             for obj in qs.all():
                 objects.append((obj, self.get_obj_info(obj)))
             if objects:
-                deleted_objects.append((qs.model._meta, qs.count(), objects))
+                deleted_objects.append((qs.model._meta, len(objects), objects))
         return deleted_objects
 
     def get_obj_info(self, obj):
@@ -681,9 +1014,10 @@ class PapierkorbView(BaseViewMixin, ListView):
         """
         match obj:
             case _models.Nachweis():
-                betrieb_split = obj.betrieb.split(" ")
+                betrieb, continues = get_excerpt(obj, "betrieb")
+                betrieb_split = betrieb.split(" ")
                 betrieb = " ".join(betrieb_split[:10])
-                if len(betrieb_split) > 10:
+                if len(betrieb_split) > 10 or continues:
                     betrieb += " ..."
                 if obj.datum_ende and obj.datum_ende != obj.datum_start:
                     datum = f"{obj.datum_start.strftime('%d. %b %Y')} - {obj.datum_ende.strftime('%d. %b %Y')}"